@@ -0,0 +1,24 @@
+from typing import Dict, Any
+from .playback_adapter import PlaybackAdapter
+from recording.log_reader import ChunkedLogReader
+from recording.readers import open_log
+
+
+class BagFileAdapter(PlaybackAdapter):
+    """离线 ROS bag / MCAP 文件适配器 - 无需 ROS 环境，直接解析文件并按时间回放"""
+
+    @classmethod
+    def get_config_schema(cls) -> Dict[str, Any]:
+        schema = super().get_config_schema()
+        for field in schema["fields"]:
+            if field["name"] == "file":
+                field["label"] = "Bag / MCAP 文件"
+                field["placeholder"] = ".bag 或 .mcap 文件的绝对路径（相对路径基于 recordings 目录）"
+        return schema
+
+    @classmethod
+    def get_display_name(cls) -> str:
+        return "ROS Bag / MCAP 文件"
+
+    def _open_reader(self, path: str) -> ChunkedLogReader:
+        return open_log(path)
@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
 from typing import Dict, Any, Callable, Optional, List
 import asyncio
 from datetime import datetime
 from plugins.plugin_manager import PluginManager
+from plugins.message import Message
+
+# 批处理窗口内按 child_frame_id 合并变换的话题：不同发布者的 TF 各自只含部分坐标系，
+# 静态变换只推送一次，均不能只保留窗口内最后一条
+MERGED_TF_TOPICS = ('/tf', '/tf_static')
 
 class BaseAdapter(ABC):
     """数据源适配器基类"""
@@ -10,6 +16,7 @@ class BaseAdapter(ABC):
     def __init__(self):
         # 基础属性
         self.callbacks: List[Callable] = []
+        self.raw_callbacks: List[Callable] = []  # 插件处理前的原始消息回调（如录制）
         self.is_connected = False
         self.config = {}
         self.subscribed_topics = {}
@@ -37,6 +44,18 @@ class BaseAdapter(ABC):
             await self.plugin_manager.initialize(plugins_dir)
             self.plugins_initialized = True
     
+    async def prepare_plugins(self, topic: str, message_type: str = None):
+        """订阅时预先加载与话题/类型匹配的插件，避免首条消息承担导入开销"""
+        if not message_type:
+            return
+        await self._ensure_async_resources()
+        await self.plugin_manager.preload(topic, message_type)
+    
+    async def reload_plugins(self, module: str = None) -> Dict[str, Any]:
+        """热重载插件模块，连接与订阅保持不变"""
+        await self._ensure_async_resources()
+        return await self.plugin_manager.reload_plugins(module)
+    
     def enable_message_batching(self, frequency: float = 30.0):
         """启用消息批处理（仅设置标志，不创建任务）"""
         self.enable_batching = True
@@ -66,29 +85,78 @@ class BaseAdapter(ABC):
         """缓冲消息或直接发送（集成插件处理）"""
         await self._ensure_async_resources()
         
-        # 通过插件系统处理消息
-        processed_data = await self._process_through_plugins(topic, message_type, data)
-        
-        # 如果插件返回None，表示消息被过滤
-        if processed_data is None:
-            return
+        # 插件处理前通知原始消息回调
+        for callback in self.raw_callbacks:
+            try:
+                callback(topic, data, message_type)
+            except Exception as e:
+                print(f"Raw callback error: {e}")
         
+        # 通过插件系统处理消息；CPU 密集型插件的结果稍后异步交付
+        try:
+            if self.plugins_initialized:
+                await self.plugin_manager.dispatch(topic, message_type or 'unknown', data, self._emit_message)
+                return
+        except Exception as e:
+            print(f"Error processing message through plugins: {e}")
+        await self._emit_message(topic, data)
+    
+    async def _emit_message(self, topic: str, processed_data: dict):
+        """发送插件处理后的消息
+
+        插件可以改写消息的 topic 字段，把消息转到其他话题发送（如地图补丁并入地图话题）。
+        """
+        if isinstance(processed_data, Mapping):
+            topic = processed_data.get('topic') or topic
         if self.enable_batching:
             async with self.buffer_lock:
+                previous = self.message_buffer.get(topic)
+                if previous is not None:
+                    processed_data = self._merge_buffered(topic, previous, processed_data)
                 self.message_buffer[topic] = processed_data
         else:
             # 直接发送
             await self._notify_callbacks(topic, processed_data)
     
-    async def _process_through_plugins(self, topic: str, message_type: str, data: dict) -> Optional[dict]:
-        """通过插件系统处理消息"""
-        try:
-            if self.plugins_initialized:
-                return await self.plugin_manager.process_message(topic, message_type or 'unknown', data)
-            return data
-        except Exception as e:
-            print(f"Error processing message through plugins: {e}")
-            return data
+    @classmethod
+    def _merge_buffered(cls, topic: str, previous: dict, current: dict) -> dict:
+        """同一批处理窗口内同一话题的两条消息：增量消息合并，其余只保留后到的"""
+        if topic in MERGED_TF_TOPICS:
+            return cls._merge_transforms(previous, current)
+        previous_data = previous.get('data')
+        current_data = current.get('data')
+        if (isinstance(previous_data, Mapping) and isinstance(current_data, Mapping) and
+                previous_data.get('type') == current_data.get('type') == 'OccupancyGridTiles'):
+            return cls._merge_tiles(previous, current)
+        return current
+
+    @staticmethod
+    def _merge_tiles(previous: dict, current: dict) -> dict:
+        """合并连续的两条地图分块增量，同一块以后到的为准；不连续或后到的是全量时只保留后到的"""
+        previous_data = previous['data']
+        current_data = current['data']
+        if current_data.get('full') or current_data.get('base_version') != previous_data.get('version'):
+            return current
+        tiles = {(t['tx'], t['ty']): t for t in previous_data.get('tiles', [])}
+        for tile in current_data.get('tiles', []):
+            tiles[(tile['tx'], tile['ty'])] = tile
+        merged = dict(current_data, base_version=previous_data.get('base_version'),
+                      full=previous_data.get('full', False), tiles=list(tiles.values()))
+        return Message.wrap(current).with_fields(data=merged)
+
+    @staticmethod
+    def _merge_transforms(previous: dict, current: dict) -> dict:
+        """合并同一窗口内的两条 TF 消息，同一 child_frame_id 以后到的为准"""
+        previous_transforms = (previous.get('data') or {}).get('transforms') or []
+        current_transforms = (current.get('data') or {}).get('transforms') or []
+        if not previous_transforms:
+            return current
+        merged = {t.get('child_frame_id'): t for t in previous_transforms}
+        for transform in current_transforms:
+            child_frame_id = transform.get('child_frame_id')
+            merged.pop(child_frame_id, None)
+            merged[child_frame_id] = transform
+        return Message.wrap(current).with_path(('data', 'transforms'), list(merged.values()))
     
     async def _batch_update_loop(self):
         """批量更新循环"""
@@ -185,6 +253,10 @@ class BaseAdapter(ABC):
         if callback in self.callbacks:
             self.callbacks.remove(callback)
     
+    def add_raw_data_callback(self, callback: Callable):
+        """添加原始消息回调函数（同步调用，需保持轻量）"""
+        self.raw_callbacks.append(callback)
+    
     async def _notify_callbacks(self, topic: str, data: Any):
         """通知所有回调函数"""
         for callback in self.callbacks:
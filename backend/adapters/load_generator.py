@@ -0,0 +1,201 @@
+import base64
+import json
+import math
+import time
+from typing import Dict, Any, List, Optional
+import numpy as np
+from plugins.cloud_codec import pack_point_cloud
+
+# 负载话题按顺序轮流分配的类型
+LOAD_TOPIC_KINDS = [
+    ("cloud", "sensor_msgs/PointCloud2"),
+    ("image", "sensor_msgs/Image"),
+    ("pose", "geometry_msgs/PoseStamped"),
+]
+
+
+class LoadGenerator:
+    """可扩展的合成负载生成器
+
+    按配置生成任意数量的话题（点云/图像/位姿）与指定深度的 TF 树；
+    使用带种子的随机数发生器，数据在预分配缓冲区中向量化生成，便于不同构建间对比。
+
+    topic_rates 按话题名或类型（cloud/image/pose/tf）覆盖默认频率 rate_hz，
+    如 {"cloud": 20, "/load/pose_2": 1}，用于模拟快慢话题混合的负载；话题名优先于类型。
+    """
+
+    def __init__(self, topic_count: int = 3, rate_hz: float = 10.0, point_count: int = 2000,
+                 image_width: int = 640, image_height: int = 480, tf_depth: int = 3, seed: int = 0,
+                 topic_rates: Optional[Dict[str, float]] = None):
+        self.topic_count = max(int(topic_count), 0)
+        self.rate_hz = max(float(rate_hz), 0.1)
+        self.topic_rates = {key: max(float(rate), 0.1) for key, rate in (topic_rates or {}).items()}
+        self.point_count = max(int(point_count), 0)
+        self.image_width = max(int(image_width), 1)
+        self.image_height = max(int(image_height), 1)
+        self.tf_depth = max(int(tf_depth), 0)
+        self.seed = int(seed)
+        self.rng = np.random.default_rng(self.seed)
+
+        self.topics: Dict[str, str] = {}
+        self._topic_kinds: Dict[str, str] = {}
+        for i in range(self.topic_count):
+            kind, message_type = LOAD_TOPIC_KINDS[i % len(LOAD_TOPIC_KINDS)]
+            self.topics[f"/load/{kind}_{i}"] = message_type
+            self._topic_kinds[f"/load/{kind}_{i}"] = kind
+        if self.tf_depth > 0:
+            self.topics["/tf"] = "tf2_msgs/TFMessage"
+            self._topic_kinds["/tf"] = "tf"
+
+        # 预分配缓冲区，生成时原地写入
+        self._cloud_buffers: Dict[str, np.ndarray] = {}
+        self._image_buffers: Dict[str, np.ndarray] = {}
+        self._sequence = 0
+
+        self.messages_generated = 0
+        self.bytes_generated = 0
+        self.started_at = time.time()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "LoadGenerator":
+        return cls(
+            topic_count=config.get('load_topic_count', 3),
+            rate_hz=config.get('load_rate_hz', 10.0),
+            point_count=config.get('load_point_count', 2000),
+            image_width=config.get('load_image_width', 640),
+            image_height=config.get('load_image_height', 480),
+            tf_depth=config.get('load_tf_depth', 3),
+            seed=config.get('load_seed', 0),
+            topic_rates=cls._parse_topic_rates(config.get('load_topic_rates')),
+        )
+
+    @staticmethod
+    def _parse_topic_rates(value: Any) -> Dict[str, float]:
+        """接受字典或 JSON 字符串（表单中为文本输入）"""
+        if not value:
+            return {}
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError as e:
+                print(f"[LoadGenerator] Ignoring invalid load_topic_rates: {e}")
+                return {}
+        return dict(value) if isinstance(value, dict) else {}
+
+    def rate_for(self, topic: str) -> float:
+        """话题的生成频率（Hz）"""
+        if topic in self.topic_rates:
+            return self.topic_rates[topic]
+        return self.topic_rates.get(self._topic_kinds.get(topic), self.rate_hz)
+
+    def get_available_topics(self) -> List[Dict[str, str]]:
+        return [{"name": name, "type": message_type} for name, message_type in self.topics.items()]
+
+    def _header(self, now: float, frame_id: str) -> Dict[str, Any]:
+        return {
+            "seq": self._sequence,
+            "stamp": {"sec": int(now), "nsec": int((now % 1) * 1e9)},
+            "frame_id": frame_id
+        }
+
+    def _envelope(self, topic: str, message_type: str, data: Dict[str, Any], now: float) -> Dict[str, Any]:
+        return {
+            'topic': topic,
+            'type': 'generic',
+            'message_type': message_type,
+            'data': data,
+            'timestamp': now
+        }
+
+    def _generate_cloud(self, topic: str, now: float) -> Dict[str, Any]:
+        buffer = self._cloud_buffers.get(topic)
+        if buffer is None:
+            buffer = np.empty((self.point_count, 3), dtype=np.float32)
+            self._cloud_buffers[topic] = buffer
+        self.rng.random(out=buffer, dtype=np.float32)
+        buffer *= np.array([10.0, 10.0, 3.0], dtype=np.float32)
+        buffer -= np.array([5.0, 5.0, 0.0], dtype=np.float32)
+        cloud = pack_point_cloud(buffer, header=self._header(now, "world"))
+        self.bytes_generated += cloud["row_step"]
+        return cloud
+
+    def _generate_image(self, topic: str, now: float) -> Dict[str, Any]:
+        frame = self._image_buffers.get(topic)
+        if frame is None:
+            frame = self.rng.integers(0, 256, size=(self.image_height, self.image_width, 3), dtype=np.uint8)
+            self._image_buffers[topic] = frame
+        # 每帧只改写一行，既保证内容变化又避免重新生成整幅图像
+        row = self._sequence % self.image_height
+        frame[row] = self.rng.integers(0, 256, dtype=np.uint8)
+        raw = frame.tobytes()
+        self.bytes_generated += len(raw)
+        return {
+            "header": self._header(now, "camera"),
+            "height": self.image_height,
+            "width": self.image_width,
+            "encoding": "rgb8",
+            "is_bigendian": 0,
+            "step": self.image_width * 3,
+            "data": base64.b64encode(raw).decode('ascii')
+        }
+
+    def _generate_pose(self, topic: str, now: float) -> Dict[str, Any]:
+        x, y, yaw = self.rng.uniform(-2.0, 2.0, size=3).tolist()
+        yaw *= math.pi / 2
+        return {
+            "header": self._header(now, "world"),
+            "pose": {
+                "position": {"x": x, "y": y, "z": 0.0},
+                "orientation": {"x": 0.0, "y": 0.0, "z": math.sin(yaw / 2), "w": math.cos(yaw / 2)}
+            }
+        }
+
+    def _generate_tf(self, now: float) -> Dict[str, Any]:
+        transforms = []
+        parent = "world"
+        for depth in range(1, self.tf_depth + 1):
+            child = f"load_link_{depth}"
+            angle = now * 0.5 / depth
+            transforms.append({
+                "header": self._header(now, parent),
+                "child_frame_id": child,
+                "transform": {
+                    "translation": {"x": 0.5, "y": 0.0, "z": 0.1},
+                    "rotation": {"x": 0.0, "y": 0.0, "z": math.sin(angle / 2), "w": math.cos(angle / 2)}
+                }
+            })
+            parent = child
+        return {"transforms": transforms}
+
+    def generate(self, topic: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """为负载话题生成一条消息"""
+        message_type = self.topics.get(topic)
+        if message_type is None:
+            return None
+        now = time.time() if now is None else now
+        self._sequence += 1
+
+        if topic == "/tf":
+            data = self._generate_tf(now)
+        elif message_type == "sensor_msgs/PointCloud2":
+            data = self._generate_cloud(topic, now)
+        elif message_type == "sensor_msgs/Image":
+            data = self._generate_image(topic, now)
+        else:
+            data = self._generate_pose(topic, now)
+
+        self.messages_generated += 1
+        return self._envelope(topic, message_type, data, now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return {
+            "topic_count": len(self.topics),
+            "rate_hz": self.rate_hz,
+            "topic_rates": {topic: self.rate_for(topic) for topic in self.topics},
+            "seed": self.seed,
+            "messages_generated": self.messages_generated,
+            "bytes_generated": self.bytes_generated,
+            "messages_per_second": self.messages_generated / elapsed,
+            "bytes_per_second": self.bytes_generated / elapsed
+        }
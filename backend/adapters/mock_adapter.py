@@ -3,6 +3,8 @@ import numpy as np
 import time
 from typing import Dict, Any, List
 from .base_adapter import BaseAdapter
+from .load_generator import LoadGenerator
+from plugins.cloud_codec import pack_point_cloud
 from datetime import datetime
 
 class MockAdapter(BaseAdapter):
@@ -14,6 +16,12 @@ class MockAdapter(BaseAdapter):
         self.update_interval = 0.1
 
         self.__text_count = 0
+        self._grid_base = None
+        self._rng = np.random.default_rng()
+        self._cloud_buffer = np.empty((2000, 3), dtype=np.float32)
+
+        # 负载生成模式
+        self.load_generator = None
     
     @classmethod
     def get_config_schema(cls) -> Dict[str, Any]:
@@ -35,6 +43,89 @@ class MockAdapter(BaseAdapter):
                     "label": "启用批处理",
                     "default": False,
                     "required": False
+                },
+                {
+                    "name": "load_mode",
+                    "type": "boolean",
+                    "label": "负载生成模式",
+                    "default": False,
+                    "required": False
+                },
+                {
+                    "name": "load_topic_count",
+                    "type": "number",
+                    "label": "负载话题数量",
+                    "default": 3,
+                    "required": False,
+                    "min": 0,
+                    "max": 1000,
+                    "step": 1
+                },
+                {
+                    "name": "load_rate_hz",
+                    "type": "number",
+                    "label": "负载话题频率 (Hz)",
+                    "default": 10,
+                    "required": False,
+                    "min": 0.1,
+                    "max": 1000,
+                    "step": 0.1
+                },
+                {
+                    "name": "load_topic_rates",
+                    "type": "text",
+                    "label": "按话题/类型的频率 (JSON)",
+                    "default": "",
+                    "required": False,
+                    "placeholder": "{\"cloud\": 20, \"/load/pose_2\": 1}"
+                },
+                {
+                    "name": "load_point_count",
+                    "type": "number",
+                    "label": "每帧点云点数",
+                    "default": 2000,
+                    "required": False,
+                    "min": 0,
+                    "max": 10000000,
+                    "step": 1000
+                },
+                {
+                    "name": "load_image_width",
+                    "type": "number",
+                    "label": "图像宽度",
+                    "default": 640,
+                    "required": False,
+                    "min": 1,
+                    "max": 8192,
+                    "step": 1
+                },
+                {
+                    "name": "load_image_height",
+                    "type": "number",
+                    "label": "图像高度",
+                    "default": 480,
+                    "required": False,
+                    "min": 1,
+                    "max": 8192,
+                    "step": 1
+                },
+                {
+                    "name": "load_tf_depth",
+                    "type": "number",
+                    "label": "TF 树深度",
+                    "default": 3,
+                    "required": False,
+                    "min": 0,
+                    "max": 1000,
+                    "step": 1
+                },
+                {
+                    "name": "load_seed",
+                    "type": "number",
+                    "label": "随机种子",
+                    "default": 0,
+                    "required": False,
+                    "step": 1
                 }
             ]
         }
@@ -56,9 +147,18 @@ class MockAdapter(BaseAdapter):
             
             self.is_connected = True
             
+            # 负载生成模式：自动订阅所有负载话题
+            if config.get('load_mode', False):
+                self.load_generator = LoadGenerator.from_config(config)
+                for topic_info in self.load_generator.get_available_topics():
+                    await self.subscribe_topic(topic_info['name'], topic_info['type'])
+            else:
+                self.load_generator = None
+            
             # 启动数据更新任务
             if self.update_task is None or self.update_task.done():
-                self.update_task = asyncio.create_task(self._update_loop())
+                loop = self._load_loop() if self.load_generator else self._update_loop()
+                self.update_task = asyncio.create_task(loop)
             
             return True
         except Exception as e:
@@ -132,7 +232,7 @@ class MockAdapter(BaseAdapter):
                 # 为每个订阅的话题生成数据
                 for topic in self.subscribed_topics.keys():
                     data = self._generate_mock_data(topic)
-                    await self._buffer_message(topic, data)
+                    await self._buffer_message(topic, data, data.get('message_type'))
                 
                 await asyncio.sleep(self.update_interval)
             except asyncio.CancelledError:
@@ -141,6 +241,37 @@ class MockAdapter(BaseAdapter):
                 print(f"Mock adapter update error: {e}")
                 await asyncio.sleep(1)
     
+    async def _load_loop(self):
+        """负载生成循环：每个已订阅话题按各自频率生成数据，落后时不追赶"""
+        next_due: Dict[str, float] = {}
+        while self.is_connected:
+            try:
+                now = time.time()
+                tick = time.monotonic()
+                for topic in list(self.subscribed_topics.keys()):
+                    due = next_due.get(topic, tick)
+                    if due > tick:
+                        continue
+                    data = self.load_generator.generate(topic, now) or self._generate_mock_data(topic)
+                    await self._buffer_message(topic, data, data.get('message_type'))
+                    next_due[topic] = max(due + 1.0 / self.load_generator.rate_for(topic), tick)
+                
+                # 新订阅的话题最迟在 0.1 秒后开始生成
+                wake = min([due for topic, due in next_due.items() if topic in self.subscribed_topics], default=tick + 0.1)
+                await asyncio.sleep(max(min(wake, tick + 0.1) - time.monotonic(), 0))
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Mock adapter load loop error: {e}")
+                await asyncio.sleep(1)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取适配器状态（负载模式下附带生成统计）"""
+        status = super().get_status()
+        if self.load_generator:
+            status["load_generator"] = self.load_generator.get_stats()
+        return status
+    
     # 在mock_adapter中添加TF数据生成
     
     def _generate_tf_data(self, topic: str) -> Dict[str, Any]:
@@ -211,6 +342,8 @@ class MockAdapter(BaseAdapter):
     
     # 在get_available_topics中添加
     async def get_available_topics(self) -> List[Dict[str, str]]:
+        if self.load_generator:
+            return self.load_generator.get_available_topics()
         return [
             {"name": "/point_cloud", "type": "sensor_msgs/PointCloud2"},
             {"name": "/markers", "type": "visualization_msgs/MarkerArray"},
@@ -246,21 +379,16 @@ class MockAdapter(BaseAdapter):
     
     def _generate_point_cloud(self, topic: str) -> Dict[str, Any]:
         """生成点云数据"""
-        points = []
-        for i in range(2000):
-            x = np.random.uniform(-5, 5)
-            y = np.random.uniform(-5, 5)
-            z = np.random.uniform(0, 3)
-            points.append({"x": x, "y": y, "z": z})
+        points = self._cloud_buffer
+        self._rng.random(out=points, dtype=np.float32)
+        points *= np.array([10.0, 10.0, 3.0], dtype=np.float32)
+        points -= np.array([5.0, 5.0, 0.0], dtype=np.float32)
         
         return {
             'topic': topic,
             'type': 'generic',
             'message_type': 'sensor_msgs/PointCloud2',
-            'data': {
-                "type": "PointCloud",
-                "points": points
-            },
+            'data': pack_point_cloud(points, header={"frame_id": "world"}),
             'timestamp': time.time()
         }
     
@@ -299,17 +427,46 @@ class MockAdapter(BaseAdapter):
         }
     
     def _generate_grid(self, topic: str) -> Dict[str, Any]:
-        """生成网格数据"""
+        """生成栅格地图数据（静态墙体 + 一个移动障碍物）"""
+        size = 200
+        if self._grid_base is None:
+            base = np.zeros((size, size), dtype=np.int8)
+            base[:2, :] = base[-2:, :] = 100
+            base[:, :2] = base[:, -2:] = 100
+            base[60:140, 98:102] = 100
+            base[150:, 150:] = -1
+            self._grid_base = base
+
+        grid = self._grid_base.copy()
+        current_time = time.time()
+        cx = int(size / 2 + 60 * np.cos(current_time * 0.2))
+        cy = int(size / 2 + 60 * np.sin(current_time * 0.2))
+        grid[max(cy - 4, 0):cy + 4, max(cx - 4, 0):cx + 4] = 100
+
         return {
             'topic': topic,
             'type': 'generic',
             'message_type': 'nav_msgs/OccupancyGrid',
             'data': {
-                "type": "Grid",
-                "size": 10,
-                "divisions": 10
+                "header": {
+                    "stamp": {
+                        "sec": int(current_time),
+                        "nsec": int((current_time % 1) * 1e9)
+                    },
+                    "frame_id": "map"
+                },
+                "info": {
+                    "resolution": 0.05,
+                    "width": size,
+                    "height": size,
+                    "origin": {
+                        "position": {"x": -5.0, "y": -5.0, "z": 0.0},
+                        "orientation": {"x": 0.0, "y": 0.0, "z": 0.0, "w": 1.0}
+                    }
+                },
+                "data": grid.ravel().tolist()
             },
-            'timestamp': time.time()
+            'timestamp': current_time
         }
     
     def _generate_pose(self, topic: str) -> Dict[str, Any]:
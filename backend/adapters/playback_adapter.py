@@ -0,0 +1,280 @@
+import asyncio
+import os
+import time
+from typing import Dict, Any, List, Optional
+from .base_adapter import BaseAdapter
+from recording.log_reader import ChunkedLogReader, LogReader
+from recording.recorder import RECORDINGS_DIR
+from datetime import datetime
+
+class PlaybackAdapter(BaseAdapter):
+    """录制回放适配器 - 通过内存映射读取 .tlog 录制文件并按时间回放"""
+
+    def __init__(self):
+        super().__init__()
+        self.reader: Optional[ChunkedLogReader] = None
+        self.playback_task = None
+
+        # 回放控制状态
+        self.rate = 1.0
+        self.loop = False
+        self.paused = False
+        self.position = 0.0
+        self._topics: set = set()  # 与 subscribed_topics 同步，供读取器跳过无关块
+        self._iterator = None
+        self._pending = None
+        self._step_pending = False
+        self._anchor_wall = 0.0
+        self._anchor_log = 0.0
+        self._wake: Optional[asyncio.Event] = None
+
+    @classmethod
+    def get_config_schema(cls) -> Dict[str, Any]:
+        return {
+            "fields": [
+                {
+                    "name": "file",
+                    "type": "text",
+                    "label": "录制文件",
+                    "default": "",
+                    "required": True,
+                    "placeholder": "recordings 目录下的文件名或绝对路径"
+                },
+                {
+                    "name": "rate",
+                    "type": "number",
+                    "label": "回放速率",
+                    "default": 1.0,
+                    "required": False,
+                    "min": 0.01,
+                    "max": 100.0,
+                    "step": 0.1
+                },
+                {
+                    "name": "loop",
+                    "type": "boolean",
+                    "label": "循环回放",
+                    "default": False,
+                    "required": False
+                },
+                {
+                    "name": "start_paused",
+                    "type": "boolean",
+                    "label": "连接后暂停",
+                    "default": False,
+                    "required": False
+                }
+            ]
+        }
+
+    @classmethod
+    def get_display_name(cls) -> str:
+        return "录制回放"
+
+    def _resolve_path(self, file_name: str) -> str:
+        if os.path.isabs(file_name):
+            return file_name
+        return os.path.join(RECORDINGS_DIR, file_name)
+
+    def _open_reader(self, path: str) -> ChunkedLogReader:
+        return LogReader(path)
+
+    async def connect(self, config: Dict[str, Any]) -> bool:
+        """打开录制文件（仅读取索引）并启动回放任务"""
+        try:
+            path = self._resolve_path(config.get('file', ''))
+            if not os.path.isfile(path):
+                print(f"Playback file not found: {path}")
+                return False
+
+            self.reader = self._open_reader(path)
+            self.config = config
+            self.rate = max(float(config.get('rate', 1.0)), 0.01)
+            self.loop = bool(config.get('loop', False))
+            self.paused = bool(config.get('start_paused', False))
+            self._wake = asyncio.Event()
+            self.is_connected = True
+            self._seek_to(self.reader.start_time)
+
+            # 与 ROS 适配器一致，默认订阅 TF
+            available = {t['name'] for t in self.reader.get_topics()}
+            for tf_topic in ('/tf', '/tf_static'):
+                if tf_topic in available:
+                    await self.subscribe_topic(tf_topic)
+
+            if self.playback_task is None or self.playback_task.done():
+                self.playback_task = asyncio.create_task(self._playback_loop())
+
+            print(f"Playback opened {path}: {self.reader.message_count} messages")
+            return True
+        except Exception as e:
+            print(f"Playback adapter connection error: {e}")
+            return False
+
+    async def disconnect(self) -> bool:
+        """断开连接"""
+        try:
+            self.is_connected = False
+
+            if self.playback_task and not self.playback_task.done():
+                self.playback_task.cancel()
+                try:
+                    await self.playback_task
+                except asyncio.CancelledError:
+                    pass
+                self.playback_task = None
+
+            await self._stop_batch_update_task()
+            return await self._disconnect_impl()
+        except Exception as e:
+            print(f"Playback adapter disconnection error: {e}")
+            return False
+
+    async def _disconnect_impl(self) -> bool:
+        """关闭录制文件并清理订阅"""
+        self._iterator = None
+        self._pending = None
+        self.subscribed_topics.clear()
+        self._topics.clear()
+        if self.reader:
+            self.reader.close()
+            self.reader = None
+        self.is_connected = False
+        return True
+
+    async def get_available_topics(self) -> List[Dict[str, str]]:
+        if not self.reader:
+            return []
+        return [{"name": t["name"], "type": t["type"]} for t in self.reader.get_topics()]
+
+    async def subscribe_topic(self, topic: str, message_type: str = None) -> bool:
+        """订阅话题"""
+        if not self.reader or topic not in self.reader.topic_ids:
+            return False
+        info = self.reader.topics[self.reader.topic_ids[topic]]
+        self.subscribed_topics[topic] = {
+            "type": message_type or info.get("message_type", "unknown"),
+            "subscribed_at": datetime.now().isoformat()
+        }
+        self._topics.add(topic)
+        self._wakeup()
+        return True
+
+    async def unsubscribe_topic(self, topic: str) -> bool:
+        """取消订阅话题"""
+        self.subscribed_topics.pop(topic, None)
+        self._topics.discard(topic)
+        return True
+
+    # --- 回放控制 ---
+
+    def _wakeup(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def _reanchor(self, log_time: float):
+        self._anchor_wall = time.monotonic()
+        self._anchor_log = log_time
+
+    def _seek_to(self, timestamp: float):
+        self._iterator = self.reader.iter_messages(self.reader.seek(timestamp), topics=self._topics)
+        self._pending = None
+        self.position = timestamp
+        self._reanchor(timestamp)
+        self._wakeup()
+
+    async def playback_control(self, action: str, value: Any = None) -> bool:
+        """回放控制: play / pause / step / seek / seek_offset / rate / loop"""
+        if not self.reader:
+            return False
+        if action == 'play':
+            self.paused = False
+            self._reanchor(self.position)
+        elif action == 'pause':
+            self.paused = True
+        elif action == 'step':
+            self.paused = True
+            self._step_pending = True
+        elif action == 'seek':
+            self._seek_to(float(value))
+        elif action == 'seek_offset':
+            self._seek_to(self.reader.start_time + float(value))
+        elif action == 'rate':
+            self.rate = max(float(value), 0.01)
+            self._reanchor(self.position)
+        elif action == 'loop':
+            self.loop = bool(value)
+        else:
+            return False
+        self._wakeup()
+        return True
+
+    def get_playback_status(self) -> Dict[str, Any]:
+        """获取回放状态"""
+        if not self.reader:
+            return {"open": False}
+        return {
+            "open": True,
+            "file": os.path.basename(self.reader.path),
+            "start_time": self.reader.start_time,
+            "end_time": self.reader.end_time,
+            "position": self.position,
+            "rate": self.rate,
+            "paused": self.paused,
+            "loop": self.loop,
+            "message_count": self.reader.message_count,
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        status = super().get_status()
+        status["playback"] = self.get_playback_status()
+        return status
+
+    async def _wait(self, timeout: Optional[float] = None) -> bool:
+        """等待控制事件，返回是否被唤醒"""
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _playback_loop(self):
+        """回放循环：按录制时间戳与速率调度消息，经由常规插件管线发送"""
+        emitted_since_restart = False
+        while self.is_connected:
+            try:
+                if (self.paused and not self._step_pending) or not self._topics:
+                    await self._wait()
+                    continue
+
+                item = self._pending or next(self._iterator, None)
+                if item is None:
+                    if self.loop and emitted_since_restart:
+                        emitted_since_restart = False
+                        self._seek_to(self.reader.start_time)
+                    else:
+                        self.paused = True
+                    continue
+                self._pending = item
+
+                timestamp = item[0]
+                if not self._step_pending:
+                    delay = self._anchor_wall + (timestamp - self._anchor_log) / self.rate - time.monotonic()
+                    if delay > 0 and await self._wait(delay):
+                        # 控制状态已改变，重新评估
+                        continue
+
+                self._pending = None
+                self._step_pending = False
+                self.position = timestamp
+                emitted_since_restart = True
+
+                _, topic, message_type, payload, topic_id = item
+                data = self.reader.decode(topic_id, payload)
+                await self._buffer_message(topic, data, message_type)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Playback loop error: {e}")
+                await asyncio.sleep(0.1)
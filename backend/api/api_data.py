@@ -58,4 +58,12 @@ async def disconnect_from_adapter():
 @router.get("/connection/status")
 async def get_connection_status():
     """获取连接状态"""
-    return data_source_manager.get_connection_status()
\ No newline at end of file
+    return data_source_manager.get_connection_status()
+
+@router.get("/connection/adapter_status")
+async def get_adapter_status():
+    """获取当前适配器的详细状态（负载生成模式下包含生成统计）"""
+    status = data_source_manager.get_adapter_status()
+    if status is None:
+        raise HTTPException(status_code=404, detail="No active adapter")
+    return status
@@ -4,7 +4,7 @@ from typing import Dict, Any, List, Optional
 
 from app_state import param_manager
 from params.parameter_types import get_type_definitions, create_parameter, ParamNode
-from params.category_manager import CategoryParameterManager
+from params.category_manager import CategoryParameterManager, ParamOperationError, VersionConflictError
 
 router = APIRouter()
 
@@ -34,6 +34,18 @@ class ParamUpdateRequest(BaseModel):
     value: Optional[Any] = Field(None, description="要更新的参数值")
     metadata: Optional[Dict[str, Any]] = Field(None, description="要更新的元数据")
 
+class ParamOperation(BaseModel):
+    op: str = Field(..., description="操作类型: 'add' | 'update' | 'delete'")
+    path: List[str] = Field(default_factory=list, description="add 为父节点路径，update/delete 为目标节点路径")
+    param_type: Optional[str] = Field(None, description="add: 新参数的类型")
+    name: Optional[str] = Field(None, description="add: 新参数的名称")
+    value: Optional[Any] = Field(None, description="add: 初始值（None 使用类型默认值）；update: 新值")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="update: 新元数据")
+
+class ParamBatchRequest(BaseModel):
+    operations: List[ParamOperation] = Field(..., description="按顺序原子应用的操作列表")
+    expected_version: Optional[int] = Field(None, description="期望的当前版本号，不一致时返回 409")
+
 class BackupRestoreRequest(BaseModel):
     backup_filename: str
 
@@ -140,22 +152,32 @@ async def add_parameter(category: str, name: str, request: ParamAddRequest, para
 
 @router.patch("/configs/{category}/{name}/param")
 async def update_parameter(category: str, name: str, request: ParamUpdateRequest, param_manager: CategoryParameterManager = Depends(get_param_manager)):
-    # 检查节点是否存在
-    node = await param_manager.get_parameter_node(name, request.path, category)
-    if node is None:
+    # 值与元数据在一次加载、一次写入中完成
+    operation = {"op": "update", "path": request.path, "value": request.value, "metadata": request.metadata}
+    try:
+        version = await param_manager.apply_operations(name, [operation], category)
+    except (FileNotFoundError, ParamOperationError):
         raise HTTPException(status_code=404, detail=f"Failed to update. Path '{'.'.join(request.path)}' not found.")
+    except IOError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-    if request.value is not None:
-        success = await param_manager.update_parameter_value(name, request.path, request.value, category)
-        if not success:
-            raise HTTPException(status_code=404, detail=f"Failed to update value. Path '{'.'.join(request.path)}' not found.")
-    
-    if request.metadata is not None:
-        success = await param_manager.update_parameter_metadata(name, request.path, request.metadata, category)
-        if not success:
-            raise HTTPException(status_code=404, detail=f"Failed to update metadata. Path '{'.'.join(request.path)}' not found.")
+    return {"success": True, "version": version}
 
-    return {"success": True}
+@router.post("/configs/{category}/{name}/param/batch", summary="原子地批量添加/更新/删除参数")
+async def batch_update_parameters(category: str, name: str, request: ParamBatchRequest, param_manager: CategoryParameterManager = Depends(get_param_manager)):
+    operations = [operation.model_dump() for operation in request.operations]
+    try:
+        version = await param_manager.apply_operations(name, operations, category, request.expected_version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Config '{name}' not found")
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "current_version": e.current})
+    except ParamOperationError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "index": e.index})
+    except IOError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"success": True, "version": version}
 
 @router.delete("/configs/{category}/{name}/param")
 async def delete_parameter(category: str, name: str, path: List[str] = Query(...), param_manager: CategoryParameterManager = Depends(get_param_manager)):
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+# 导入共享对象
+from app_state import data_source_manager, manager
+
+router = APIRouter()
+
+# 插件统计 WebSocket 推送间隔（秒）
+STATS_BROADCAST_INTERVAL = 2.0
+
+@router.get("/plugins")
+async def get_plugins():
+    """获取当前适配器的插件列表与状态"""
+    status = data_source_manager.get_plugin_status()
+    if status is None:
+        raise HTTPException(status_code=404, detail="No active adapter")
+    return status
+
+@router.get("/plugins/stats")
+async def get_plugin_stats():
+    """获取各插件调用次数、延迟分位数（p50/p95/p99）、过滤与错误计数"""
+    stats = data_source_manager.get_plugin_stats()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No active adapter")
+    return stats
+
+@router.post("/plugins/stats/reset")
+async def reset_plugin_stats():
+    """重置插件统计"""
+    if not data_source_manager.reset_plugin_stats():
+        raise HTTPException(status_code=404, detail="No active adapter")
+    return {"success": True}
+
+class ReloadRequest(BaseModel):
+    module: Optional[str] = None  # 如 "path_plugin"；为空时重载所有已修改的插件文件
+
+@router.post("/plugins/reload")
+async def reload_plugins(request: Optional[ReloadRequest] = None):
+    """热重载插件（重新读取清单，重载已修改的插件模块），不断开数据源连接"""
+    result = await data_source_manager.reload_plugins(request.module if request else None)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No active adapter")
+    return result
+
+async def broadcast_plugin_stats(interval: float = STATS_BROADCAST_INTERVAL):
+    """定期向所有 WebSocket 客户端推送插件统计"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not manager.active_connections:
+                continue
+            stats = data_source_manager.get_plugin_stats()
+            if stats is None:
+                continue
+            await manager.broadcast({
+                "type": "plugin_stats",
+                "data": stats
+            })
+        except Exception as e:
+            print(f"Error broadcasting plugin stats: {e}")
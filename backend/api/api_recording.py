@@ -0,0 +1,93 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Any, List, Optional
+
+# 导入共享对象
+from app_state import data_source_manager, manager
+
+router = APIRouter()
+
+class RecordingStartRequest(BaseModel):
+    filename: Optional[str] = None
+    topics: Optional[List[str]] = None
+
+class PlaybackControlRequest(BaseModel):
+    action: str
+    value: Optional[Any] = None
+
+@router.post("/recording/start")
+async def start_recording(request: RecordingStartRequest):
+    """开始录制所有（或指定）话题"""
+    recorder = data_source_manager.recorder
+    try:
+        filename = recorder.start(request.filename, request.topics)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    await manager.broadcast({
+        "type": "recording_status",
+        "data": recorder.get_status()
+    })
+    return {"success": True, "file": filename}
+
+@router.post("/recording/stop")
+async def stop_recording():
+    """停止录制并写出索引"""
+    # 等待写线程排空队列并写出索引，不阻塞事件循环
+    status = await asyncio.to_thread(data_source_manager.recorder.stop)
+    if status is None:
+        raise HTTPException(status_code=400, detail="Not recording")
+
+    await manager.broadcast({
+        "type": "recording_status",
+        "data": data_source_manager.recorder.get_status()
+    })
+    return {"success": True, "recording": status}
+
+@router.get("/recording/status")
+async def get_recording_status():
+    """获取录制状态"""
+    return data_source_manager.recorder.get_status()
+
+@router.get("/recordings")
+async def list_recordings():
+    """列出录制文件"""
+    return {"recordings": data_source_manager.recorder.list_recordings()}
+
+@router.get("/recordings/{name}/series")
+async def query_series(name: str, topic: str, field: str, t0: Optional[float] = None, t1: Optional[float] = None,
+                       max_points: int = Query(2000, ge=3, le=100000), method: str = "lttb"):
+    """查询录制文件中某话题数值字段在 [t0, t1] 内的序列，服务端降采样到 max_points 以内"""
+    try:
+        return await asyncio.to_thread(data_source_manager.series_store.query,
+                                       name, topic, field, t0, t1, max_points, method)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/playback/status")
+async def get_playback_status():
+    """获取回放状态"""
+    status = data_source_manager.get_playback_status()
+    if status is None:
+        raise HTTPException(status_code=404, detail="Playback adapter is not active")
+    return status
+
+@router.post("/playback/control")
+async def control_playback(request: PlaybackControlRequest):
+    """回放控制: play / pause / step / seek / seek_offset / rate / loop"""
+    success = await data_source_manager.control_playback(request.action, request.value)
+    if not success:
+        raise HTTPException(status_code=400, detail=f"Playback control '{request.action}' failed")
+    status = data_source_manager.get_playback_status()
+    await manager.broadcast({
+        "type": "playback_status",
+        "data": status
+    })
+    return {"success": True, "status": status}
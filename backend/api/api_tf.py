@@ -0,0 +1,43 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+
+# 导入共享对象
+from app_state import data_source_manager, manager
+from core.tf_buffer import TransformError
+
+router = APIRouter()
+
+# 过期动态坐标系的检查间隔（秒）
+TF_EVICTION_INTERVAL = 1.0
+
+@router.get("/tf/frames")
+async def get_tf_frames():
+    """获取服务端 TF 缓冲中的坐标系树"""
+    return {"frames": data_source_manager.tf_buffer.frames()}
+
+@router.get("/tf/lookup")
+async def lookup_transform(
+    target: str = Query(..., description="目标坐标系"),
+    source: str = Query(..., description="源坐标系"),
+    time: Optional[float] = Query(None, description="查询时刻（秒），为空时取最新")
+):
+    """查询 source 到 target 的变换（按时间插值）"""
+    try:
+        return data_source_manager.tf_buffer.lookup_transform(target, source, time)
+    except TransformError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+async def evict_stale_frames(interval: float = TF_EVICTION_INTERVAL):
+    """定期移除过期的动态坐标系，并通知所有 WebSocket 客户端"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            evicted = data_source_manager.evict_stale_tf()
+            if evicted and manager.active_connections:
+                await manager.broadcast({
+                    "type": "tf_evicted",
+                    "data": {"frames": evicted}
+                })
+        except Exception as e:
+            print(f"Error evicting stale TF frames: {e}")
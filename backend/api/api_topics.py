@@ -3,12 +3,15 @@ from pydantic import BaseModel
 import json
 import asyncio
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional
 
-from app_state import data_source_manager, manager
+from app_state import data_source_manager, manager, param_manager, param_notifier
+from core.tf_buffer import TransformError
 
 router = APIRouter()
 
+MARKER_EXPIRY_INTERVAL = 0.5
+
 class TopicSubscriptionRequest(BaseModel):
     topic: str
     message_type: str = None
@@ -62,6 +65,39 @@ async def update_topic_config(topic_name: str, config: dict):
     
     return {"success": True, "message": f"Config updated for {topic_name}"}
 
+@router.get("/topics/map_tiles")
+async def get_map_tiles(topic: str = Query(...), since: int = Query(0)):
+    """获取地图话题自指定版本以来变化的分块（since=0 返回全量）"""
+    plugin = data_source_manager.get_plugin("OccupancyGridPlugin")
+    if plugin is None:
+        raise HTTPException(status_code=404, detail="OccupancyGrid plugin is not active")
+    payload = plugin.get_tiles_since(topic, since)
+    if payload is None:
+        raise HTTPException(status_code=404, detail=f"No map received on {topic}")
+    return payload
+
+@router.get("/topics/markers")
+async def get_marker_snapshot(topic: str = Query(...), fixed_frame: Optional[str] = Query(None)):
+    """获取 Marker 话题当前的全量快照；指定 fixed_frame 时与推送一样变换到该坐标系"""
+    plugin = data_source_manager.get_plugin("MarkerArrayPlugin")
+    if plugin is None:
+        raise HTTPException(status_code=404, detail="MarkerArray plugin is not active")
+    snapshot = plugin.get_snapshot(topic)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No markers received on {topic}")
+    message = {'topic': topic, 'message_type': 'visualization_msgs/MarkerArray', 'data': snapshot}
+    return data_source_manager.to_fixed_frame(message, fixed_frame)['data']
+
+async def expire_markers(interval: float = MARKER_EXPIRY_INTERVAL):
+    """定期移除 lifetime 已到期的 Marker（发布者停止发布后也能删除），并推送删除项"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            for topic, message in data_source_manager.expire_markers().items():
+                await manager.broadcast_data(topic, message, data_source_manager.to_fixed_frame)
+        except Exception as e:
+            print(f"Error expiring markers: {e}")
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     client_host = websocket.client.host if websocket.client else "unknown"
@@ -97,6 +133,15 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.send_text(json.dumps(initial_status))
         print(f"[WebSocket] 已发送初始状态给客户端 {client_host}: {initial_status}")
         
+        # 静态 TF 只在变化时广播，新客户端连接时单独发送全量
+        static_tf = data_source_manager.get_static_tf_snapshot()
+        if static_tf is not None:
+            await websocket.send_text(json.dumps({
+                "type": "data_update",
+                "topic": "/tf_static",
+                "data": static_tf
+            }))
+        
         welcome_msg = {
             "type": "system_message",
             "data": {
@@ -122,6 +167,33 @@ async def websocket_endpoint(websocket: WebSocket):
                             print("[WebSocket] 发布tool_event失败，适配器未连接或错误")
                     except Exception as e:
                         print(f"[WebSocket] 处理tool_event异常: {e}")
+                elif msg_type == "tf_lookup":
+                    # 查询服务端 TF：{"type": "tf_lookup", "data": {"target", "source", "time", "request_id"}}
+                    query = msg.get("data", {})
+                    reply = {"type": "tf_lookup_result", "request_id": query.get("request_id")}
+                    try:
+                        reply["data"] = data_source_manager.tf_buffer.lookup_transform(
+                            query.get("target", ""), query.get("source", ""), query.get("time"))
+                    except TransformError as e:
+                        reply["error"] = str(e)
+                    await websocket.send_text(json.dumps(reply))
+                elif msg_type == "set_fixed_frame":
+                    # 选择固定坐标系：{"type": "set_fixed_frame", "data": {"frame"}}，frame 为空时关闭服务端预变换
+                    frame = manager.set_fixed_frame(websocket, msg.get("data", {}).get("frame"))
+                    await websocket.send_text(json.dumps({"type": "fixed_frame", "data": {"frame": frame}}))
+                elif msg_type == "param_subscribe":
+                    # 订阅参数变化：{"type": "param_subscribe", "data": {"category", "name", "path": [前缀]}}
+                    sub = msg.get("data", {})
+                    category, name, path = sub.get("category", ""), sub.get("name", ""), sub.get("path") or []
+                    param_notifier.subscribe(websocket, category, name, path)
+                    await websocket.send_text(json.dumps({
+                        "type": "param_subscribed",
+                        "data": {"category": category, "name": name, "path": path,
+                                 "version": param_manager.get_version(name, category)}
+                    }))
+                elif msg_type == "param_unsubscribe":
+                    sub = msg.get("data", {})
+                    param_notifier.unsubscribe(websocket, sub.get("category", ""), sub.get("name", ""), sub.get("path"))
                 else:
                     # 其余类型暂不处理，可拓展
                     pass
@@ -134,6 +206,8 @@ async def websocket_endpoint(websocket: WebSocket):
 
         hb_task.cancel()
         manager.disconnect(websocket)
+        param_notifier.remove_client(websocket)
     except Exception as e:
         print(f"[WebSocket] 客户端 {client_host} 连接异常: {e}")
         manager.disconnect(websocket)
+        param_notifier.remove_client(websocket)
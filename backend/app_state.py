@@ -1,13 +1,17 @@
 from params.category_manager import CategoryParameterManager
+from params.change_notifier import ParamChangeNotifier
 from core.data_source_manager import DataSourceManager
 from fastapi import WebSocket
-from typing import List
+from typing import Any, Callable, Dict, List, Optional
 import json
 
 # WebSocket连接管理
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        # 各客户端选择的固定坐标系：数据在广播时变换到该坐标系，未选择的客户端收到原消息
+        self.fixed_frames: Dict[WebSocket, str] = {}
+        self._fixed_frame_listeners: List[Callable[[List[str]], None]] = []
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
@@ -16,6 +20,44 @@ class ConnectionManager:
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        if self.fixed_frames.pop(websocket, None) is not None:
+            self._notify_fixed_frames()
+
+    def add_fixed_frame_listener(self, listener: Callable[[List[str]], None]):
+        """注册固定坐标系集合变化的监听器，参数为当前所有客户端选择的坐标系"""
+        self._fixed_frame_listeners.append(listener)
+
+    def set_fixed_frame(self, websocket: WebSocket, frame: Optional[str]) -> Optional[str]:
+        """设置客户端的固定坐标系，为空时关闭该客户端的服务端预变换"""
+        frame = str(frame or '').lstrip('/') or None
+        if frame is None:
+            self.fixed_frames.pop(websocket, None)
+        else:
+            self.fixed_frames[websocket] = frame
+        self._notify_fixed_frames()
+        return frame
+
+    def _notify_fixed_frames(self):
+        frames = list(self.fixed_frames.values())
+        for listener in self._fixed_frame_listeners:
+            try:
+                listener(frames)
+            except Exception as e:
+                print(f"Fixed frame listener error: {e}")
+
+    async def broadcast_data(self, topic: str, data: Any, to_fixed_frame: Callable[[Any, str], Any]):
+        """广播数据更新；选择了固定坐标系的客户端按坐标系分组，每组只变换、编码一次"""
+        encoded: Dict[Optional[str], str] = {}
+        for connection in list(self.active_connections):
+            frame = self.fixed_frames.get(connection)
+            try:
+                text = encoded.get(frame)
+                if text is None:
+                    payload = to_fixed_frame(data, frame) if frame else data
+                    text = encoded[frame] = json.dumps({"type": "data_update", "topic": topic, "data": payload})
+                await connection.send_text(text)
+            except:
+                pass
 
     async def broadcast(self, message: dict):
         for connection in self.active_connections:
@@ -29,3 +71,6 @@ class ConnectionManager:
 manager = ConnectionManager()
 data_source_manager = DataSourceManager()
 param_manager = CategoryParameterManager()
+param_notifier = ParamChangeNotifier()
+param_manager.add_change_listener(param_notifier.publish)
+manager.add_fixed_frame_listener(data_source_manager.set_fixed_frames)
@@ -1,7 +1,17 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterable
 import asyncio
+import time
 from adapters.mock_adapter import MockAdapter
 from adapters.ros_adapter import ROSAdapter
+from adapters.playback_adapter import PlaybackAdapter
+from adapters.bag_adapter import BagFileAdapter
+from recording.recorder import Recorder
+from recording.timeseries import SeriesStore
+from core.tf_buffer import TFBuffer
+from core.fixed_frame import FixedFrameTransformer
+
+# 去重/增量类插件：客户端选择服务端固定坐标系后，内容不变的消息也需随 TF 重发
+FIXED_FRAME_AWARE_PLUGINS = ('PathDecimationPlugin', 'MarkerArrayPlugin')
 
 class DataSourceManager:
     def __init__(self):
@@ -10,6 +20,12 @@ class DataSourceManager:
         self.active_adapter = None
         self.active_adapter_name = None
         self.data_callbacks = []
+        self.recorder = Recorder()
+        self.series_store = SeriesStore(self.recorder.recordings_dir)
+        self.tf_buffer = TFBuffer()  # 由原始 TF 消息填充，供 REST/WebSocket 查询与插件使用
+        # 按客户端选择的固定坐标系在广播时预变换几何数据
+        self.fixed_frame_transformer = FixedFrameTransformer(self.tf_buffer.lookup_matrix)
+        self.fixed_frames: List[str] = []  # 当前客户端选择的固定坐标系（去重）
         
         # 注册默认适配器
         self._register_default_adapters()
@@ -18,6 +34,8 @@ class DataSourceManager:
         """注册默认适配器"""
         self.register_adapter('rosbridge', ROSAdapter())
         self.register_adapter('mock', MockAdapter())
+        self.register_adapter('playback', PlaybackAdapter())
+        self.register_adapter('bagfile', BagFileAdapter())
     
     def register_adapter(self, name: str, adapter_instance: Any):
         """注册适配器"""
@@ -34,6 +52,8 @@ class DataSourceManager:
         
         # 注册数据回调
         adapter_instance.add_data_callback(self._on_adapter_data)
+        adapter_instance.add_raw_data_callback(self._on_adapter_raw_data)
+        adapter_instance.plugin_manager.transform_lookup = self.tf_buffer.lookup_matrix
     
     def get_available_adapters(self) -> List[str]:
         """获取可用适配器名称列表"""
@@ -57,6 +77,7 @@ class DataSourceManager:
             await self.disconnect_current_adapter()
         
         adapter = self.adapters[adapter_name]
+        self.tf_buffer.clear()
         try:
             success = await adapter.connect(config)
             if success:
@@ -96,6 +117,12 @@ class DataSourceManager:
                 'config': {},
             }
     
+    def get_adapter_status(self) -> Optional[Dict[str, Any]]:
+        """获取当前活跃适配器的详细状态"""
+        if self.active_adapter is None:
+            return None
+        return self.active_adapter.get_status()
+    
     async def get_available_topics(self) -> List[Dict[str, str]]:
         """获取可用话题列表"""
         if self.active_adapter and self.active_adapter.is_connected:
@@ -105,7 +132,13 @@ class DataSourceManager:
     async def subscribe_topic(self, topic: str, message_type: str = None) -> bool:
         """订阅话题"""
         if self.active_adapter and self.active_adapter.is_connected:
-            return await self.active_adapter.subscribe_topic(topic, message_type)
+            success = await self.active_adapter.subscribe_topic(topic, message_type)
+            if success:
+                try:
+                    await self.active_adapter.prepare_plugins(topic, message_type)
+                except Exception as e:
+                    print(f"Failed to prepare plugins for {topic}: {e}")
+            return success
         return False
     
     async def unsubscribe_topic(self, topic: str) -> bool:
@@ -129,6 +162,96 @@ class DataSourceManager:
             print(f"publish_tool_event error: {e}")
             return False
     
+    async def control_playback(self, action: str, value: Any = None) -> bool:
+        """控制回放适配器（播放/暂停/单步/跳转/速率/循环）"""
+        if not self.active_adapter or not hasattr(self.active_adapter, 'playback_control'):
+            return False
+        return await self.active_adapter.playback_control(action, value)
+    
+    def get_playback_status(self) -> Optional[Dict[str, Any]]:
+        """获取回放状态"""
+        if not self.active_adapter or not hasattr(self.active_adapter, 'get_playback_status'):
+            return None
+        return self.active_adapter.get_playback_status()
+    
+    def get_plugin(self, plugin_name: str) -> Optional[Any]:
+        """获取当前活跃适配器中的插件实例"""
+        if self.active_adapter is None:
+            return None
+        return self.active_adapter.plugin_manager.get_plugin(plugin_name)
+    
+    def get_plugin_status(self) -> Optional[Dict[str, Any]]:
+        """获取当前活跃适配器的插件状态"""
+        if self.active_adapter is None:
+            return None
+        return self.active_adapter.plugin_manager.get_plugin_status()
+    
+    def get_plugin_stats(self) -> Optional[Dict[str, Any]]:
+        """获取当前活跃适配器的插件耗时统计"""
+        if self.active_adapter is None:
+            return None
+        return self.active_adapter.plugin_manager.get_plugin_stats()
+    
+    def reset_plugin_stats(self) -> bool:
+        """重置当前活跃适配器的插件统计"""
+        if self.active_adapter is None:
+            return False
+        self.active_adapter.plugin_manager.reset_plugin_stats()
+        return True
+    
+    def evict_stale_tf(self) -> List[str]:
+        """移除服务端 TF 缓冲中过期的动态坐标系，返回被移除的坐标系
+
+        回放暂停期间不判定过期（见 TFBuffer.set_paused）。
+        """
+        status = self.get_playback_status()
+        self.tf_buffer.set_paused(bool(status and status.get('paused')))
+        return sorted(self.tf_buffer.evict_stale())
+    
+    def expire_markers(self) -> Dict[str, Dict[str, Any]]:
+        """移除 Marker 插件中已过期的 Marker，返回 {话题: 待推送的消息}"""
+        plugin = self.get_plugin('MarkerArrayPlugin')
+        if plugin is None:
+            return {}
+        return {
+            topic: {
+                'topic': topic,
+                'message_type': 'visualization_msgs/MarkerArray',
+                'data': payload
+            }
+            for topic, payload in plugin.expire_all().items()
+        }
+    
+    def get_static_tf_snapshot(self) -> Optional[Dict[str, Any]]:
+        """当前适配器已收到的全部静态 TF（供新客户端连接时同步）"""
+        plugin = self.get_plugin('TFMessagePlugin')
+        if plugin is None or not plugin.static_frames:
+            return None
+        return {
+            'topic': '/tf_static',
+            'type': 'tf_static',
+            'message_type': 'tf2_msgs/TFMessage',
+            'data': plugin.get_static_snapshot(),
+            'timestamp': time.time()
+        }
+    
+    def set_fixed_frames(self, frames: Iterable[str]):
+        """更新客户端当前选择的固定坐标系集合，通知去重/增量类插件（对所有适配器生效）"""
+        self.fixed_frames = sorted({frame for frame in frames if frame})
+        for adapter in self.adapters.values():
+            for name in FIXED_FRAME_AWARE_PLUGINS:
+                adapter.plugin_manager.update_plugin_settings(name, {'fixed_frames': list(self.fixed_frames)})
+    
+    def to_fixed_frame(self, data: Any, frame: Optional[str]) -> Any:
+        """将插件输出的几何消息变换到固定坐标系 frame；frame 为空或无需变换时返回原消息"""
+        return self.fixed_frame_transformer.transform(data, frame)
+    
+    async def reload_plugins(self, module: str = None) -> Optional[Dict[str, Any]]:
+        """热重载当前活跃适配器的插件"""
+        if self.active_adapter is None:
+            return None
+        return await self.active_adapter.reload_plugins(module)
+    
     def add_data_callback(self, callback):
         """添加数据回调"""
         self.data_callbacks.append(callback)
@@ -138,6 +261,17 @@ class DataSourceManager:
         if callback in self.data_callbacks:
             self.data_callbacks.remove(callback)
     
+    def _on_adapter_raw_data(self, topic: str, data: Any, message_type: str = None):
+        """处理插件处理前的原始数据"""
+        # 录制原始消息，回放时可重新经过插件管线（仅入队，写盘在后台线程完成）
+        if self.recorder.is_recording:
+            self.recorder.record(topic, data, message_type)
+        if self.tf_buffer.is_tf_message(topic, message_type):
+            try:
+                self.tf_buffer.add_message(topic, data)
+            except Exception as e:
+                print(f"Failed to update TF buffer: {e}")
+    
     async def _on_adapter_data(self, topic: str, data: Any):
         """处理来自适配器的数据"""
         # 转发数据给所有注册的回调函数
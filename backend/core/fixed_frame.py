@@ -0,0 +1,122 @@
+"""固定坐标系预变换
+
+用服务端 TF 将点云、LaserScan 转换后的点云、路径与 Marker 整体变换到客户端选择的固定坐标系，
+前端收到的几何数据可直接渲染，无需逐帧查询 TF。
+变换在广播时按固定坐标系分组进行：选择同一坐标系的客户端共享一次变换，未选择的客户端收到原消息。
+查询使用消息时间戳，查询失败时退回最新变换；仍无法求得时消息原样发送。
+"""
+from collections.abc import Mapping
+from typing import Dict, Any, Optional, List, Callable
+import numpy as np
+from plugins.cloud_codec import transform_point_cloud
+from core.tf_buffer import matrix_to_quaternion, quaternion_multiply
+
+
+class FixedFrameTransformer:
+    """将插件管线输出的消息变换到指定固定坐标系"""
+
+    def __init__(self, transform_lookup: Callable[[str, str, Any], Optional[np.ndarray]]):
+        # 坐标变换查询: (target_frame, source_frame, stamp) -> 4x4 齐次矩阵或 None
+        self.transform_lookup = transform_lookup
+
+    def _lookup(self, fixed_frame: str, header: Dict[str, Any]) -> Optional[np.ndarray]:
+        frame_id = str((header or {}).get('frame_id') or '').lstrip('/')
+        if not frame_id or frame_id == fixed_frame:
+            return None
+        matrix = self.transform_lookup(fixed_frame, frame_id, (header or {}).get('stamp'))
+        if matrix is None:
+            matrix = self.transform_lookup(fixed_frame, frame_id, None)
+        return matrix
+
+    @staticmethod
+    def transform_poses(poses: List[Dict[str, Any]], matrix: np.ndarray) -> List[Dict[str, Any]]:
+        """批量变换 geometry_msgs/Pose 列表"""
+        count = len(poses)
+        positions = np.empty((count, 3), dtype=np.float64)
+        orientations = np.empty((count, 4), dtype=np.float64)
+        for i, pose in enumerate(poses):
+            p = pose.get('position') or {}
+            q = pose.get('orientation') or {}
+            positions[i] = (p.get('x', 0.0), p.get('y', 0.0), p.get('z', 0.0))
+            orientations[i] = (q.get('x', 0.0), q.get('y', 0.0), q.get('z', 0.0), q.get('w', 1.0))
+
+        positions = positions @ matrix[:3, :3].T + matrix[:3, 3]
+        orientations = quaternion_multiply(matrix_to_quaternion(matrix[:3, :3]), orientations)
+
+        return [
+            dict(pose,
+                 position={"x": float(p[0]), "y": float(p[1]), "z": float(p[2])},
+                 orientation={"x": float(q[0]), "y": float(q[1]), "z": float(q[2]), "w": float(q[3])})
+            for pose, p, q in zip(poses, positions.tolist(), orientations.tolist())
+        ]
+
+    def _transform_path(self, msg: Dict[str, Any], fixed_frame: str) -> Optional[Dict[str, Any]]:
+        header = msg.get('header') or {}
+        matrix = self._lookup(fixed_frame, header)
+        poses = msg.get('poses')
+        if matrix is None or not poses:
+            return None
+        transformed = self.transform_poses([p.get('pose') or {} for p in poses], matrix)
+        result = dict(msg)
+        result['header'] = dict(header, frame_id=fixed_frame)
+        result['poses'] = [
+            dict(stamped, header=dict(stamped.get('header') or {}, frame_id=fixed_frame), pose=pose)
+            for stamped, pose in zip(poses, transformed)
+        ]
+        return result
+
+    def _transform_markers(self, markers: List[Dict[str, Any]], fixed_frame: str) -> List[Dict[str, Any]]:
+        """按 frame_id 分组，每组一次查询、一次批量变换 Marker 位姿"""
+        groups: Dict[str, List[int]] = {}
+        for i, marker in enumerate(markers):
+            groups.setdefault(str((marker.get('header') or {}).get('frame_id') or ''), []).append(i)
+
+        result = list(markers)
+        for frame_id, indices in groups.items():
+            matrix = self._lookup(fixed_frame, markers[indices[0]].get('header') or {})
+            if matrix is None:
+                continue
+            poses = self.transform_poses([markers[i].get('pose') or {} for i in indices], matrix)
+            for i, pose in zip(indices, poses):
+                marker = markers[i]
+                result[i] = dict(marker, header=dict(marker.get('header') or {}, frame_id=fixed_frame), pose=pose)
+        return result
+
+    def transform_geometry(self, msg: Dict[str, Any], message_type: str,
+                           fixed_frame: str) -> Optional[Dict[str, Any]]:
+        """变换消息体（点云、路径、Marker 或 Marker 增量）；无需或无法变换时返回 None"""
+        if 'PointCloud2' in message_type:
+            matrix = self._lookup(fixed_frame, msg.get('header') or {})
+            if matrix is None:
+                return None
+            transformed = transform_point_cloud(msg, matrix)
+            if transformed is not None:
+                transformed['header'] = dict(msg.get('header') or {}, frame_id=fixed_frame)
+            return transformed
+        if 'Path' in message_type:
+            return self._transform_path(msg, fixed_frame)
+        if msg.get('type') == 'MarkerArrayDelta':
+            # 增量中记录坐标系，前端重新获取全量时请求同一坐标系
+            transformed = dict(msg, fixed_frame=fixed_frame)
+            for key in ('added', 'modified'):
+                if msg.get(key):
+                    transformed[key] = self._transform_markers(msg[key], fixed_frame)
+            return transformed
+        if isinstance(msg.get('markers'), list):
+            return dict(msg, markers=self._transform_markers(msg['markers'], fixed_frame))
+        return None
+
+    def transform(self, data: Any, fixed_frame: Optional[str]) -> Any:
+        """变换插件管线输出的消息 {topic, message_type, data}；无需变换时返回原消息"""
+        fixed_frame = str(fixed_frame or '').lstrip('/')
+        if not fixed_frame or not isinstance(data, Mapping) or not isinstance(data.get('data'), Mapping):
+            return data
+        try:
+            # LaserScan 已由插件转为点云，按当前内容判断
+            transformed = self.transform_geometry(data['data'], data.get('message_type') or '', fixed_frame)
+        except Exception as e:
+            print(f"Error transforming {data.get('topic')} into fixed frame: {e}")
+            return data
+        if transformed is None:
+            return data
+        return dict(data, data=transformed, fixed_frame=fixed_frame)
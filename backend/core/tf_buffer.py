@@ -0,0 +1,398 @@
+"""服务端 TF 缓冲
+
+按 child_frame_id 保存每条边（child -> parent）有界的时间序列，
+lookup_transform(target, source, time) 沿坐标树求链，平移线性插值、旋转 SLERP 插值。
+链上各边的采样、插值和矩阵转换用 NumPy 批量完成；最新时刻的查询结果按 (target, source)
+缓存，链上任一条边更新时失效。
+"""
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+TF_TOPICS = ('/tf', '/tf_static')
+TF_MESSAGE_TYPES = ('tf2_msgs/TFMessage', 'tf2_msgs/msg/TFMessage', 'tf/tfMessage')
+
+
+class TransformError(LookupError):
+    """无法求得变换（坐标系不存在、不连通或时间超出缓冲范围）"""
+    pass
+
+
+def stamp_to_seconds(stamp: Any) -> Optional[float]:
+    """兼容 ROS1 {secs, nsecs}、ROS2 {sec, nanosec} 与数值时间戳"""
+    if stamp is None:
+        return None
+    if isinstance(stamp, (int, float)):
+        return float(stamp)
+    if isinstance(stamp, dict):
+        secs = stamp.get('secs', stamp.get('sec'))
+        if secs is None:
+            return None
+        nsecs = stamp.get('nsecs', stamp.get('nanosec', stamp.get('nsec', 0))) or 0
+        return float(secs) + float(nsecs) * 1e-9
+    return None
+
+
+def slerp(q0: np.ndarray, q1: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """批量四元数球面插值，q0/q1 为 (N, 4) xyzw，t 为 (N,)"""
+    dot = np.sum(q0 * q1, axis=-1)
+    q1 = np.where((dot < 0)[:, None], -q1, q1)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    small = sin_theta < 1e-6
+    safe = np.where(small, 1.0, sin_theta)
+    w0 = np.where(small, 1.0 - t, np.sin((1.0 - t) * theta) / safe)
+    w1 = np.where(small, t, np.sin(t * theta) / safe)
+    q = w0[:, None] * q0 + w1[:, None] * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def to_matrices(translations: np.ndarray, rotations: np.ndarray) -> np.ndarray:
+    """批量将平移 (N, 3) 与四元数 (N, 4) 转为 4x4 齐次矩阵"""
+    x, y, z, w = rotations.T
+    n = rotations.shape[0]
+    m = np.zeros((n, 4, 4), dtype=np.float64)
+    m[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    m[:, 0, 1] = 2 * (x * y - z * w)
+    m[:, 0, 2] = 2 * (x * z + y * w)
+    m[:, 1, 0] = 2 * (x * y + z * w)
+    m[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    m[:, 1, 2] = 2 * (y * z - x * w)
+    m[:, 2, 0] = 2 * (x * z - y * w)
+    m[:, 2, 1] = 2 * (y * z + x * w)
+    m[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    m[:, :3, 3] = translations
+    m[:, 3, 3] = 1.0
+    return m
+
+
+def matrix_to_quaternion(m: np.ndarray) -> np.ndarray:
+    """旋转矩阵转四元数 (x, y, z, w)"""
+    trace = m[0, 0] + m[1, 1] + m[2, 2]
+    if trace > 0:
+        s = 2.0 * np.sqrt(trace + 1.0)
+        q = [(m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s, 0.25 * s]
+    elif m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[0, 0] - m[1, 1] - m[2, 2])
+        q = [0.25 * s, (m[0, 1] + m[1, 0]) / s, (m[0, 2] + m[2, 0]) / s, (m[2, 1] - m[1, 2]) / s]
+    elif m[1, 1] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[1, 1] - m[0, 0] - m[2, 2])
+        q = [(m[0, 1] + m[1, 0]) / s, 0.25 * s, (m[1, 2] + m[2, 1]) / s, (m[0, 2] - m[2, 0]) / s]
+    else:
+        s = 2.0 * np.sqrt(1.0 + m[2, 2] - m[0, 0] - m[1, 1])
+        q = [(m[0, 2] + m[2, 0]) / s, (m[1, 2] + m[2, 1]) / s, 0.25 * s, (m[1, 0] - m[0, 1]) / s]
+    q = np.asarray(q, dtype=np.float64)
+    return q / np.linalg.norm(q)
+
+
+def quaternion_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """批量四元数乘法 a ⊗ b（xyzw），支持广播"""
+    ax, ay, az, aw = np.moveaxis(np.asarray(a, dtype=np.float64), -1, 0)
+    bx, by, bz, bw = np.moveaxis(np.asarray(b, dtype=np.float64), -1, 0)
+    return np.stack((
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz
+    ), axis=-1)
+
+
+def invert_rigid(m: np.ndarray) -> np.ndarray:
+    inv = np.eye(4)
+    rotation_t = m[:3, :3].T
+    inv[:3, :3] = rotation_t
+    inv[:3, 3] = -rotation_t @ m[:3, 3]
+    return inv
+
+
+class _EdgeHistory:
+    """单条边按时间排序的变换历史（预分配数组，按需扩容）"""
+
+    __slots__ = ('parent', 'static', 'times', 'translations', 'rotations', 'start', 'end')
+
+    def __init__(self, parent: str, static: bool = False, capacity: int = 16):
+        self.parent = parent
+        self.static = static
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.translations = np.empty((capacity, 3), dtype=np.float64)
+        self.rotations = np.empty((capacity, 4), dtype=np.float64)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @property
+    def latest_time(self) -> float:
+        return float(self.times[self.end - 1])
+
+    @property
+    def earliest_time(self) -> float:
+        return float(self.times[self.start])
+
+    def _reserve(self):
+        if self.end < len(self.times):
+            return
+        size = len(self)
+        capacity = len(self.times) if self.start >= len(self.times) // 2 else len(self.times) * 2
+        for name in ('times', 'translations', 'rotations'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:size] = old[self.start:self.end]
+            setattr(self, name, new)
+        self.start, self.end = 0, size
+
+    def insert(self, stamp: float, translation: np.ndarray, rotation: np.ndarray):
+        if self.static:
+            self.start, self.end = 0, 0
+        self._reserve()
+        index = self.end
+        if len(self) and stamp <= self.latest_time:
+            index = self.start + int(np.searchsorted(self.times[self.start:self.end], stamp))
+            if self.times[index] == stamp:
+                self.translations[index] = translation
+                self.rotations[index] = rotation
+                return
+            # 乱序到达（少见）：其后的样本整体后移一位
+            for array in (self.times, self.translations, self.rotations):
+                array[index + 1:self.end + 1] = array[index:self.end].copy()
+        self.times[index] = stamp
+        self.translations[index] = translation
+        self.rotations[index] = rotation
+        self.end += 1
+
+    def trim(self, cache_time: float, max_history: int):
+        """丢弃超出缓存时长或条数上限的旧数据，至少保留一条"""
+        if self.static or len(self) <= 1:
+            return
+        oldest = self.latest_time - cache_time
+        index = self.start + int(np.searchsorted(self.times[self.start:self.end], oldest))
+        self.start = min(max(index, self.end - max_history, self.start), self.end - 1)
+
+    def locate(self, stamp: Optional[float], max_extrapolation: float) -> Tuple[int, int, float]:
+        """返回用于插值的两个样本下标与插值系数"""
+        last = self.end - 1
+        if stamp is None or self.static:
+            return last, last, 0.0
+        if stamp >= self.latest_time:
+            if stamp - self.latest_time > max_extrapolation:
+                raise TransformError(f"Lookup would require extrapolation into the future ({stamp:.3f} > {self.latest_time:.3f})")
+            return last, last, 0.0
+        if stamp <= self.earliest_time:
+            if self.earliest_time - stamp > max_extrapolation:
+                raise TransformError(f"Lookup would require extrapolation into the past ({stamp:.3f} < {self.earliest_time:.3f})")
+            return self.start, self.start, 0.0
+        i1 = self.start + int(np.searchsorted(self.times[self.start:self.end], stamp))
+        i0 = i1 - 1
+        t0, t1 = self.times[i0], self.times[i1]
+        return i0, i1, float((stamp - t0) / (t1 - t0))
+
+
+class TFBuffer:
+    """有界、按时间索引的坐标变换缓冲"""
+
+    def __init__(self, cache_time: float = 10.0, max_history: int = 1000,
+                 max_extrapolation: float = 0.1, max_cached_chains: int = 1024,
+                 stale_timeout: float = 10.0):
+        self.cache_time = cache_time
+        self.stale_timeout = stale_timeout  # 动态边超过该时长（秒，按接收时间）未更新即移除，0 表示不过期
+        self.max_history = max_history
+        self.max_extrapolation = max_extrapolation  # 超出缓冲时间范围多少秒内仍取端点值
+        self.max_cached_chains = max_cached_chains
+        self._edges: Dict[str, _EdgeHistory] = {}
+        self._received: Dict[str, float] = {}  # 动态边 child -> 最近接收时间
+        self._paused_at: Optional[float] = None  # 数据源暂停的时刻，暂停期间不判定过期
+        # 最新时刻查询的缓存: (target, source) -> 4x4 矩阵；依赖边 -> 缓存键
+        self._chain_cache: Dict[Tuple[str, str], np.ndarray] = {}
+        self._dependents: Dict[str, set] = {}
+
+    @staticmethod
+    def is_tf_message(topic: str, message_type: Optional[str]) -> bool:
+        return topic in TF_TOPICS or message_type in TF_MESSAGE_TYPES
+
+    def clear(self):
+        self._edges.clear()
+        self._received.clear()
+        self._chain_cache.clear()
+        self._dependents.clear()
+
+    # --- 写入 ---
+
+    def _invalidate(self, child: str):
+        for key in self._dependents.pop(child, ()):
+            self._chain_cache.pop(key, None)
+
+    def set_transform(self, transform: Dict[str, Any], static: bool = False) -> bool:
+        """写入一条 geometry_msgs/TransformStamped"""
+        header = transform.get('header') or {}
+        parent = str(header.get('frame_id') or '').lstrip('/')
+        child = str(transform.get('child_frame_id') or '').lstrip('/')
+        if not parent or not child or parent == child:
+            return False
+        tf = transform.get('transform') or {}
+        t = tf.get('translation') or {}
+        r = tf.get('rotation') or {}
+        translation = np.array([t.get('x', 0.0), t.get('y', 0.0), t.get('z', 0.0)], dtype=np.float64)
+        rotation = np.array([r.get('x', 0.0), r.get('y', 0.0), r.get('z', 0.0), r.get('w', 1.0)], dtype=np.float64)
+        norm = np.linalg.norm(rotation)
+        if not np.isfinite(norm) or norm < 1e-9 or not np.all(np.isfinite(translation)):
+            return False
+        rotation /= norm
+        stamp = stamp_to_seconds(header.get('stamp'))
+        if stamp is None:
+            stamp = 0.0
+
+        edge = self._edges.get(child)
+        if edge is None or edge.parent != parent or edge.static != static:
+            edge = self._edges[child] = _EdgeHistory(parent, static)
+        edge.insert(stamp, translation, rotation)
+        edge.trim(self.cache_time, self.max_history)
+        if static:
+            self._received.pop(child, None)
+        else:
+            self._received[child] = time.time()
+        self._invalidate(child)
+        return True
+
+    def add_message(self, topic: str, data: Dict[str, Any]) -> int:
+        """写入一条 TF 消息（消息信封或 TFMessage 数据本身），返回写入的变换数"""
+        payload = data.get('data', data) if isinstance(data, dict) else {}
+        transforms = payload.get('transforms') or []
+        static = topic == '/tf_static'
+        return sum(1 for transform in transforms if self.set_transform(transform, static))
+
+    def set_paused(self, paused: bool, now: Optional[float] = None):
+        """数据源（如回放）暂停或恢复
+
+        暂停期间没有新的 TF 是正常的，不判定过期；恢复时把接收时间顺延暂停的时长，
+        暂停前收到的坐标系不会在恢复后立即被移除。
+        """
+        now = time.time() if now is None else now
+        if paused:
+            if self._paused_at is None:
+                self._paused_at = now
+        elif self._paused_at is not None:
+            shift = now - self._paused_at
+            for child in self._received:
+                self._received[child] += shift
+            self._paused_at = None
+
+    def evict_stale(self, now: Optional[float] = None) -> List[str]:
+        """移除超时未更新的动态边（静态边不过期），返回被移除的 child_frame_id"""
+        if self.stale_timeout <= 0 or self._paused_at is not None:
+            return []
+        deadline = (now if now is not None else time.time()) - self.stale_timeout
+        evicted = [child for child, received in self._received.items() if received < deadline]
+        for child in evicted:
+            del self._received[child]
+            self._edges.pop(child, None)
+            self._invalidate(child)
+        return evicted
+
+    # --- 查询 ---
+
+    def frames(self) -> Dict[str, Any]:
+        """坐标系树：child -> {parent, static, 时间范围, 样本数}"""
+        return {
+            child: {
+                "parent": edge.parent,
+                "static": edge.static,
+                "earliest": edge.earliest_time,
+                "latest": edge.latest_time,
+                "samples": len(edge)
+            }
+            for child, edge in self._edges.items()
+        }
+
+    def _path_to_root(self, frame: str) -> List[str]:
+        path = [frame]
+        seen = {frame}
+        while frame in self._edges:
+            frame = self._edges[frame].parent
+            if frame in seen:
+                raise TransformError(f"TF tree contains a loop at frame '{frame}'")
+            path.append(frame)
+            seen.add(frame)
+        return path
+
+    def _chain(self, target: str, source: str) -> Tuple[List[str], List[str]]:
+        """返回 source、target 两侧到公共祖先的边（以 child 表示，不含祖先）"""
+        if target not in self._edges and not any(e.parent == target for e in self._edges.values()):
+            raise TransformError(f"Frame '{target}' does not exist")
+        if source not in self._edges and not any(e.parent == source for e in self._edges.values()):
+            raise TransformError(f"Frame '{source}' does not exist")
+        source_path = self._path_to_root(source)
+        target_path = self._path_to_root(target)
+        target_index = {frame: i for i, frame in enumerate(target_path)}
+        for i, frame in enumerate(source_path):
+            if frame in target_index:
+                return source_path[:i], target_path[:target_index[frame]]
+        raise TransformError(f"Frames '{target}' and '{source}' are not connected")
+
+    def _compute(self, target: str, source: str, stamp: Optional[float]) -> Tuple[np.ndarray, List[str]]:
+        source_edges, target_edges = self._chain(target, source)
+        edges = source_edges + target_edges
+        if not edges:
+            return np.eye(4), edges
+
+        # 批量采样、插值并转换为矩阵
+        histories = [self._edges[child] for child in edges]
+        located = [h.locate(stamp, self.max_extrapolation) for h in histories]
+        t0 = np.array([h.translations[i0] for h, (i0, _, _) in zip(histories, located)])
+        t1 = np.array([h.translations[i1] for h, (_, i1, _) in zip(histories, located)])
+        q0 = np.array([h.rotations[i0] for h, (i0, _, _) in zip(histories, located)])
+        q1 = np.array([h.rotations[i1] for h, (_, i1, _) in zip(histories, located)])
+        alpha = np.array([a for _, _, a in located])
+        translations = t0 + (t1 - t0) * alpha[:, None]
+        matrices = to_matrices(translations, slerp(q0, q1, alpha))
+
+        # ancestor <- source: E[k-1] @ ... @ E[0]；target 侧同理后取逆
+        ancestor_source = np.eye(4)
+        for m in matrices[:len(source_edges)]:
+            ancestor_source = m @ ancestor_source
+        ancestor_target = np.eye(4)
+        for m in matrices[len(source_edges):]:
+            ancestor_target = m @ ancestor_target
+        return invert_rigid(ancestor_target) @ ancestor_source, edges
+
+    def lookup_matrix(self, target: str, source: str, time: Any = None) -> Optional[np.ndarray]:
+        """返回将 source 坐标系中的点变换到 target 坐标系的 4x4 矩阵；无法求得时返回 None
+
+        time 可为秒数或消息头中的 stamp；为 None（或 0）时使用各边的最新值。
+        """
+        try:
+            return self._lookup(target.lstrip('/'), source.lstrip('/'), stamp_to_seconds(time) or None)
+        except TransformError:
+            return None
+
+    def _lookup(self, target: str, source: str, stamp: Optional[float]) -> np.ndarray:
+        if stamp is not None:
+            return self._compute(target, source, stamp)[0]
+        key = (target, source)
+        cached = self._chain_cache.get(key)
+        if cached is not None:
+            return cached
+        matrix, edges = self._compute(target, source, None)
+        if len(self._chain_cache) >= self.max_cached_chains:
+            self._chain_cache.clear()
+            self._dependents.clear()
+        self._chain_cache[key] = matrix
+        for child in edges:
+            self._dependents.setdefault(child, set()).add(key)
+        return matrix
+
+    def lookup_transform(self, target: str, source: str, time: Any = None) -> Dict[str, Any]:
+        """返回 geometry_msgs/Transform 形式的结果；失败时抛出 TransformError"""
+        target, source = target.lstrip('/'), source.lstrip('/')
+        stamp = stamp_to_seconds(time) or None
+        matrix = self._lookup(target, source, stamp)
+        t = matrix[:3, 3]
+        q = matrix_to_quaternion(matrix[:3, :3])
+        return {
+            "target_frame": target,
+            "source_frame": source,
+            "time": stamp,
+            "translation": {"x": float(t[0]), "y": float(t[1]), "z": float(t[2])},
+            "rotation": {"x": float(q[0]), "y": float(q[1]), "z": float(q[2]), "w": float(q[3])}
+        }
@@ -1,14 +1,32 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 from typing import Any
 
 import sys, os
 sys.path.append(".")
 # 从 app_state 导入共享实例和回调所需的模块
-from app_state import manager, data_source_manager
+from app_state import manager, data_source_manager, param_manager
+
+# --- 生命周期 ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    stats_task = asyncio.create_task(api_plugins.broadcast_plugin_stats())
+    tf_eviction_task = asyncio.create_task(api_tf.evict_stale_frames())
+    marker_expiry_task = asyncio.create_task(api_topics.expire_markers())
+    yield
+    stats_task.cancel()
+    tf_eviction_task.cancel()
+    marker_expiry_task.cancel()
+    # 关闭时停止录制，确保索引写出
+    await asyncio.to_thread(data_source_manager.recorder.stop)
+    data_source_manager.series_store.close()
+    # 写出延迟回写中尚未落盘的参数修改
+    await param_manager.flush()
 
 # --- FastAPI 应用实例 ---
-app = FastAPI(title="tStudio backend")
+app = FastAPI(title="tStudio backend", lifespan=lifespan)
 
 # --- 中间件 ---
 app.add_middleware(
@@ -21,22 +39,21 @@ app.add_middleware(
 
 # --- 数据回调 ---
 async def on_data_received(topic: str, data: Any):
-    """数据接收回调, 广播给所有WebSocket客户端"""
-    await manager.broadcast({
-        "type": "data_update",
-        "topic": topic,
-        "data": data
-    })
+    """数据接收回调, 广播给所有WebSocket客户端（按各客户端的固定坐标系预变换）"""
+    await manager.broadcast_data(topic, data, data_source_manager.to_fixed_frame)
 
 data_source_manager.add_data_callback(on_data_received)
 
 # --- API路由 ---
 # 导入并包含各个模块的路由
-from api import api_data, api_topics, api_params
+from api import api_data, api_topics, api_params, api_recording, api_plugins, api_tf
 
 app.include_router(api_data.router, prefix="/api", tags=["Data & Connection"])
 app.include_router(api_topics.router, prefix="/api", tags=["Topics & WebSocket"])
 app.include_router(api_params.router, prefix="/api/params", tags=["Parameters"])
+app.include_router(api_recording.router, prefix="/api", tags=["Recording"])
+app.include_router(api_plugins.router, prefix="/api", tags=["Plugins"])
+app.include_router(api_tf.router, prefix="/api", tags=["TF"])
 
 # --- 启动 ---
 if __name__ == "__main__":
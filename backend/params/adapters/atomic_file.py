@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+
+def replace_atomic(file_path: str, write):
+    """先写入同目录下的临时文件并 fsync，再 rename 覆盖目标，崩溃时不会留下写了一半的文件。"""
+    directory = os.path.dirname(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    # 持久化目录项（rename 本身）；部分平台不支持对目录 fsync
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
@@ -0,0 +1,183 @@
+"""内容寻址的配置备份库
+
+目录结构（位于类别的 backups 目录下）：
+- objects/<sha256>.json：按配置内容的哈希存放的备份对象，内容相同的备份只存一份。
+  对象为完整内容 {"type": "full", "data"}，或相对上一版本的差异
+  {"type": "delta", "base": <上一版本哈希>, "ops": [...]}；差异链长度超过
+  MAX_DELTA_CHAIN 或差异不比完整内容小时存完整内容。
+- index/<name>.json：每个配置的备份索引（按时间排序），列出备份只读取该配置的索引。
+
+备份名称沿用原有格式（{name}_{时间戳}.json / {name}_auto_backup.json），对 API 透明。
+首次访问某配置且尚无索引时，导入 backups 目录下旧格式的整文件备份（只扫描一次）。
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from .atomic_file import replace_atomic
+from .config_diff import diff_config, apply_ops
+
+MAX_DELTA_CHAIN = 16
+
+
+def content_hash(data: Any) -> str:
+    """内容哈希；键的顺序属于配置内容，不排序"""
+    canonical = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class BackupStore:
+    """单个类别的备份库；方法为同步 I/O，由适配器放到线程中执行。"""
+
+    def __init__(self, backup_dir: str):
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, "objects")
+        self.index_dir = os.path.join(backup_dir, "index")
+        # name -> (索引文件签名, 索引条目 [{"name", "hash", "created", "auto"}]，按时间先后排列)
+        self._indexes: Dict[str, Tuple[Optional[Tuple[int, int, int]], List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, f"{digest}.json")
+
+    def _index_path(self, name: str) -> str:
+        return os.path.join(self.index_dir, f"{name}.json")
+
+    def _index_signature(self, name: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._index_path(name))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def _read_object(self, digest: str) -> Dict[str, Any]:
+        with open(self._object_path(digest), 'rb') as f:
+            return json.loads(f.read())
+
+    def _resolve(self, digest: str) -> Any:
+        """沿差异链找到完整内容，再依次应用差异"""
+        chain = []
+        obj = self._read_object(digest)
+        while obj["type"] == "delta":
+            chain.append(obj["ops"])
+            obj = self._read_object(obj["base"])
+        data = obj["data"]
+        for ops in reversed(chain):
+            data = apply_ops(data, ops)
+        return data
+
+    def _store_object(self, digest: str, data: Any, previous: Optional[str]):
+        if os.path.exists(self._object_path(digest)):
+            return
+        os.makedirs(self.objects_dir, exist_ok=True)
+        obj = {"type": "full", "depth": 0, "data": data}
+        base = None
+        if previous is not None:
+            try:
+                base = self._read_object(previous)
+            except (OSError, ValueError):
+                base = None
+        if base is not None:
+            if base.get("depth", 0) < MAX_DELTA_CHAIN:
+                ops = diff_config(self._resolve(previous), data)
+                if len(_dumps(ops)) < len(_dumps(data)):
+                    obj = {"type": "delta", "depth": base.get("depth", 0) + 1, "base": previous, "ops": ops}
+        replace_atomic(self._object_path(digest), lambda f: f.write(_dumps(obj)))
+
+    def _save_index(self, name: str, entries: List[Dict[str, Any]]):
+        os.makedirs(self.index_dir, exist_ok=True)
+        replace_atomic(self._index_path(name), lambda f: f.write(_dumps(entries)))
+        self._indexes[name] = (self._index_signature(name), entries)
+
+    def _load_index(self, name: str) -> List[Dict[str, Any]]:
+        """读取索引；只 stat 索引文件确认缓存有效，不扫描目录"""
+        signature = self._index_signature(name)
+        cached = self._indexes.get(name)
+        if cached is not None and signature is not None and cached[0] == signature:
+            return cached[1]
+        if signature is not None:
+            with open(self._index_path(name), 'rb') as f:
+                entries = json.loads(f.read())
+            self._indexes[name] = (signature, entries)
+            return entries
+        entries = self._import_legacy(name)
+        self._save_index(name, entries)
+        return entries
+
+    def _import_legacy(self, name: str) -> List[Dict[str, Any]]:
+        """导入旧格式的整文件备份，原文件保留不动"""
+        pattern = re.compile(rf"^{re.escape(name)}_(\d{{8}}_\d{{6}}|auto_backup)\.json$")
+        legacy = []
+        for file_name in os.listdir(self.backup_dir):
+            match = pattern.match(file_name)
+            if match:
+                file_path = os.path.join(self.backup_dir, file_name)
+                legacy.append((os.path.getmtime(file_path), file_name, match.group(1) == "auto_backup"))
+
+        entries = []
+        for created, file_name, is_auto in sorted(legacy):
+            try:
+                with open(os.path.join(self.backup_dir, file_name), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[BackupStore] Skipping unreadable legacy backup '{file_name}': {e}")
+                continue
+            digest = content_hash(data)
+            self._store_object(digest, data, entries[-1]["hash"] if entries else None)
+            entries.append({"name": file_name, "hash": digest, "created": created, "auto": is_auto})
+        return entries
+
+    def add(self, name: str, backup_name: str, data: Any, is_auto: bool = False) -> str:
+        """添加备份并返回其名称。
+
+        自动备份替换同名的旧自动备份；手动备份与该配置最近一次手动备份内容相同时不新增，
+        直接返回已有备份的名称。
+        """
+        with self._lock:
+            entries = list(self._load_index(name))
+            digest = content_hash(data)
+            if is_auto:
+                entries = [e for e in entries if e["name"] != backup_name]
+            else:
+                latest_manual = next((e for e in reversed(entries) if not e.get("auto")), None)
+                if latest_manual is not None and latest_manual["hash"] == digest:
+                    return latest_manual["name"]
+                names = {e["name"] for e in entries}
+                stem, counter = backup_name[:-len(".json")], 1
+                while backup_name in names:
+                    backup_name = f"{stem}_{counter}.json"
+                    counter += 1
+
+            self._store_object(digest, data, entries[-1]["hash"] if entries else None)
+            entries.append({"name": backup_name, "hash": digest, "created": time.time(), "auto": is_auto})
+            self._save_index(name, entries)
+            return backup_name
+
+    def list(self, name: str) -> List[str]:
+        """备份名称，最新的在前"""
+        with self._lock:
+            return [e["name"] for e in reversed(self._load_index(name))]
+
+    def load(self, name: str, backup_name: str) -> Optional[Any]:
+        with self._lock:
+            entry = next((e for e in self._load_index(name) if e["name"] == backup_name), None)
+            if entry is None:
+                return None
+            return self._resolve(entry["hash"])
+
+    def remove(self, name: str, backup_name: str) -> bool:
+        """从索引中移除备份；对象可能被其他备份或差异引用，保留不删"""
+        with self._lock:
+            entries = self._load_index(name)
+            remaining = [e for e in entries if e["name"] != backup_name]
+            if len(remaining) == len(entries):
+                return False
+            self._save_index(name, remaining)
+            return True
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 class BaseParameterAdapter(ABC):
     """参数适配器的抽象基类"""
@@ -17,4 +17,11 @@ class BaseParameterAdapter(ABC):
     @abstractmethod
     async def save_config(self, name: str, config_data: Dict[str, Any]) -> bool:
         """保存指定的配置。"""
-        pass
\ No newline at end of file
+        pass
+
+    def get_signature(self, name: str) -> Optional[Tuple]:
+        """返回配置存储的变更签名，内容变化时签名随之变化；返回 None 表示不支持缓存。
+
+        签名的第一个元素须为最近修改时间（纳秒），用于判断修改是否过于接近当前时刻。
+        """
+        return None
@@ -0,0 +1,78 @@
+"""原始格式配置（ParamNode.to_dict()）之间的差异计算与重放"""
+import copy
+from typing import Dict, Any, List, Optional
+
+_MISSING = object()
+
+
+def diff_config(old: Any, new: Any, path: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """计算把 old 变为 new 所需的最少操作。
+
+    操作均为绝对操作（{"op": "set", "path", "value"} / {"op": "del", "path"} /
+    {"op": "order", "path", "keys"}），在任意状态上按顺序重放都得到相同的结果，
+    重复重放是安全的。键的顺序属于配置内容（决定界面中参数的排列），
+    顺序变化时以 order 操作记录。
+    """
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, old_value in old.items():
+            if key not in new:
+                ops.append({"op": "del", "path": path + [key]})
+        for key, new_value in new.items():
+            old_value = old.get(key, _MISSING)
+            if old_value is _MISSING:
+                ops.append({"op": "set", "path": path + [key], "value": new_value})
+            else:
+                ops.extend(diff_config(old_value, new_value, path + [key]))
+        # 重放 del/set 后保留的键维持原顺序、新键追加在末尾，与目标顺序不同时需要重排
+        replayed_order = [key for key in old if key in new] + [key for key in new if key not in old]
+        if replayed_order != list(new):
+            ops.append({"op": "order", "path": path, "keys": list(new)})
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "set", "path": path, "value": new}]
+
+
+def apply_ops(state: Any, ops: List[Dict[str, Any]]) -> Any:
+    """在 state 上重放操作并返回新状态（会原地修改 state 中的字典）。"""
+    for op in ops:
+        path = op["path"]
+        if op["op"] == "order":
+            node = state
+            for key in path:
+                node = node.get(key) if isinstance(node, dict) else None
+            if isinstance(node, dict):
+                _reorder(node, op["keys"])
+            continue
+        if not path:
+            state = copy.deepcopy(op.get("value")) if op["op"] == "set" else {}
+            continue
+        if not isinstance(state, dict):
+            state = {}
+        node = state
+        for key in path[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                if op["op"] == "del":
+                    node = None
+                    break
+                child = node[key] = {}
+            node = child
+        if node is None:
+            continue
+        if op["op"] == "set":
+            node[path[-1]] = copy.deepcopy(op.get("value"))
+        else:
+            node.pop(path[-1], None)
+    return state
+
+
+def _reorder(node: Dict[str, Any], keys: List[str]):
+    """原地按 keys 重排字典，未列出的键保持原顺序排在最后"""
+    ordered = {key: node[key] for key in keys if key in node}
+    rest = {key: value for key, value in node.items() if key not in ordered}
+    node.clear()
+    node.update(ordered)
+    node.update(rest)
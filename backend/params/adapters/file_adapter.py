@@ -1,10 +1,12 @@
 import os
 import json
-import shutil
+import asyncio
 import aiofiles
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from .base_adapter import BaseParameterAdapter
+from .atomic_file import replace_atomic
+from .backup_store import BackupStore
 
 # 获取项目根目录 (backend目录的上一级)
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,6 +24,7 @@ class FileParameterAdapter(BaseParameterAdapter):
         print(f"[FileParameterAdapter] Initialized for category '{category}'. Active directory: {self.active_dir}")
         os.makedirs(self.active_dir, exist_ok=True)
         os.makedirs(self.backup_dir, exist_ok=True)
+        self.backups = BackupStore(self.backup_dir)
 
     def _get_path(self, name: str, use_backup=False, timestamp=None) -> str:
         """获取配置文件的路径"""
@@ -29,6 +32,14 @@ class FileParameterAdapter(BaseParameterAdapter):
             return os.path.join(self.backup_dir, f"{name}_{timestamp}.json")
         return os.path.join(self.active_dir, f"{name}.json")
 
+    def get_signature(self, name: str) -> Optional[Tuple[int, int, int]]:
+        """文件签名 (mtime_ns, inode, size)，文件不存在时返回 None。"""
+        try:
+            st = os.stat(self._get_path(name))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
     async def list_configs(self) -> List[str]:
         """列出所有活动的配置文件。"""
         files = [f for f in os.listdir(self.active_dir) if f.endswith('.json')]
@@ -42,12 +53,15 @@ class FileParameterAdapter(BaseParameterAdapter):
         async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
             return json.loads(await f.read())
 
+    # 原子写入工具，子类与备份库共用
+    _replace_atomic = staticmethod(replace_atomic)
+
     async def save_config(self, name: str, config_data: Dict[str, Any]) -> bool:
-        """保存或覆盖整个活动配置文件。"""
+        """原子地保存或覆盖整个活动配置文件。"""
         file_path = self._get_path(name)
         try:
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(config_data, indent=4))
+            content = json.dumps(config_data, indent=4).encode('utf-8')
+            await asyncio.to_thread(self._replace_atomic, file_path, lambda f: f.write(content))
             return True
         except Exception as e:
             print(f"Error saving config '{name}': {e}")
@@ -66,41 +80,48 @@ class FileParameterAdapter(BaseParameterAdapter):
             return False
 
     async def create_backup(self, name: str, is_auto: bool = False) -> str:
-        """为指定的配置文件创建一个时间戳备份。"""
-        source_path = self._get_path(name)
-        if not os.path.exists(source_path):
+        """为指定的配置创建备份；内容与最近一次手动备份相同时返回已有备份的名称。"""
+        config_data = await self.load_config(name)
+        if config_data is None:
             return None
         
         if is_auto:
             backup_name = f"{name}_auto_backup.json"
-            backup_path = os.path.join(self.backup_dir, backup_name)
         else:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = self._get_path(name, use_backup=True, timestamp=timestamp)
+            backup_name = os.path.basename(self._get_path(name, use_backup=True, timestamp=timestamp))
         
         try:
-            shutil.copy2(source_path, backup_path)
-            return os.path.basename(backup_path)
+            return await asyncio.to_thread(self.backups.add, name, backup_name, config_data, is_auto)
         except Exception as e:
             print(f"Error creating backup for '{name}': {e}")
             return None
 
     async def list_backups(self, name: str) -> List[str]:
-        """列出指定配置的所有备份文件。"""
-        backups = [f for f in os.listdir(self.backup_dir) if f.startswith(f"{name}_") and f.endswith('.json')]
-        return sorted(backups, reverse=True)
+        """列出指定配置的所有备份，最新的在前（只读取该配置的备份索引）。"""
+        return await asyncio.to_thread(self.backups.list, name)
 
-    async def restore_from_backup(self, name: str, backup_filename: str) -> bool:
-        """从指定的备份文件恢复配置。"""
-        backup_path = os.path.join(self.backup_dir, backup_filename)
-        active_path = self._get_path(name)
-
-        if not os.path.exists(backup_path):
+    async def delete_backup(self, name: str, backup_filename: str) -> bool:
+        """删除指定配置的一个备份。"""
+        try:
+            return await asyncio.to_thread(self.backups.remove, name, backup_filename)
+        except Exception as e:
+            print(f"Error deleting backup '{backup_filename}' of '{name}': {e}")
             return False
-        
+
+    async def _write_restored(self, name: str, config_data: Any):
+        """将恢复出的内容写为活动配置。"""
+        content = json.dumps(config_data, indent=4).encode('utf-8')
+        await asyncio.to_thread(self._replace_atomic, self._get_path(name), lambda f: f.write(content))
+
+    async def restore_from_backup(self, name: str, backup_filename: str) -> bool:
+        """从指定的备份恢复配置。"""
         try:
-            shutil.copy2(backup_path, active_path)
+            config_data = await asyncio.to_thread(self.backups.load, name, backup_filename)
+            if config_data is None:
+                return False
+            await self._write_restored(name, config_data)
             return True
         except Exception as e:
             print(f"Error restoring '{name}' from '{backup_filename}': {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import copy
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from .file_adapter import FileParameterAdapter
+from .config_diff import diff_config, apply_ops
+
+_MISSING = object()
+
+JOURNAL_SUFFIX = ".journal"
+
+
+class JournalParameterAdapter(FileParameterAdapter):
+    """以快照 + 追加日志的形式存储参数配置。
+
+    快照沿用 FileParameterAdapter 的 active/<name>.json（格式相同，可随时切换回文件适配器），
+    每次保存只把与上一状态的差异作为一行 JSON 追加到 active/<name>.journal，
+    写入代价与修改量成正比。加载时读取快照并重放日志；日志超过 compact_threshold
+    字节后在后台压缩：写出新快照并清空日志。
+
+    日志记录为 {"ts": 时间戳, "ops": [...]}；崩溃导致的末尾残缺行在加载时被截掉。
+    日志中的操作是幂等的绝对操作，压缩时若在写出快照后、清空日志前崩溃，重放结果不变。
+    """
+
+    def __init__(self, config_dir: str = "configs", category: str = "system", compact_threshold: int = 1024 * 1024):
+        super().__init__(config_dir=config_dir, category=category)
+        self.compact_threshold = compact_threshold
+        # name -> (加载/写入后的签名, 当前状态)，作为计算差异的基准
+        self._states: Dict[str, Tuple[Optional[Tuple], Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._compaction_tasks: Dict[str, asyncio.Task] = {}
+
+    def _journal_path(self, name: str) -> str:
+        return os.path.join(self.active_dir, f"{name}{JOURNAL_SUFFIX}")
+
+    def _lock(self, name: str) -> asyncio.Lock:
+        return self._locks.setdefault(name, asyncio.Lock())
+
+    def get_signature(self, name: str) -> Optional[Tuple]:
+        """(最近修改时间, 快照签名, 日志签名)；快照不存在时返回 None。"""
+        snapshot = super().get_signature(name)
+        if snapshot is None:
+            return None
+        try:
+            st = os.stat(self._journal_path(name))
+            journal = (st.st_mtime_ns, st.st_ino, st.st_size)
+        except OSError:
+            journal = None
+        latest = max(snapshot[0], journal[0]) if journal else snapshot[0]
+        return (latest, snapshot, journal)
+
+    def _read_records(self, name: str, repair: bool = False) -> List[Dict[str, Any]]:
+        """读取日志记录；repair 时截掉崩溃留下的残缺末尾，保证后续追加从完整行开始。"""
+        journal_path = self._journal_path(name)
+        if not os.path.exists(journal_path):
+            return []
+        records = []
+        valid_length = 0
+        with open(journal_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                valid_length += len(line)
+        if repair and valid_length != os.path.getsize(journal_path):
+            print(f"[JournalParameterAdapter] Truncating damaged journal tail of '{name}' at byte {valid_length}")
+            with open(journal_path, 'r+b') as f:
+                f.truncate(valid_length)
+        return records
+
+    def _load_sync(self, name: str, until: Optional[float] = None) -> Any:
+        file_path = self._get_path(name)
+        if not os.path.exists(file_path):
+            return _MISSING
+        with open(file_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        for record in self._read_records(name, repair=until is None):
+            if until is not None and record.get("ts", 0) > until:
+                break
+            state = apply_ops(state, record.get("ops", []))
+        return state
+
+    async def _current_state(self, name: str) -> Any:
+        """当前状态；文件在上次加载后被外部修改时重新加载。调用方需持有该配置的锁。"""
+        signature = self.get_signature(name)
+        cached = self._states.get(name)
+        if cached is not None and signature is not None and cached[0] == signature:
+            return cached[1]
+        state = await asyncio.to_thread(self._load_sync, name)
+        if state is _MISSING:
+            self._states.pop(name, None)
+            return _MISSING
+        self._states[name] = (self.get_signature(name), state)
+        return state
+
+    async def load_config(self, name: str) -> Dict[str, Any]:
+        """加载快照并重放日志。"""
+        async with self._lock(name):
+            state = await self._current_state(name)
+        return None if state is _MISSING else copy.deepcopy(state)
+
+    async def load_config_at(self, name: str, timestamp: float) -> Optional[Dict[str, Any]]:
+        """重放到指定时间点的配置（只能回溯到最近一次压缩之后）。"""
+        state = await asyncio.to_thread(self._load_sync, name, timestamp)
+        return None if state is _MISSING else state
+
+    async def list_history(self, name: str) -> List[float]:
+        """日志中各次保存的时间戳，可传给 load_config_at。"""
+        records = await asyncio.to_thread(self._read_records, name)
+        return [record.get("ts", 0) for record in records]
+
+    def _append_sync(self, name: str, record: Dict[str, Any]) -> int:
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        with open(self._journal_path(name), 'ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def _write_snapshot_sync(self, name: str, state: Any):
+        content = json.dumps(state, indent=4).encode('utf-8')
+        self._replace_atomic(self._get_path(name), lambda f: f.write(content))
+        # 快照已包含全部修改；日志同样以原子替换清空
+        self._replace_atomic(self._journal_path(name), lambda f: None)
+
+    async def save_config(self, name: str, config_data: Dict[str, Any]) -> bool:
+        """只追加与当前状态的差异；配置不存在时直接写出快照。"""
+        try:
+            async with self._lock(name):
+                state = await self._current_state(name)
+                new_state = copy.deepcopy(config_data)
+                if state is _MISSING:
+                    await asyncio.to_thread(self._write_snapshot_sync, name, new_state)
+                    self._states[name] = (self.get_signature(name), new_state)
+                    return True
+
+                ops = diff_config(state, new_state)
+                if not ops:
+                    return True
+                journal_size = await asyncio.to_thread(self._append_sync, name, {"ts": time.time(), "ops": ops})
+                self._states[name] = (self.get_signature(name), new_state)
+
+            if journal_size > self.compact_threshold and name not in self._compaction_tasks:
+                self._compaction_tasks[name] = asyncio.create_task(self._compact_later(name))
+            return True
+        except Exception as e:
+            print(f"Error saving config '{name}': {e}")
+            return False
+
+    async def _compact_later(self, name: str):
+        try:
+            await self.compact(name)
+        finally:
+            self._compaction_tasks.pop(name, None)
+
+    async def compact(self, name: str) -> bool:
+        """把日志合并进快照并清空日志。"""
+        try:
+            async with self._lock(name):
+                state = await self._current_state(name)
+                if state is _MISSING:
+                    return False
+                await asyncio.to_thread(self._write_snapshot_sync, name, state)
+                self._states[name] = (self.get_signature(name), state)
+            return True
+        except Exception as e:
+            print(f"Error compacting config '{name}': {e}")
+            return False
+
+    async def delete_config(self, name: str) -> bool:
+        """删除快照与日志。"""
+        async with self._lock(name):
+            self._states.pop(name, None)
+            journal_path = self._journal_path(name)
+            if os.path.exists(journal_path):
+                try:
+                    os.remove(journal_path)
+                except OSError as e:
+                    print(f"Error deleting journal of '{name}': {e}")
+            return await super().delete_config(name)
+
+    async def _write_restored(self, name: str, config_data: Any):
+        """以备份内容作为新快照，并清空日志。"""
+        async with self._lock(name):
+            await asyncio.to_thread(self._write_snapshot_sync, name, config_data)
+            self._states[name] = (self.get_signature(name), config_data)
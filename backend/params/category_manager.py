@@ -1,18 +1,78 @@
+import asyncio
 import os
+import time
 import uuid
-from typing import Dict, Any, List, Optional, Set
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple, Type, Callable, Awaitable
 from .adapters.file_adapter import FileParameterAdapter
+from .adapters.config_diff import diff_config
 from .parameter_types import ParamNode, build_param_tree, create_parameter
 
+# 文件修改时间的精度有限（内核时钟粒度），修改时间距读取时刻太近的文件
+# 可能在同一时钟周期内再次被写入而签名不变，这类读取结果不进入缓存
+RACY_WINDOW = 0.05
+
+def diff_changes(old: Any, new: Any, path: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """原始格式配置（to_dict()）之间的最小差异：[{"path", "old", "new"}]。"""
+    base = len(path or [])
+    changes = []
+    for op in diff_config(old, new, path):
+        old_value = old
+        for key in op["path"][base:]:
+            old_value = old_value.get(key) if isinstance(old_value, dict) else None
+        changes.append({"path": op["path"], "old": old_value, "new": op.get("value")})
+    return changes
+
+class ParamOperationError(ValueError):
+    """批量操作中某一项无法应用；index 为出错操作的序号。"""
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Operation {index}: {message}")
+        self.index = index
+
+class VersionConflictError(Exception):
+    """批量操作指定的 expected_version 与当前版本不一致。"""
+    def __init__(self, expected: int, current: int):
+        super().__init__(f"Version conflict: expected {expected}, current {current}")
+        self.expected = expected
+        self.current = current
+
 class CategoryParameterManager:
-    """按类别管理不同的参数适配器，并使用 ParamNode 模型进行操作。"""
+    """按类别管理不同的参数适配器，并使用 ParamNode 模型进行操作。
+
+    解析后的 ParamNode 树按 (category, name) 缓存（LRU，最多 max_cached_trees 个），
+    每次访问只对文件做一次 stat，签名 (mtime, inode, size) 不变时直接复用缓存，
+    不读取、不解析文件；文件被外部修改后自动重新加载。
+
+    每个配置维护一个进程内的版本号，每次成功写入后递增，供批量操作做乐观并发控制；
+    每次修改后以最小差异通知 add_change_listener 注册的回调。
+
+    写入采用延迟回写（write-behind）：修改后的树作为权威数据保存在内存中，
+    write_delay 秒内对同一配置的多次修改合并为一次落盘（原子替换）；
+    write_delay <= 0 时每次修改立即写入。关闭服务时需调用 flush 写出未落盘的修改。
+
+    adapter_class 决定存储方式：FileParameterAdapter（默认，每次写入整个文件）或
+    JournalParameterAdapter（快照 + 追加日志，适合参数很多的配置）。
+    """
     
-    def __init__(self):
+    def __init__(self, max_cached_trees: int = 64, write_delay: float = 0.5,
+                 adapter_class: Type[FileParameterAdapter] = FileParameterAdapter):
         self.adapters: Dict[str, FileParameterAdapter] = {}
+        self.adapter_class = adapter_class
+        self.max_cached_trees = max_cached_trees
+        # (category, name) -> (文件签名, ParamNode 树)
+        self._tree_cache: "OrderedDict[Tuple[str, str], Tuple[Tuple, ParamNode]]" = OrderedDict()
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._batch_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.write_delay = write_delay
+        # (category, name) -> 尚未落盘的树（权威数据，读取时优先于文件）
+        self._dirty: Dict[Tuple[str, str], ParamNode] = {}
+        self._flush_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._write_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._change_listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
     
     def get_adapter(self, category: str) -> FileParameterAdapter:
         if category not in self.adapters:
-            self.adapters[category] = FileParameterAdapter(category=category)
+            self.adapters[category] = self.adapter_class(category=category)
         return self.adapters[category]
 
     def dynamic_scan_categories(self) -> Set[str]:
@@ -24,9 +84,32 @@ class CategoryParameterManager:
                     categories_to_check.add(item)
         return (categories_to_check)
 
+    def _cache_tree(self, category: str, name: str, signature: Optional[Tuple], tree: ParamNode):
+        key = (category, name)
+        # 签名不可用或文件刚被修改（见 RACY_WINDOW）时不缓存
+        if signature is None or time.time_ns() - signature[0] < RACY_WINDOW * 1e9:
+            self._tree_cache.pop(key, None)
+            return
+        self._tree_cache[key] = (signature, tree)
+        self._tree_cache.move_to_end(key)
+        while len(self._tree_cache) > self.max_cached_trees:
+            self._tree_cache.popitem(last=False)
+
     async def _load_and_parse_config(self, config_name: str, category: str) -> Optional[ParamNode]:
-        """加载配置文件并将其解析为 ParamNode 树。"""
+        """加载配置文件并将其解析为 ParamNode 树；文件未变化时直接返回缓存的树。"""
         adapter = self.get_adapter(category)
+        key = (category, config_name)
+        dirty = self._dirty.get(key)
+        if dirty is not None:
+            return dirty
+        signature = adapter.get_signature(config_name)
+        cached = self._tree_cache.get(key)
+        if cached is not None:
+            if signature is not None and cached[0] == signature:
+                self._tree_cache.move_to_end(key)
+                return cached[1]
+            del self._tree_cache[key]
+
         try:
             config_data = await adapter.load_config(config_name)
         except FileNotFoundError:
@@ -35,14 +118,88 @@ class CategoryParameterManager:
             return None
         
         tree = build_param_tree(config_data, name=config_name)
+        # 签名在读取前获取：读取期间文件若被修改，下次访问时签名不一致会重新加载
+        self._cache_tree(category, config_name, signature, tree)
 
         return tree
 
     async def _save_tree(self, tree: ParamNode, category: str) -> bool:
-        """将 ParamNode 树序列化并保存到文件。"""
-        adapter = self.get_adapter(category)
-        config_data = tree.to_dict()
-        return await adapter.save_config(tree.name, config_data)
+        """提交修改后的树：立即对读取可见，并在 write_delay 后合并写入文件。
+
+        配置文件尚不存在时立即写入，保证新配置能被列出。立即写入失败时撤回提交
+        （恢复之前的未落盘状态和版本号）并返回 False；树上的原地修改由调用方撤销。
+        """
+        key = (category, tree.name)
+        previous_dirty = self._dirty.get(key)
+        version = self.get_version(tree.name, category)
+        self._bump_version(category, tree.name)
+        self._dirty[key] = tree
+        self._tree_cache.pop(key, None)
+
+        if self.write_delay <= 0 or self.get_adapter(category).get_signature(tree.name) is None:
+            if await self._flush_key(key):
+                return True
+            # 写入期间没有新的提交时才撤回，避免覆盖并发写入的结果
+            if self._dirty.get(key) is tree:
+                if previous_dirty is None:
+                    del self._dirty[key]
+                else:
+                    self._dirty[key] = previous_dirty
+            if self._versions.get(key) == version + 1:
+                self._versions[key] = version
+            return False
+        if key not in self._flush_tasks:
+            self._flush_tasks[key] = asyncio.create_task(self._flush_later(key))
+        return True
+
+    def _bump_version(self, category: str, name: str):
+        key = (category, name)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    async def _flush_later(self, key: Tuple[str, str]):
+        await asyncio.sleep(self.write_delay)
+        # 先移除任务记录：写入期间的新修改会安排下一次写入
+        self._flush_tasks.pop(key, None)
+        await self._flush_key(key)
+
+    async def _flush_key(self, key: Tuple[str, str]) -> bool:
+        """将单个配置的未落盘修改写入文件。"""
+        lock = self._write_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            tree = self._dirty.get(key)
+            if tree is None:
+                return True
+            category, name = key
+            adapter = self.get_adapter(category)
+            success = await adapter.save_config(name, tree.to_dict())
+            if not success:
+                # 保留在内存中，下次写入或 flush 时重试
+                return False
+            # 写入期间若有新修改，保持脏状态，由已安排的下一次写入处理
+            if self._dirty.get(key) is tree:
+                del self._dirty[key]
+                self._cache_tree(category, name, adapter.get_signature(name), tree)
+            return True
+
+    def _discard_pending(self, name: str, category: str):
+        """丢弃未落盘的修改（配置被删除或从备份恢复时）。"""
+        key = (category, name)
+        task = self._flush_tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        self._dirty.pop(key, None)
+        self._tree_cache.pop(key, None)
+
+    async def flush(self, name: str = None, category: str = None) -> bool:
+        """立即写出未落盘的修改；不指定参数时写出全部。全部成功时返回 True。"""
+        keys = [(category, name)] if name is not None else list(self._dirty)
+        success = True
+        for key in keys:
+            task = self._flush_tasks.pop(key, None)
+            if task is not None:
+                task.cancel()
+            success = await self._flush_key(key) and success
+        return success
 
     async def get_all_configs_structure(self) -> Dict[str, List[str]]:
         """获取所有类别的配置结构。"""
@@ -61,7 +218,8 @@ class CategoryParameterManager:
 
         empty_root = {}
         tree = build_param_tree(empty_root, name=name)
-        await self._save_tree(tree, category)
+        if await self._save_tree(tree, category):
+            await self._notify(category, name, [{"path": [], "old": None, "new": tree.to_dict()}])
         return tree
     
     async def get_configs_list(self, category: str) -> List[str]:
@@ -81,86 +239,209 @@ class CategoryParameterManager:
     
     async def save_config_data(self, name: str, category: str, config_data: Any) -> bool:
         """直接保存字典或原始值格式的配置数据。"""
+        old_tree = await self._load_and_parse_config(name, category)
+        old_data = old_tree.to_dict() if old_tree is not None else None
         tree = build_param_tree(config_data, name=name)
-        return await self._save_tree(tree, category)
+        success = await self._save_tree(tree, category)
+        if success:
+            await self._notify(category, name, diff_changes(old_data, tree.to_dict()))
+        return success
 
     async def delete_config(self, name: str, category: str) -> bool:
         adapter = self.get_adapter(category)
-        return await adapter.delete_config(name)
+        self._discard_pending(name, category)
+        success = await adapter.delete_config(name)
+        if success:
+            await self._notify(category, name, [], deleted=True)
+        return success
+
+    async def _try_operations(self, config_name: str, operations: List[Dict[str, Any]], category: str) -> bool:
+        try:
+            await self.apply_operations(config_name, operations, category)
+            return True
+        except (ParamOperationError, FileNotFoundError, IOError):
+            return False
 
     async def add_parameter(self, config_name: str, parent_path: List[str], param_type: str, name: str, value: Any, category: str) -> bool:
-        root_tree = await self._load_and_parse_config(config_name, category)
-        if root_tree is None: return False
+        return await self._try_operations(config_name, [
+            {"op": "add", "path": parent_path, "param_type": param_type, "name": name, "value": value}
+        ], category)
+
+    async def update_parameter_value(self, config_name: str, path: List[str], value: Any, category: str) -> bool:
+        return await self._try_operations(config_name, [{"op": "update", "path": path, "value": value}], category)
+
+    async def update_parameter_metadata(self, config_name: str, path: List[str], metadata: Dict[str, Any], category: str) -> bool:
+        return await self._try_operations(config_name, [{"op": "update", "path": path, "metadata": metadata}], category)
+
+    async def delete_parameter(self, config_name: str, path: List[str], category: str) -> bool:
+        if not path:
+            return False # Cannot delete the root
+        return await self._try_operations(config_name, [{"op": "delete", "path": path}], category)
     
-        parent_node = root_tree.get_child(parent_path)
-        if parent_node is None or parent_node.is_value_node:
-            # Cannot add child to a value node or non-existent parent
-            return False
+    def get_version(self, config_name: str, category: str) -> int:
+        """配置的当前版本号（进程启动后未写入过时为 0）。"""
+        return self._versions.get((category, config_name), 0)
 
-        try:
-            new_param = create_parameter(param_type, name=name, value=value)
+    def add_change_listener(self, callback: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """注册参数变化回调，参数为 {"category", "name", "version", "changes", "deleted"}。
+
+        changes 中每项为 {"path", "old", "new"}，路径与 to_dict() 的原始格式一致
+        （带元数据的参数其值位于 [..., "__value__"]），新增时 old 为 None，删除时 new 为 None。
+        回调由写入方依次等待，应尽快返回，耗时的推送交给后台任务。
+        """
+        self._change_listeners.append(callback)
+
+    async def _notify(self, category: str, name: str, changes: List[Dict[str, Any]], deleted: bool = False,
+                      version: Optional[int] = None):
+        if not changes and not deleted:
+            return
+        event = {
+            "category": category,
+            "name": name,
+            "version": self.get_version(name, category) if version is None else version,
+            "changes": changes,
+            "deleted": deleted
+        }
+        for callback in self._change_listeners:
+            try:
+                await callback(event)
+            except Exception as e:
+                print(f"Error in parameter change listener: {e}")
+
+    @staticmethod
+    def _apply_operation(root_tree: ParamNode, operation: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Callable[[], None]]:
+        """在树上原地应用单个操作，返回 (变化列表, 撤销函数)；失败时抛出 ValueError/KeyError 且树不变。
+
+        operation 字段：
+            op: "add" | "update" | "delete"
+            path: add 为父节点路径，update/delete 为目标节点路径
+            param_type, name: add 时必填
+            value: add 时的初始值（缺省为类型默认值）；update 时的新值
+            metadata: update 时的新元数据
+        """
+        op = operation.get('op')
+        path = list(operation.get('path') or [])
+
+        if op == 'add':
+            parent_node = root_tree.get_child(path)
+            if parent_node is None or parent_node.is_value_node:
+                raise ValueError(f"Parent path '{'.'.join(path)}' is not a group")
+            if not operation.get('param_type') or not operation.get('name'):
+                raise ValueError("'param_type' and 'name' are required for add")
+            value = operation.get('value')
+            new_param = create_parameter(operation['param_type'], name=operation['name'],
+                                         value=value if value is not None else "__SENTINEL__")
             parent_node.add_child(new_param)
-            return await self._save_tree(root_tree, category)
-        except (ValueError, KeyError):
-            return False
+            changes = [{"path": path + [new_param.name], "old": None, "new": new_param.to_dict()}]
+            return changes, lambda: parent_node.remove_child(new_param.name)
 
-    async def update_parameter_value(self, config_name: str, path: List[str], value: Any, category: str) -> bool:
-        root_tree = await self._load_and_parse_config(config_name, category)
-        if root_tree is None: return False
+        if op == 'update':
+            param_node = root_tree.get_child(path)
+            if param_node is None:
+                raise KeyError(f"Path '{'.'.join(path)}' not found")
+            before = param_node.to_dict()
+            old_value, old_metadata = param_node.value, param_node.metadata
+            if operation.get('value') is not None:
+                param_node.value = operation['value']
+            if operation.get('metadata') is not None:
+                param_node.metadata = operation['metadata']
 
-        param_node = root_tree.get_child(path)
-        if param_node is None:
-            return False
+            def undo():
+                param_node.value = old_value
+                param_node.metadata = old_metadata
+            return diff_changes(before, param_node.to_dict(), path), undo
 
-        param_node.value = value
-        return await self._save_tree(root_tree, category)
+        if op == 'delete':
+            if not path:
+                raise ValueError("Cannot delete the root")
+            parent_node = root_tree.get_child(path[:-1])
+            if parent_node is None or path[-1] not in parent_node.children:
+                raise KeyError(f"Path '{'.'.join(path)}' not found")
+            order = list(parent_node.children)
+            node = parent_node.children[path[-1]]
+            parent_node.remove_child(path[-1])
 
-    async def update_parameter_metadata(self, config_name: str, path: List[str], metadata: Dict[str, Any], category: str) -> bool:
-        root_tree = await self._load_and_parse_config(config_name, category)
-        if root_tree is None: return False
+            def undo():
+                parent_node.add_child(node)
+                parent_node.children = {key: parent_node.children[key] for key in order}
+            return [{"path": path, "old": node.to_dict(), "new": None}], undo
 
-        param_node = root_tree.get_child(path)
-        if param_node is None:
-            return False
+        raise ValueError(f"Unknown operation '{op}'")
 
-        param_node.metadata = metadata
-        return await self._save_tree(root_tree, category)
+    async def apply_operations(self, config_name: str, operations: List[Dict[str, Any]], category: str,
+                               expected_version: Optional[int] = None) -> int:
+        """原子地应用一组 add/update/delete 操作：只加载一次、写入一次，返回新版本号。
 
-    async def delete_parameter(self, config_name: str, path: List[str], category: str) -> bool:
-        if not path:
-            return False # Cannot delete the root
+        操作在树上原地依次执行（期间不让出事件循环，读取者看不到中间状态），
+        任一操作失败时按逆序撤销已执行的操作并抛出 ParamOperationError，配置保持不变；
+        写入失败时同样撤销全部操作并抛出 IOError。
+        配置不存在时抛出 FileNotFoundError，版本不一致时抛出 VersionConflictError。
+        """
+        lock = self._batch_locks.setdefault((category, config_name), asyncio.Lock())
+        async with lock:
+            current = self.get_version(config_name, category)
+            if expected_version is not None and expected_version != current:
+                raise VersionConflictError(expected_version, current)
 
-        root_tree = await self._load_and_parse_config(config_name, category)
-        if root_tree is None: return False
+            root_tree = await self._load_and_parse_config(config_name, category)
+            if root_tree is None:
+                raise FileNotFoundError(f"Config '{config_name}' not found in category '{category}'")
 
-        parent_path = path[:-1]
-        child_name = path[-1]
+            changes = []
+            undos = []
+            for index, operation in enumerate(operations):
+                try:
+                    op_changes, undo = self._apply_operation(root_tree, operation)
+                except (ValueError, KeyError) as e:
+                    for applied in reversed(undos):
+                        applied()
+                    raise ParamOperationError(index, str(e.args[0]) if e.args else str(e)) from e
+                changes.extend(op_changes)
+                undos.append(undo)
 
-        parent_node = root_tree.get_child(parent_path)
+            if not await self._save_tree(root_tree, category):
+                for applied in reversed(undos):
+                    applied()
+                raise IOError(f"Failed to save config '{config_name}'")
+            version = self.get_version(config_name, category)
+
+        # 释放锁后再通知，推送不阻塞同一配置的后续写入
+        await self._notify(category, config_name, changes, version=version)
+        return version
 
-        if parent_node and child_name in parent_node.children:
-            parent_node.remove_child(child_name)
-            return await self._save_tree(root_tree, category)
-        
-        return False
-    
     async def create_manual_backup(self, config_name: str, category: str) -> Optional[str]:
         adapter = self.get_adapter(category)
+        await self.flush(config_name, category)
         return await adapter.create_backup(config_name)
     
     async def get_backup_list(self, config_name: str, category: str) -> List[str]:
         adapter = self.get_adapter(category)
         return await adapter.list_backups(config_name)
     
-    async def restore_from_manual_backup(self, config_name: str, backup_filename: str, category: str) -> bool:
+    async def _restore(self, config_name: str, backup_filename: str, category: str) -> bool:
+        """从备份恢复并丢弃未落盘的修改；恢复视为一次新的写入，递增版本并通知变化。"""
         adapter = self.get_adapter(category)
-        return await adapter.restore_from_backup(config_name, backup_filename)
+        old_tree = await self._load_and_parse_config(config_name, category)
+        old_data = old_tree.to_dict() if old_tree is not None else None
+        self._discard_pending(config_name, category)
+        if not await adapter.restore_from_backup(config_name, backup_filename):
+            return False
+
+        self._bump_version(category, config_name)
+        new_tree = await self._load_and_parse_config(config_name, category)
+        if new_tree is not None:
+            await self._notify(category, config_name, diff_changes(old_data, new_tree.to_dict()))
+        return True
+
+    async def restore_from_manual_backup(self, config_name: str, backup_filename: str, category: str) -> bool:
+        return await self._restore(config_name, backup_filename, category)
 
     def _get_auto_backup_name(self, config_name: str) -> str:
         return f"{config_name}_auto_backup.json"
 
     async def start_confirmable_edit(self, config_name: str, category: str) -> bool:
         adapter = self.get_adapter(category)
+        await self.flush(config_name, category)
         backup_filename = await adapter.create_backup(config_name, is_auto=True)
         return backup_filename is not None
 
@@ -172,14 +453,9 @@ class CategoryParameterManager:
         if auto_backup_name not in backups:
             return False
 
-        return await adapter.restore_from_backup(config_name, auto_backup_name)
+        return await self._restore(config_name, auto_backup_name, category)
 
     async def end_confirmable_edit(self, config_name: str, category: str):
         adapter = self.get_adapter(category)
         auto_backup_name = self._get_auto_backup_name(config_name)
-        backup_path = os.path.join(adapter.backup_dir, auto_backup_name)
-        if os.path.exists(backup_path):
-            try:
-                os.remove(backup_path)
-            except OSError:
-                pass # Ignore errors on cleanup
+        await adapter.delete_backup(config_name, auto_backup_name)
@@ -0,0 +1,92 @@
+import asyncio
+import json
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+
+class ParamChangeNotifier:
+    """按路径前缀把参数变化推送给订阅的 WebSocket 客户端。
+
+    客户端订阅 (category, name, path 前缀)，只收到落在前缀之下的变化，
+    以及删除/替换了前缀所在子树的祖先节点变化：
+        {"type": "param_changed", "data": {"category", "name", "version", "changes", "deleted"}}
+
+    publish 只把消息放入各客户端的发送队列，由每个客户端的发送任务依次发送，
+    慢客户端不会阻塞参数写入或其他客户端；队列积压超过 max_pending 条的客户端被移除订阅。
+    """
+
+    def __init__(self, max_pending: int = 256):
+        # client -> {(category, name, path 前缀)}
+        self._subscriptions: Dict[Any, Set[Tuple[str, str, Tuple[str, ...]]]] = {}
+        self.max_pending = max_pending
+        self._queues: Dict[Any, asyncio.Queue] = {}
+        self._senders: Dict[Any, asyncio.Task] = {}
+
+    def subscribe(self, client, category: str, name: str, path: Optional[List[str]] = None):
+        self._subscriptions.setdefault(client, set()).add((category, name, tuple(path or [])))
+
+    def unsubscribe(self, client, category: str, name: str, path: Optional[List[str]] = None):
+        """取消订阅；不指定 path 时取消该配置的全部订阅。"""
+        subscriptions = self._subscriptions.get(client)
+        if not subscriptions:
+            return
+        if path is None:
+            subscriptions -= {s for s in subscriptions if s[0] == category and s[1] == name}
+        else:
+            subscriptions.discard((category, name, tuple(path)))
+        if not subscriptions:
+            del self._subscriptions[client]
+
+    def remove_client(self, client):
+        self._subscriptions.pop(client, None)
+        self._queues.pop(client, None)
+        sender = self._senders.pop(client, None)
+        if sender is not None and sender is not asyncio.current_task():
+            sender.cancel()
+
+    @staticmethod
+    def filter_changes(changes: List[Dict[str, Any]], prefixes: List[Tuple[str, ...]]) -> List[Dict[str, Any]]:
+        """保留与任一前缀相交（位于前缀之下，或是前缀的祖先）的变化"""
+        result = []
+        for change in changes:
+            path = tuple(change["path"])
+            for prefix in prefixes:
+                length = min(len(path), len(prefix))
+                if path[:length] == prefix[:length]:
+                    result.append(change)
+                    break
+        return result
+
+    async def publish(self, event: Dict[str, Any]):
+        """参数管理器的变化回调；只入队，不等待发送"""
+        for client, subscriptions in list(self._subscriptions.items()):
+            prefixes = [s[2] for s in subscriptions if s[0] == event["category"] and s[1] == event["name"]]
+            if not prefixes:
+                continue
+            changes = self.filter_changes(event["changes"], prefixes)
+            if not changes and not event.get("deleted"):
+                continue
+            self._enqueue(client, json.dumps({
+                "type": "param_changed",
+                "data": dict(event, changes=changes)
+            }))
+
+    def _enqueue(self, client, text: str):
+        queue = self._queues.get(client)
+        if queue is None:
+            queue = self._queues[client] = asyncio.Queue(maxsize=self.max_pending)
+            self._senders[client] = asyncio.create_task(self._send_loop(client, queue))
+        try:
+            queue.put_nowait(text)
+        except asyncio.QueueFull:
+            print(f"[ParamChangeNotifier] 客户端积压 {self.max_pending} 条参数变化，取消其订阅")
+            self.remove_client(client)
+
+    async def _send_loop(self, client, queue: asyncio.Queue):
+        while True:
+            text = await queue.get()
+            try:
+                await client.send_text(text)
+            except Exception as e:
+                print(f"[ParamChangeNotifier] 推送参数变化失败: {e}")
+                self.remove_client(client)
+                return
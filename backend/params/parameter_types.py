@@ -1,6 +1,6 @@
 from __future__ import annotations
 import copy
-from typing import Any, Dict, Optional, List, Union
+from typing import Any, Dict, Optional, List, Tuple, Union
 
 # 保持现有的类型定义，它们在新节点创建时依然有用
 PARAMETER_TYPE_DEFINITIONS = {
@@ -14,20 +14,49 @@ PARAMETER_TYPE_DEFINITIONS = {
 }
 
 class ParamNode:
-    """A unified node in the parameter tree. It can represent both a group and a value."""
+    """A unified node in the parameter tree. It can represent both a group and a value.
+
+    Nodes use __slots__ and only allocate `children` / `metadata` dicts when they are
+    non-empty, so leaf-heavy configs stay small. Every tree keeps a flat index from the
+    path tuple (relative to the root) to the node, shared by all of its nodes and kept
+    up to date by add_child/remove_child, so get_child and path_list are O(1) instead
+    of walking the tree.
+    """
+    __slots__ = ('name', 'parent', '_children', '_value', '_metadata', '_path', '_index')
+
     def __init__(self, name: str, parent: Optional[ParamNode] = None, value: Any = None, metadata: Optional[Dict] = None):
         self.name = name
-        self.parent = parent
-        self.children: Dict[str, ParamNode] = {}
+        self.parent = None
+        self._children: Optional[Dict[str, ParamNode]] = None
         self._value = value
-        self.metadata = metadata if metadata is not None else {}
+        self._metadata = metadata or None
+        self._path: Tuple[str, ...] = ()
+        # Standalone nodes allocate their index lazily, on the first add_child
+        self._index: Optional[Dict[Tuple[str, ...], ParamNode]] = None
+        if parent is not None:
+            parent.add_child(self)
+
+    @property
+    def children(self) -> Dict[str, ParamNode]:
+        """Child nodes by name (allocated on first access)."""
+        if self._children is None:
+            self._children = {}
+        return self._children
+
+    @children.setter
+    def children(self, new_children: Dict[str, ParamNode]):
+        """Replaces the child mapping, e.g. to reorder it. The set of children must not change."""
+        self._children = new_children or None
 
     @property
     def path_list(self) -> List[str]:
         """Returns the full path of the node from the root as a list of keys."""
-        if self.parent and self.parent.name != "__root__":
-            return self.parent.path_list + [self.name]
-        return [self.name]
+        if self.parent is None:
+            return [self.name]
+        root = self._index[()]
+        if root.name != "__root__":
+            return [root.name, *self._path]
+        return list(self._path)
 
     @property
     def is_value_node(self) -> bool:
@@ -46,27 +75,66 @@ class ParamNode:
 
     @property
     def metadata(self) -> Dict:
-        """Gets the metadata."""
+        """Gets the metadata (allocated on first access)."""
+        if self._metadata is None:
+            self._metadata = {}
         return self._metadata
 
     @metadata.setter
     def metadata(self, new_metadata: Dict):
         """Sets the metadata."""
-        self._metadata = new_metadata
+        self._metadata = new_metadata if new_metadata is not None else None
+
+    def _iter_subtree(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node._children:
+                stack.extend(node._children.values())
+
+    def _get_index(self) -> Dict[Tuple[str, ...], ParamNode]:
+        if self._index is None:
+            self._index = {(): self}
+        return self._index
 
     def add_child(self, child_node: ParamNode):
-        """Adds a child node."""
-        if child_node.name in self.children:
+        """Adds a child node (with its subtree) and registers it in the path index."""
+        children = self._children
+        if children is None:
+            children = self._children = {}
+        elif child_node.name in children:
             raise ValueError(f"Child with name '{child_node.name}' already exists in '{self.name}'")
         child_node.parent = self
-        self.children[child_node.name] = child_node
+        children[child_node.name] = child_node
+
+        index = self._get_index()
+        path = self._path + (child_node.name,)
+        if not child_node._children:
+            child_node._path = path
+            child_node._index = index
+            index[path] = child_node
+            return
+        offset = len(child_node._path)
+        for node in child_node._iter_subtree():
+            node._path = path + node._path[offset:]
+            node._index = index
+            index[node._path] = node
 
     def remove_child(self, child_name: str):
-        """Removes a child node by name."""
-        if child_name in self.children:
-            del self.children[child_name]
-        else:
+        """Removes a child node by name; the removed subtree becomes a standalone tree."""
+        if not self._children or child_name not in self._children:
             raise KeyError(f"No child with name '{child_name}' in '{self.name}'")
+        child_node = self._children.pop(child_name)
+        child_node.parent = None
+
+        index = {}
+        offset = len(child_node._path)
+        for node in child_node._iter_subtree():
+            del self._index[node._path]
+            node._path = node._path[offset:]
+            node._index = index
+            index[node._path] = node
 
     def get_child(self, path: Union[str, List[str]]) -> Optional[ParamNode]:
         """Retrieves a descendant node using a dot-separated path or a list of keys."""
@@ -77,29 +145,25 @@ class ParamNode:
 
         if not path_list:
             return self
-        
-        current_node = self
-        for key in path_list:
-            if current_node and key in current_node.children:
-                current_node = current_node.children[key]
-            else:
-                return None
-        return current_node
+        if self._index is None:
+            return None
+        return self._index.get(self._path + tuple(path_list) if self._path else tuple(path_list))
 
     def to_dict(self) -> Any:
         """Converts the node and its descendants back to a dictionary format with metadata."""
         # If it's a simple value node with no children or metadata, return the raw value.
-        if self.is_value_node and not self.children and not self.metadata:
+        if self.is_value_node and not self._children and not self._metadata:
             return self.value
 
         data = {}
         if self.is_value_node:
             data['__value__'] = self.value
-        if self.metadata:
-            data['__metadata__'] = self.metadata
+        if self._metadata:
+            data['__metadata__'] = self._metadata
         
-        for child_name, child_node in self.children.items():
-            data[child_name] = child_node.to_dict()
+        if self._children:
+            for child_name, child_node in self._children.items():
+                data[child_name] = child_node.to_dict()
             
         # If the node was just a value with metadata, the dict is already complete.
         # If it was a group, the children are added. If empty, it's an empty group.
@@ -107,7 +171,7 @@ class ParamNode:
 
     def to_clean_dict(self) -> Any:
         """Converts the node and its descendants to a clean dictionary, omitting internal fields."""
-        if self.is_value_node and not self.children:
+        if self.is_value_node and not self._children:
             return self.value
 
         data = {}
@@ -117,34 +181,44 @@ class ParamNode:
             # For now, let's assume such mixed nodes are not standard.
             pass
 
-        for child_name, child_node in self.children.items():
-            data[child_name] = child_node.to_clean_dict()
+        if self._children:
+            for child_name, child_node in self._children.items():
+                data[child_name] = child_node.to_clean_dict()
 
         return data
 
     def __repr__(self) -> str:
-        return f"ParamNode(name='{self.name}', value={self._value}, children={list(self.children.keys())})"
+        return f"ParamNode(name='{self.name}', value={self._value}, children={list(self._children or ())})"
 
 def build_param_tree(data: Any, name: str = "__root__", parent: Optional[ParamNode] = None) -> ParamNode:
-    """Recursively builds a ParamNode tree from a dictionary or a raw value."""
+    """Builds a ParamNode tree from a dictionary or a raw value, attaching it to `parent` if given.
+
+    Nodes are attached before their children are built, so each node is indexed exactly once.
+    """
+    root = _make_node(data, name)
+    if parent is not None:
+        parent.add_child(root)
+
+    stack = [(root, data)] if isinstance(data, dict) else []
+    while stack:
+        node, node_data = stack.pop()
+        for key, val in node_data.items():
+            if key.startswith('__'):
+                continue
+            # The child's value is the raw `val`, which could be a dict or a primitive.
+            child_node = _make_node(val, key)
+            node.add_child(child_node)
+            if isinstance(val, dict):
+                stack.append((child_node, val))
+            
+    return root
+
+def _make_node(data: Any, name: str) -> ParamNode:
     if not isinstance(data, dict):
         # If the data itself is a raw value, create a single value node.
-        return ParamNode(name=name, parent=parent, value=data)
-
-    value = data.get('__value__')
-    metadata = data.get('__metadata__')
+        return ParamNode(name=name, value=data)
     is_value_node = '__value__' in data
-
-    node = ParamNode(name=name, parent=parent, value=value if is_value_node else None, metadata=metadata)
-    
-    for key, val in data.items():
-        if key.startswith('__'):
-            continue
-        # The child's value is the raw `val`, which could be a dict or a primitive.
-        child_node = build_param_tree(val, name=key, parent=node)
-        node.add_child(child_node)
-            
-    return node
+    return ParamNode(name=name, value=data.get('__value__') if is_value_node else None, metadata=data.get('__metadata__'))
 
 def create_parameter(param_type: str, name: str, value: Any = "__SENTINEL__", metadata_override: Optional[Dict] = None) -> ParamNode:
     """Creates a new ParamNode with default metadata for a given type."""
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, List
 import asyncio
+import time
 from dataclasses import dataclass
 
 @dataclass
@@ -17,9 +18,20 @@ class PluginConfig:
 class BasePlugin(ABC):
     """插件基类"""
     
+    # CPU 密集型插件在独立进程中执行，不阻塞事件循环；
+    # 此类插件的状态只存在于工作进程内（同一话题固定在同一进程），配置需可 pickle
+    cpu_bound: bool = False
+    # 在工作进程中执行时，较大的数值列表经共享内存传递；默认还原为列表，
+    # 声明 accepts_arrays 的插件直接收到 numpy 数组（须同时兼容主进程中收到的列表）
+    accepts_arrays: bool = False
+    # 含 CPU 密集型插件的话题积压时默认阻塞上游等待（背压，不丢消息）；
+    # 只关心最新数据的插件（如激光、点云）可声明 drop_when_busy，积压时丢弃最旧的消息
+    drop_when_busy: bool = False
+    
     def __init__(self, config: PluginConfig = None):
         self.config = config or PluginConfig()
         self.name = self.__class__.__name__
+        self._last_full_sent: Dict[str, float] = {}
     
     @abstractmethod
     def get_supported_patterns(self) -> List[str]:
@@ -30,6 +42,8 @@ class BasePlugin(ABC):
         - message_type#*: 匹配所有该类型消息
         - *#topic_name: 匹配特定话题的所有消息类型
         - *#*: 匹配所有消息
+        - glob: "sensor_msgs/*#/camera/*/image_raw"，话题中 "*" 只匹配一段，"**" 匹配多段
+        - 正则: 以 "re:" 开头，如 "*#re:/robot[0-9]+/odom"
         """
         pass
     
@@ -40,10 +54,11 @@ class BasePlugin(ABC):
         Args:
             topic: 话题名称
             message_type: 消息类型
-            data: 消息数据
+            data: 消息数据（plugins.message.Message，只读，不得原地修改）
             
         Returns:
-            处理后的数据，如果返回None则表示消息被过滤掉
+            处理后的数据：通过 data.with_fields / with_path 返回带补丁的新 Message，
+            或返回新的 dict；如果返回None则表示消息被过滤掉
         """
         pass
     
@@ -55,6 +70,39 @@ class BasePlugin(ABC):
         """检查插件是否启用"""
         return self.config.enabled
     
+    def is_cpu_bound(self) -> bool:
+        """是否在进程池中执行，可通过 settings["cpu_bound"] 覆盖"""
+        return bool(self.config.settings.get("cpu_bound", self.cpu_bound))
+    
+    def drops_when_busy(self) -> bool:
+        """话题积压时是否丢弃最旧的消息，可通过 settings["drop_when_busy"] 覆盖"""
+        return bool(self.config.settings.get("drop_when_busy", self.drop_when_busy))
+    
+    def follows_fixed_frame(self, frame_id: Any) -> bool:
+        """frame_id 中的几何数据发送时是否会被变换到客户端选择的固定坐标系
+
+        此时内容不变的消息在固定坐标系中的位姿仍会随 TF 变化，去重/增量类插件不能过滤。
+        settings["fixed_frames"] 为客户端当前选择的固定坐标系，由数据源管理器维护。
+        """
+        frame_id = str(frame_id or '').lstrip('/')
+        return bool(frame_id) and any(frame != frame_id for frame in self.config.settings.get('fixed_frames') or ())
+    
+    def resync_due(self, topic: str, now: float = None) -> bool:
+        """增量推送类插件：内容未变化时是否到了全量重发的时间
+
+        间隔由 settings["full_resync_interval"]（秒）设置，默认 0 表示关闭：
+        全量重发对大地图等数据代价很高，新客户端应通过插件的快照接口补齐。
+        """
+        interval = float(self.config.settings.get('full_resync_interval', 0))
+        if interval <= 0:
+            return False
+        now = time.time() if now is None else now
+        return now - self._last_full_sent.get(topic, 0.0) >= interval
+
+    def mark_full_sent(self, topic: str, now: float = None):
+        """记录话题最近一次发送全量的时间"""
+        self._last_full_sent[topic] = time.time() if now is None else now
+
     async def initialize(self):
         """插件初始化（可选重写）"""
         pass
@@ -63,15 +111,15 @@ class BasePlugin(ABC):
         """插件清理（可选重写）"""
         pass
 
-# 插件注册装饰器
-_registered_plugins = []
+# 插件注册装饰器；按 模块.类名 索引，模块热重载后新类替换旧类
+_registered_plugins = {}
 
 def register_plugin(plugin_class):
     """插件注册装饰器"""
     if issubclass(plugin_class, BasePlugin):
-        _registered_plugins.append(plugin_class)
+        _registered_plugins[f"{plugin_class.__module__}.{plugin_class.__qualname__}"] = plugin_class
     return plugin_class
 
 def get_registered_plugins():
     """获取所有注册的插件类"""
-    return _registered_plugins.copy()
\ No newline at end of file
+    return list(_registered_plugins.values())
@@ -0,0 +1,83 @@
+import base64
+from typing import Dict, Any, Optional
+import numpy as np
+
+# sensor_msgs/PointField 数据类型常量
+POINT_FIELD_FLOAT32 = 7
+
+
+def pack_point_cloud(points: np.ndarray, header: Optional[Dict[str, Any]] = None,
+                     intensities: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """将 Nx3 的点数组打包为紧凑的 PointCloud2 结构
+
+    输出与 ROS PointCloud2 字段一致（fields / point_step / data 为 base64），
+    前端 PointCloudPlugin 可直接按字节解码，无需逐点计算。
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    count = points.shape[0]
+
+    names = ['x', 'y', 'z']
+    if intensities is not None:
+        names.append('intensity')
+    fields = [
+        {"name": name, "offset": i * 4, "datatype": POINT_FIELD_FLOAT32, "count": 1}
+        for i, name in enumerate(names)
+    ]
+    point_step = 4 * len(names)
+
+    # 预分配交错缓冲区，一次性写入各列
+    buffer = np.empty((count, len(names)), dtype='<f4')
+    buffer[:, :3] = points
+    if intensities is not None:
+        buffer[:, 3] = np.asarray(intensities, dtype=np.float32).reshape(-1)
+
+    return {
+        "header": header or {},
+        "height": 1,
+        "width": count,
+        "fields": fields,
+        "is_bigendian": False,
+        "point_step": point_step,
+        "row_step": point_step * count,
+        "data": base64.b64encode(buffer.tobytes()).decode('ascii'),
+        "is_dense": True
+    }
+
+
+
+def transform_point_cloud(cloud: Dict[str, Any], matrix: np.ndarray) -> Optional[Dict[str, Any]]:
+    """对 PointCloud2 的 x/y/z（float32）字段整体应用 4x4 变换，其余字段原样保留
+
+    不支持的布局（非 float32 坐标、行间有填充）返回 None。
+    """
+    fields = {f.get('name'): f for f in cloud.get('fields') or []}
+    if not all(name in fields and fields[name].get('datatype') == POINT_FIELD_FLOAT32 for name in ('x', 'y', 'z')):
+        return None
+    point_step = int(cloud.get('point_step') or 0)
+    count = int(cloud.get('width') or 0) * int(cloud.get('height') or 1)
+    if point_step <= 0 or int(cloud.get('row_step') or 0) != point_step * int(cloud.get('width') or 0):
+        return None
+
+    raw = cloud.get('data')
+    raw = base64.b64decode(raw) if isinstance(raw, str) else bytes(raw or b'')
+    if len(raw) < count * point_step:
+        return None
+
+    endian = '>' if cloud.get('is_bigendian') else '<'
+    dtype = np.dtype({
+        'names': ['x', 'y', 'z'],
+        'formats': [endian + 'f4'] * 3,
+        'offsets': [int(fields[name].get('offset', 0)) for name in ('x', 'y', 'z')],
+        'itemsize': point_step
+    })
+    buffer = bytearray(raw[:count * point_step])
+    points = np.frombuffer(buffer, dtype=dtype, count=count)
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    xyz = np.column_stack((points['x'], points['y'], points['z']))
+    transformed = xyz @ matrix[:3, :3].T + matrix[:3, 3]
+    points['x'], points['y'], points['z'] = transformed[:, 0], transformed[:, 1], transformed[:, 2]
+
+    result = dict(cloud)
+    result['data'] = base64.b64encode(buffer).decode('ascii')
+    return result
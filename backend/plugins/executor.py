@@ -0,0 +1,183 @@
+"""CPU 密集型插件的进程池执行器
+
+每个工作进程是一个单进程池，话题按哈希固定分配到某个进程，
+因此同一话题的插件状态（如内容哈希、缓存）始终位于同一进程中。
+消息中较大的数值列表通过共享内存传递，避免逐元素 pickle。
+"""
+import asyncio
+import importlib
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from .message import Message
+
+# 数值列表元素数达到该阈值时改用共享内存传递
+SHARED_ARRAY_THRESHOLD = 8192
+
+
+class SharedArray:
+    """共享内存中数组的句柄（可 pickle）"""
+
+    __slots__ = ('name', 'shape', 'dtype')
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getstate__(self):
+        return self.name, self.shape, self.dtype
+
+    def __setstate__(self, state):
+        self.name, self.shape, self.dtype = state
+
+
+def _is_numeric_list(value: Any) -> bool:
+    return (isinstance(value, list) and len(value) >= SHARED_ARRAY_THRESHOLD
+            and isinstance(value[0], (int, float)) and not isinstance(value[0], bool))
+
+
+def share_arrays(data: Any, blocks: List[shared_memory.SharedMemory]) -> Any:
+    """将较大的数值列表复制到共享内存并替换为句柄；只遍历字典与字典列表"""
+    if isinstance(data, dict):
+        result = None
+        for key, value in data.items():
+            if _is_numeric_list(value):
+                array = np.asarray(value)
+                if array.dtype.kind not in 'iuf':
+                    continue
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                blocks.append(block)
+                shared = SharedArray(block.name, array.shape, array.dtype.str)
+            elif isinstance(value, (dict, list)):
+                shared = share_arrays(value, blocks)
+            else:
+                continue
+            if shared is not value:
+                if result is None:
+                    result = dict(data)
+                result[key] = shared
+        return data if result is None else result
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        shared = [share_arrays(item, blocks) for item in data]
+        return data if all(a is b for a, b in zip(shared, data)) else shared
+    return data
+
+
+def release_blocks(blocks: List[shared_memory.SharedMemory]):
+    for block in blocks:
+        try:
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+    blocks.clear()
+
+
+def _attach_arrays(data: Any, as_arrays: bool = False) -> Any:
+    """工作进程内：将句柄还原为数据（复制后立即断开共享内存）
+
+    默认还原为列表，插件收到的类型与在主进程中执行时一致；
+    as_arrays 为 True（插件声明 accepts_arrays）时还原为 numpy 数组。
+    共享内存由主进程 unlink，工作进程只 close。
+    """
+    if isinstance(data, SharedArray):
+        block = shared_memory.SharedMemory(name=data.name)
+        try:
+            array = np.ndarray(data.shape, dtype=np.dtype(data.dtype), buffer=block.buf)
+            return array.copy() if as_arrays else array.tolist()
+        finally:
+            block.close()
+    if isinstance(data, dict):
+        return {k: _attach_arrays(v, as_arrays) for k, v in data.items()}
+    if isinstance(data, list) and data and isinstance(data[0], (dict, SharedArray)):
+        return [_attach_arrays(v, as_arrays) for v in data]
+    return data
+
+
+def _to_builtin(data: Any) -> Any:
+    """工作进程内：将结果中的 numpy 数组转回列表，保证可 JSON 序列化"""
+    if isinstance(data, np.ndarray):
+        return data.tolist()
+    if isinstance(data, dict):
+        return {k: _to_builtin(v) for k, v in data.items()}
+    if isinstance(data, list) and data and isinstance(data[0], (dict, np.ndarray)):
+        return [_to_builtin(v) for v in data]
+    return data
+
+
+# --- 工作进程 ---
+
+_worker_plugins: Dict[Tuple[str, str, str], Any] = {}
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _run_plugin(module_name: str, class_name: str, plugin_name: str, config: Any,
+                topic: str, message_type: str, data: Any) -> Any:
+    global _worker_loop
+    key = (module_name, class_name, plugin_name)
+    plugin = _worker_plugins.get(key)
+    if plugin is None:
+        plugin_class = getattr(importlib.import_module(module_name), class_name)
+        plugin = plugin_class(config)
+        plugin.name = plugin_name
+        _worker_plugins[key] = plugin
+    plugin.config = config
+    if _worker_loop is None:
+        _worker_loop = asyncio.new_event_loop()
+    message = Message(_attach_arrays(data, getattr(plugin, 'accepts_arrays', False)))
+    result = _worker_loop.run_until_complete(plugin.process_message(topic, message_type, message))
+    if isinstance(result, Message):
+        result = result.materialize()
+    return _to_builtin(result)
+
+
+class PluginExecutor:
+    """按话题亲和的插件进程池"""
+
+    def __init__(self, workers: int = 2):
+        self.workers = max(1, workers)
+        self._pools: List[Optional[ProcessPoolExecutor]] = [None] * self.workers
+        self._context = multiprocessing.get_context('spawn')
+
+    def _pool_index(self, topic: str) -> int:
+        return zlib.crc32(topic.encode('utf-8')) % self.workers
+
+    def _pool_for(self, topic: str) -> ProcessPoolExecutor:
+        index = self._pool_index(topic)
+        pool = self._pools[index]
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=1, mp_context=self._context)
+            self._pools[index] = pool
+        return pool
+
+    async def run(self, plugin: Any, topic: str, message_type: str, data: Any) -> Any:
+        """在话题对应的工作进程中运行插件"""
+        blocks: List[shared_memory.SharedMemory] = []
+        try:
+            payload = share_arrays(data, blocks)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pool_for(topic), _run_plugin,
+                type(plugin).__module__, type(plugin).__qualname__, plugin.name, plugin.config,
+                topic, message_type, payload)
+        except BrokenProcessPool:
+            # 工作进程异常退出，下次调用时重建
+            index = self._pool_index(topic)
+            if self._pools[index] is not None:
+                self._pools[index].shutdown(wait=False, cancel_futures=True)
+                self._pools[index] = None
+            raise
+        finally:
+            release_blocks(blocks)
+
+    def shutdown(self):
+        for i, pool in enumerate(self._pools):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pools[i] = None
@@ -0,0 +1,110 @@
+from typing import Dict, Any, Optional, List, Tuple, Callable
+from collections import OrderedDict
+import numpy as np
+from . import BasePlugin, register_plugin, PluginConfig
+from .cloud_codec import pack_point_cloud
+from .message import Message
+
+@register_plugin
+class LaserScanPlugin(BasePlugin):
+    """LaserScan 转点云插件
+
+    settings:
+        target_frame: 可选，输出点云的目标坐标系（使用服务端 TF 缓冲，按扫描时间戳查询）
+        max_cached_tables: sin/cos 表缓存上限，默认 16
+    """
+
+    def __init__(self, config: PluginConfig = None):
+        super().__init__(config)
+        # 按 (angle_min, angle_increment, count) 缓存预计算的 cos/sin 表
+        self._trig_tables: "OrderedDict[Tuple[float, float, int], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self.max_cached_tables = int(self.config.settings.get('max_cached_tables', 16))
+        # 坐标变换查询: (target_frame, source_frame, stamp) -> 4x4 齐次矩阵或 None，由插件管理器注入
+        self.transform_lookup: Optional[Callable[[str, str, Any], Optional[np.ndarray]]] = None
+
+    def get_supported_patterns(self) -> List[str]:
+        return ["sensor_msgs/LaserScan#*"]
+
+    def _get_trig_table(self, angle_min: float, angle_increment: float, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """获取（或生成）指定扫描参数的 cos/sin 表"""
+        key = (float(angle_min), float(angle_increment), int(count))
+        table = self._trig_tables.get(key)
+        if table is not None:
+            self._trig_tables.move_to_end(key)
+            return table
+
+        angles = key[0] + np.arange(count, dtype=np.float64) * key[1]
+        table = (np.cos(angles).astype(np.float32), np.sin(angles).astype(np.float32))
+        self._trig_tables[key] = table
+        while len(self._trig_tables) > self.max_cached_tables:
+            self._trig_tables.popitem(last=False)
+        return table
+
+    def scan_to_points(self, scan: Dict[str, Any]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """将 LaserScan 消息转换为 Nx3 点数组，剔除 NaN 与超量程的值"""
+        # rosbridge 会把 NaN/Inf 编码为 null，转换为 float 后统一变成 NaN
+        ranges = np.asarray(scan.get('ranges') or [], dtype=np.float32)
+        count = ranges.shape[0]
+        if count == 0:
+            return np.empty((0, 3), dtype=np.float32), None
+
+        cos_table, sin_table = self._get_trig_table(
+            scan.get('angle_min', 0.0), scan.get('angle_increment', 0.0), count
+        )
+
+        range_min = scan.get('range_min')
+        range_max = scan.get('range_max')
+        valid = np.isfinite(ranges)
+        if range_min is not None:
+            valid &= ranges >= range_min
+        if range_max is not None:
+            valid &= ranges <= range_max
+
+        r = ranges[valid]
+        points = np.zeros((r.shape[0], 3), dtype=np.float32)
+        points[:, 0] = r * cos_table[valid]
+        points[:, 1] = r * sin_table[valid]
+
+        intensities = scan.get('intensities')
+        if intensities is not None and len(intensities) == count:
+            intensities = np.asarray(intensities, dtype=np.float32)[valid]
+        else:
+            intensities = None
+        return points, intensities
+
+    def _apply_target_frame(self, points: np.ndarray, source_frame: str,
+                            stamp: Any = None) -> Tuple[np.ndarray, str]:
+        """如配置了目标坐标系且能查询到变换，则将点变换到目标坐标系"""
+        target_frame = self.config.settings.get('target_frame')
+        if not target_frame or target_frame == source_frame or self.transform_lookup is None:
+            return points, source_frame
+
+        matrix = self.transform_lookup(target_frame, source_frame, stamp)
+        if matrix is None:
+            return points, source_frame
+
+        matrix = np.asarray(matrix, dtype=np.float32)
+        transformed = points @ matrix[:3, :3].T + matrix[:3, 3]
+        return transformed.astype(np.float32, copy=False), target_frame
+
+    async def process_message(self, topic: str, message_type: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """将 LaserScan 转换为紧凑点云，前端按 PointCloud2 渲染"""
+        try:
+            scan = data.get('data', {})
+            if 'ranges' not in scan:
+                return data
+
+            points, intensities = self.scan_to_points(scan)
+            header = dict(scan.get('header', {}))
+            points, frame_id = self._apply_target_frame(points, header.get('frame_id', ''), header.get('stamp'))
+            header['frame_id'] = frame_id
+
+            return Message.wrap(data).with_fields(
+                data=pack_point_cloud(points, header=header, intensities=intensities),
+                message_type='sensor_msgs/PointCloud2',
+                source_message_type=message_type
+            )
+
+        except Exception as e:
+            print(f"Error processing LaserScan message: {e}")
+            return data
@@ -0,0 +1,98 @@
+"""插件清单
+
+启动时只读取清单（manifest.json），不导入插件模块；插件在首次遇到匹配的话题/类型时才导入。
+清单未列出的 *plugin.py 文件通过静态解析（ast）发现：取被 @register_plugin 装饰的类，
+及其 get_supported_patterns 返回的字面量列表；无法静态求值时视为匹配所有消息（*#*）。
+清单中的模式只用于决定何时加载，加载后以插件实例实际返回的模式为准。
+"""
+import ast
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+MANIFEST_FILE = 'manifest.json'
+
+
+@dataclass
+class PluginSpec:
+    """未导入插件的描述"""
+    module: str  # 完整模块路径，如 plugins.tf_plugin
+    class_name: str
+    patterns: List[str] = field(default_factory=list)
+    path: str = ''  # 模块源文件，用于热重载时判断是否修改
+
+    @property
+    def key(self) -> str:
+        return f"{self.module}.{self.class_name}"
+
+
+def _module_name(plugins_dir: str, file_path: str, package: str) -> str:
+    rel_path = os.path.relpath(file_path, plugins_dir)
+    return f"{package}.{os.path.splitext(rel_path)[0].replace(os.sep, '.')}"
+
+
+def scan_plugin_file(file_path: str, module: str) -> List[PluginSpec]:
+    """静态解析插件文件，不执行其代码"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=file_path)
+    except (OSError, SyntaxError) as e:
+        print(f"Failed to scan plugin file {file_path}: {e}")
+        return []
+
+    specs = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        decorators = [d.id if isinstance(d, ast.Name) else getattr(d, 'attr', None) for d in node.decorator_list]
+        if 'register_plugin' not in decorators:
+            continue
+        patterns = ['*#*']
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == 'get_supported_patterns':
+                returns = [n for n in ast.walk(item) if isinstance(n, ast.Return) and n.value is not None]
+                try:
+                    if len(returns) == 1:
+                        patterns = [str(p) for p in ast.literal_eval(returns[0].value)]
+                except (ValueError, TypeError):
+                    pass
+        specs.append(PluginSpec(module, node.name, patterns, file_path))
+    return specs
+
+
+def load_manifest(plugins_dir: str, package: str = 'plugins') -> List[PluginSpec]:
+    """读取插件清单，并补充清单未列出的插件文件"""
+    specs: Dict[str, PluginSpec] = {}
+    listed_files = set()
+
+    manifest_path = os.path.join(plugins_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('plugins', [])
+            for entry in entries:
+                file_path = os.path.join(plugins_dir, *entry['module'].split('.')) + '.py'
+                spec = PluginSpec(
+                    module=f"{package}.{entry['module']}",
+                    class_name=entry['class'],
+                    patterns=list(entry.get('patterns') or ['*#*']),
+                    path=file_path
+                )
+                specs[spec.key] = spec
+                listed_files.add(os.path.normpath(file_path))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Failed to read plugin manifest {manifest_path}: {e}")
+
+    for root, dirs, files in os.walk(plugins_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('__')]
+        for file in sorted(files):
+            if not file.endswith('plugin.py') or file.startswith('__'):
+                continue
+            file_path = os.path.join(root, file)
+            if os.path.normpath(file_path) in listed_files:
+                continue
+            for spec in scan_plugin_file(file_path, _module_name(plugins_dir, file_path, package)):
+                specs.setdefault(spec.key, spec)
+
+    return list(specs.values())
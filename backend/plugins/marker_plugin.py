@@ -0,0 +1,214 @@
+import time
+from typing import Dict, Any, Optional, List, Tuple
+from . import BasePlugin, register_plugin, PluginConfig
+from .message import Message
+
+# visualization_msgs/Marker action 常量
+MARKER_ADD = 0
+MARKER_DELETE = 2
+MARKER_DELETEALL = 3
+
+MarkerKey = Tuple[str, int]
+
+
+class _MarkerState:
+    """单个话题的 Marker 状态：按 (ns, id) 保存最新 Marker 及其过期时间"""
+
+    def __init__(self):
+        self.markers: Dict[MarkerKey, Dict[str, Any]] = {}
+        self.comparables: Dict[MarkerKey, Dict[str, Any]] = {}
+        self.expires_at: Dict[MarkerKey, float] = {}
+        self.version = 0
+
+    def remove(self, key: MarkerKey):
+        self.markers.pop(key, None)
+        self.comparables.pop(key, None)
+        self.expires_at.pop(key, None)
+
+
+@register_plugin
+class MarkerArrayPlugin(BasePlugin):
+    """MarkerArray 增量推送插件
+
+    按 (ns, id) 维护 Marker 状态，处理 ADD/DELETE/DELETEALL 与 lifetime，
+    每次只推送新增、修改与删除的 Marker，内容未变化的消息直接过滤。
+    发布者停止发布后，过期的 Marker 由 expire_all 移除（由服务端定期调用并推送删除）。
+
+    settings:
+        full_resync_interval: 全量重发的间隔（秒），默认 0 表示关闭（见 BasePlugin.resync_due）
+        fixed_frames: 客户端选择的固定坐标系，由数据源管理器维护（见 BasePlugin.follows_fixed_frame）
+    """
+
+    def __init__(self, config: PluginConfig = None):
+        super().__init__(config)
+        self.states: Dict[str, _MarkerState] = {}
+
+    def get_supported_patterns(self) -> List[str]:
+        return [
+            "visualization_msgs/MarkerArray#*",
+            "visualization_msgs/Marker#*"
+        ]
+
+    @staticmethod
+    def _marker_key(marker: Dict[str, Any]) -> MarkerKey:
+        return (str(marker.get('ns', '')), int(marker.get('id', 0)))
+
+    @staticmethod
+    def _comparable(marker: Dict[str, Any]) -> Dict[str, Any]:
+        """用于判断 Marker 是否变化的视图：忽略每次都会变化的时间戳"""
+        comparable = {k: v for k, v in marker.items() if k != 'header'}
+        header = marker.get('header')
+        if isinstance(header, dict):
+            comparable['frame_id'] = header.get('frame_id')
+        return comparable
+
+    @staticmethod
+    def _lifetime_seconds(marker: Dict[str, Any]) -> float:
+        lifetime = marker.get('lifetime')
+        if not isinstance(lifetime, dict):
+            return 0.0
+        sec = lifetime.get('sec', lifetime.get('secs', 0)) or 0
+        nsec = lifetime.get('nanosec', lifetime.get('nsec', lifetime.get('nsecs', 0))) or 0
+        return float(sec) + float(nsec) * 1e-9
+
+    @staticmethod
+    def _key_dict(key: MarkerKey) -> Dict[str, Any]:
+        return {"ns": key[0], "id": key[1]}
+
+    def _expire(self, state: _MarkerState, now: float, removed: Dict[MarkerKey, None]):
+        expired = [key for key, deadline in state.expires_at.items() if deadline <= now]
+        for key in expired:
+            state.remove(key)
+            removed[key] = None
+
+    def apply_markers(self, topic: str, markers: List[Dict[str, Any]], now: float = None) -> Dict[str, Any]:
+        """将一批 Marker 应用到话题状态，返回差异"""
+        now = time.time() if now is None else now
+        state = self.states.setdefault(topic, _MarkerState())
+        added: Dict[MarkerKey, Dict[str, Any]] = {}
+        modified: Dict[MarkerKey, Dict[str, Any]] = {}
+        removed: Dict[MarkerKey, None] = {}
+
+        self._expire(state, now, removed)
+
+        for marker in markers:
+            action = int(marker.get('action', MARKER_ADD))
+            key = self._marker_key(marker)
+
+            if action == MARKER_DELETEALL:
+                ns = str(marker.get('ns', ''))
+                targets = [k for k in state.markers if not ns or k[0] == ns]
+                for k in targets:
+                    state.remove(k)
+                    added.pop(k, None)
+                    modified.pop(k, None)
+                    removed[k] = None
+                continue
+
+            if action == MARKER_DELETE:
+                if key in state.markers:
+                    state.remove(key)
+                    removed[key] = None
+                added.pop(key, None)
+                modified.pop(key, None)
+                continue
+
+            comparable = self._comparable(marker)
+            lifetime = self._lifetime_seconds(marker)
+            if lifetime > 0:
+                state.expires_at[key] = now + lifetime
+            else:
+                state.expires_at.pop(key, None)
+
+            previous = state.comparables.get(key)
+            state.markers[key] = marker
+            state.comparables[key] = comparable
+            if previous is None:
+                if key in removed:
+                    # 同一批次内先删除后重新添加，视为修改
+                    removed.pop(key)
+                    modified[key] = marker
+                else:
+                    added[key] = marker
+            elif previous != comparable or self.follows_fixed_frame(comparable.get('frame_id')):
+                # 需在服务端变换到固定坐标系的 Marker 即使未变化也重发，位姿随当前 TF 更新
+                if key in added:
+                    added[key] = marker
+                else:
+                    modified[key] = marker
+
+        if added or modified or removed:
+            state.version += 1
+
+        return {
+            "added": list(added.values()),
+            "modified": list(modified.values()),
+            "removed": [self._key_dict(k) for k in removed],
+        }
+
+    def expire_all(self, now: float = None) -> Dict[str, Dict[str, Any]]:
+        """移除所有话题中已过期的 Marker，返回 {话题: 只含删除项的增量消息}"""
+        now = time.time() if now is None else now
+        payloads = {}
+        for topic, state in self.states.items():
+            removed: Dict[MarkerKey, None] = {}
+            self._expire(state, now, removed)
+            if not removed:
+                continue
+            state.version += 1
+            payloads[topic] = {
+                "type": "MarkerArrayDelta",
+                "version": state.version,
+                "full": False,
+                "added": [],
+                "modified": [],
+                "removed": [self._key_dict(k) for k in removed],
+            }
+        return payloads
+
+    def get_snapshot(self, topic: str) -> Optional[Dict[str, Any]]:
+        """返回话题当前所有有效 Marker 的全量快照"""
+        state = self.states.get(topic)
+        if state is None:
+            return None
+        self._expire(state, time.time(), {})
+        return {
+            "type": "MarkerArrayDelta",
+            "version": state.version,
+            "full": True,
+            "added": list(state.markers.values()),
+            "modified": [],
+            "removed": [],
+        }
+
+    async def process_message(self, topic: str, message_type: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """将 MarkerArray 转换为增量消息"""
+        try:
+            msg = data.get('data', {})
+            markers = msg.get('markers')
+            if markers is None:
+                # 单个 Marker 消息
+                if 'id' not in msg and 'action' not in msg:
+                    return data
+                markers = [msg]
+
+            diff = self.apply_markers(topic, markers)
+
+            if self.resync_due(topic):
+                self.mark_full_sent(topic)
+                payload = self.get_snapshot(topic)
+            elif diff["added"] or diff["modified"] or diff["removed"]:
+                payload = {
+                    "type": "MarkerArrayDelta",
+                    "version": self.states[topic].version,
+                    "full": False,
+                    **diff
+                }
+            else:
+                return None
+
+            return Message.wrap(data).with_fields(data=payload)
+
+        except Exception as e:
+            print(f"Error processing MarkerArray message: {e}")
+            return data
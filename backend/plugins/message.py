@@ -0,0 +1,134 @@
+"""插件管线的写时复制消息
+
+适配器产生的消息字典在管线中视为不可变：插件不直接修改它，而是通过
+with_fields / with_path / without 返回带补丁层的新 Message。补丁按路径记录，
+大块载荷（点云、地图、路径点）始终共享引用，不做深拷贝。
+管线末尾调用 materialize() 一次，仅对补丁路径上的字典做浅拷贝，得到可编码的 dict。
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+Path = Union[str, Tuple[Any, ...]]
+
+_DELETED = object()
+
+
+def _as_path(path: Path) -> Tuple[Any, ...]:
+    if isinstance(path, tuple):
+        return path
+    return tuple(str(path).split('.'))
+
+
+class Message(Mapping):
+    """只读消息视图：基础字典 + 按路径的补丁
+
+    读取接口与 dict 一致（get / [] / in / items），嵌套值与基础字典共享，须视为只读。
+    """
+
+    __slots__ = ('_base', '_patches', '_top', '_materialized')
+
+    def __init__(self, base: Dict[str, Any], patches: Optional[Dict[Tuple[Any, ...], Any]] = None):
+        self._base = base
+        self._patches = patches or {}
+        self._top = frozenset(path[0] for path in self._patches)
+        self._materialized = None
+
+    @classmethod
+    def wrap(cls, data: Any) -> "Message":
+        """将 dict 包装为 Message；已是 Message 时原样返回"""
+        return data if isinstance(data, Message) else cls(data)
+
+    # --- 读取 ---
+
+    def __getitem__(self, key):
+        if key in self._top:
+            return self.materialize()[key]
+        return self._base[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.materialize() if self._patches else self._base)
+
+    def __len__(self) -> int:
+        return len(self.materialize() if self._patches else self._base)
+
+    def __contains__(self, key) -> bool:
+        if key in self._top:
+            return key in self.materialize()
+        return key in self._base
+
+    def get_in(self, path: Path, default: Any = None) -> Any:
+        """按路径读取，如 get_in('data.header.frame_id')"""
+        value = self
+        for key in _as_path(path):
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                return default
+        return value
+
+    @property
+    def patched(self) -> bool:
+        return bool(self._patches)
+
+    # --- 补丁（均返回新 Message，原消息不变） ---
+
+    def _with_patch(self, path: Tuple[Any, ...], value: Any) -> "Message":
+        patches = dict(self._patches)
+        # 覆盖某路径时，其下已有的更深补丁失效
+        for existing in [p for p in patches if len(p) > len(path) and p[:len(path)] == path]:
+            del patches[existing]
+        patches.pop(path, None)
+        patches[path] = value
+        return Message(self._base, patches)
+
+    def with_path(self, path: Path, value: Any) -> "Message":
+        """设置嵌套字段，如 with_path('metadata.processed_at', 1)"""
+        return self._with_patch(_as_path(path), value)
+
+    def with_fields(self, **fields: Any) -> "Message":
+        """设置（或替换）顶层字段"""
+        message = self
+        for key, value in fields.items():
+            message = message._with_patch((key,), value)
+        return message
+
+    def without(self, path: Path) -> "Message":
+        """删除字段"""
+        return self._with_patch(_as_path(path), _DELETED)
+
+    # --- 物化 ---
+
+    def materialize(self) -> Dict[str, Any]:
+        """应用补丁得到普通 dict；只复制补丁路径上的字典，结果会被缓存"""
+        if not self._patches:
+            return self._base
+        if self._materialized is not None:
+            return self._materialized
+
+        root = dict(self._base)
+        copied = {id(root)}
+        for path, value in self._patches.items():
+            node = root
+            for key in path[:-1]:
+                child = node.get(key)
+                if not isinstance(child, dict):
+                    child = {}
+                    copied.add(id(child))
+                elif id(child) not in copied:
+                    child = dict(child)
+                    copied.add(id(child))
+                node[key] = child
+                node = child
+            if value is _DELETED:
+                node.pop(path[-1], None)
+            else:
+                node[path[-1]] = value
+        self._materialized = root
+        return root
+
+    def copy(self) -> Dict[str, Any]:
+        """兼容旧插件：返回物化结果的浅拷贝"""
+        return dict(self.materialize())
+
+    def __repr__(self) -> str:
+        return f"Message({self.materialize()!r})"
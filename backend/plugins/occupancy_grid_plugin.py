@@ -0,0 +1,239 @@
+import base64
+import hashlib
+import zlib
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np
+from . import BasePlugin, register_plugin, PluginConfig
+from .message import Message
+
+
+class _TiledGrid:
+    """单个地图话题的分块状态：栅格数据、每块哈希与最后修改版本"""
+
+    def __init__(self, info: Dict[str, Any], tile_size: int):
+        self.info = info
+        self.width = int(info.get('width', 0))
+        self.height = int(info.get('height', 0))
+        self.tile_size = tile_size
+        self.grid = np.full((self.height, self.width), -1, dtype=np.int8)
+        self.tiles_x = (self.width + tile_size - 1) // tile_size
+        self.tiles_y = (self.height + tile_size - 1) // tile_size
+        self.hashes = np.zeros((self.tiles_y, self.tiles_x), dtype=np.uint64)
+        self.versions = np.zeros((self.tiles_y, self.tiles_x), dtype=np.int64)
+        self.version = 0
+        # 地图几何变化（尺寸/分辨率/原点）时重置，早于此版本的客户端需要全量同步
+        self.reset_version = 0
+        self.header: Dict[str, Any] = {}
+
+    def matches(self, info: Dict[str, Any]) -> bool:
+        return (
+            int(info.get('width', 0)) == self.width and
+            int(info.get('height', 0)) == self.height and
+            info.get('resolution') == self.info.get('resolution') and
+            info.get('origin') == self.info.get('origin')
+        )
+
+    def tile_bounds(self, tx: int, ty: int) -> Tuple[int, int, int, int]:
+        x0 = tx * self.tile_size
+        y0 = ty * self.tile_size
+        return x0, y0, min(x0 + self.tile_size, self.width), min(y0 + self.tile_size, self.height)
+
+    def _hash_tile(self, tx: int, ty: int) -> int:
+        x0, y0, x1, y1 = self.tile_bounds(tx, ty)
+        digest = hashlib.blake2b(self.grid[y0:y1, x0:x1].tobytes(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def rehash(self, tx0: int, ty0: int, tx1: int, ty1: int) -> List[Tuple[int, int]]:
+        """重新计算给定块范围内的哈希，返回发生变化的块"""
+        changed = []
+        for ty in range(ty0, ty1):
+            for tx in range(tx0, tx1):
+                h = self._hash_tile(tx, ty)
+                if h != int(self.hashes[ty, tx]):
+                    self.hashes[ty, tx] = h
+                    changed.append((tx, ty))
+        return changed
+
+    def commit(self, changed: List[Tuple[int, int]]) -> int:
+        if changed:
+            self.version += 1
+            for tx, ty in changed:
+                self.versions[ty, tx] = self.version
+        return self.version
+
+
+@register_plugin
+class OccupancyGridPlugin(BasePlugin):
+    """OccupancyGrid 分块增量推送插件
+
+    地图被切分为 tile_size x tile_size 的块并计算哈希，每次只推送内容变化的块；
+    同时支持 map_msgs/OccupancyGridUpdate 局部补丁（如 /map_updates），补丁产生的分块
+    改写 topic 字段后由适配器在地图话题（/map）下发送，客户端只需订阅地图话题即可。
+    每条分块消息带 base_version/version，客户端发现版本不连续时通过
+    GET /api/topics/map_tiles?since=<本地版本> 补齐。
+
+    settings:
+        tile_size: 分块边长（栅格数），默认 256
+        compress: 是否对块数据进行 zlib 压缩，默认 False
+        full_resync_interval: 地图无变化时全量重发的间隔（秒），默认 0 表示关闭（见 BasePlugin.resync_due）
+    """
+
+    def __init__(self, config: PluginConfig = None):
+        super().__init__(config)
+        settings = self.config.settings
+        self.tile_size = int(settings.get('tile_size', 256))
+        self.compress = bool(settings.get('compress', False))
+        self.maps: Dict[str, _TiledGrid] = {}
+
+    def get_supported_patterns(self) -> List[str]:
+        return [
+            "nav_msgs/OccupancyGrid#*",
+            "map_msgs/OccupancyGridUpdate#*"
+        ]
+
+    @staticmethod
+    def _to_int8_array(raw: Any) -> np.ndarray:
+        if isinstance(raw, str):
+            return np.frombuffer(base64.b64decode(raw), dtype=np.int8)
+        return np.asarray(raw, dtype=np.int8)
+
+    @staticmethod
+    def _map_topic_for_update(topic: str) -> str:
+        return topic[:-len('_updates')] if topic.endswith('_updates') else topic
+
+    def _encode_tile(self, state: _TiledGrid, tx: int, ty: int) -> Dict[str, Any]:
+        x0, y0, x1, y1 = state.tile_bounds(tx, ty)
+        raw = np.ascontiguousarray(state.grid[y0:y1, x0:x1]).tobytes()
+        encoding = 'base64'
+        if self.compress:
+            raw = zlib.compress(raw, 1)
+            encoding = 'zlib+base64'
+        return {
+            "tx": tx,
+            "ty": ty,
+            "x": x0,
+            "y": y0,
+            "width": x1 - x0,
+            "height": y1 - y0,
+            "encoding": encoding,
+            "data": base64.b64encode(raw).decode('ascii'),
+        }
+
+    def _build_payload(self, state: _TiledGrid, tiles: List[Tuple[int, int]], base_version: int, full: bool) -> Dict[str, Any]:
+        return {
+            "type": "OccupancyGridTiles",
+            "header": state.header,
+            "info": state.info,
+            "tile_size": state.tile_size,
+            "tiles_x": state.tiles_x,
+            "tiles_y": state.tiles_y,
+            "version": state.version,
+            "base_version": base_version,
+            "full": full,
+            "tiles": [self._encode_tile(state, tx, ty) for tx, ty in tiles],
+        }
+
+    def get_tiles_since(self, topic: str, since_version: int = 0) -> Optional[Dict[str, Any]]:
+        """返回自客户端版本 since_version 以来发生变化的块（版本过旧时返回全量）"""
+        state = self.maps.get(topic)
+        if state is None:
+            return None
+        if since_version < state.reset_version or since_version > state.version:
+            since_version = 0
+        ys, xs = np.nonzero(state.versions > since_version)
+        tiles = list(zip(xs.tolist(), ys.tolist()))
+        return self._build_payload(state, tiles, since_version, full=since_version == 0)
+
+    def _ingest_full_map(self, topic: str, msg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        info = msg.get('info', {})
+        expected = int(info.get('width', 0)) * int(info.get('height', 0))
+        cells = self._to_int8_array(msg.get('data', []))
+        # 先校验再替换状态：格式错误的地图不能清空已保存的地图
+        if cells.size != expected:
+            print(f"OccupancyGrid on {topic} has {cells.size} cells, expected {expected}")
+            return None
+
+        state = self.maps.get(topic)
+        new_layout = state is None or not state.matches(info)
+        if new_layout:
+            previous_version = state.version if state else 0
+            state = _TiledGrid(info, self.tile_size)
+            state.version = previous_version
+            self.maps[topic] = state
+
+        base_version = state.version
+        state.grid[:, :] = cells.reshape(state.height, state.width)
+        state.header = msg.get('header', {})
+        state.info = info
+        changed = state.rehash(0, 0, state.tiles_x, state.tiles_y)
+        if new_layout:
+            # 几何变化后所有块都视为新块
+            changed = [(tx, ty) for ty in range(state.tiles_y) for tx in range(state.tiles_x)]
+            state.commit(changed)
+            state.reset_version = state.version
+        else:
+            state.commit(changed)
+
+        if new_layout or self.resync_due(topic):
+            self.mark_full_sent(topic)
+            all_tiles = [(tx, ty) for ty in range(state.tiles_y) for tx in range(state.tiles_x)]
+            return self._build_payload(state, all_tiles, 0, full=True)
+        if not changed:
+            return None
+        return self._build_payload(state, changed, base_version, full=False)
+
+    def _ingest_update(self, map_topic: str, msg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        state = self.maps.get(map_topic)
+        if state is None:
+            # 尚未收到完整地图，补丁无处可应用
+            return None
+
+        x = int(msg.get('x', 0))
+        y = int(msg.get('y', 0))
+        w = int(msg.get('width', 0))
+        h = int(msg.get('height', 0))
+        cells = self._to_int8_array(msg.get('data', []))
+        if w <= 0 or h <= 0 or cells.size != w * h:
+            return None
+
+        # 裁剪到地图范围内
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, state.width), min(y + h, state.height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        patch = cells.reshape(h, w)
+        state.grid[y0:y1, x0:x1] = patch[y0 - y:y1 - y, x0 - x:x1 - x]
+
+        base_version = state.version
+        ts = state.tile_size
+        changed = state.rehash(x0 // ts, y0 // ts, (x1 - 1) // ts + 1, (y1 - 1) // ts + 1)
+        state.commit(changed)
+        if not changed:
+            return None
+        return self._build_payload(state, changed, base_version, full=False)
+
+    async def process_message(self, topic: str, message_type: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """将完整地图或地图补丁转换为分块增量消息"""
+        try:
+            msg = data.get('data', {})
+            is_update = 'info' not in msg and 'x' in msg and 'y' in msg
+
+            if is_update:
+                map_topic = self._map_topic_for_update(topic)
+                payload = self._ingest_update(map_topic, msg)
+            else:
+                map_topic = topic
+                payload = self._ingest_full_map(topic, msg)
+
+            if payload is None:
+                return None
+
+            return Message.wrap(data).with_fields(
+                topic=map_topic,
+                message_type='nav_msgs/OccupancyGrid',
+                data=payload
+            )
+
+        except Exception as e:
+            print(f"Error processing OccupancyGrid message: {e}")
+            return data
@@ -0,0 +1,140 @@
+import hashlib
+from typing import Dict, Any, Optional, List
+import numpy as np
+from . import BasePlugin, register_plugin, PluginConfig
+from .message import Message
+
+
+def douglas_peucker_mask(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas–Peucker 简化，返回保留点的布尔掩码（每段内的距离计算向量化）"""
+    count = points.shape[0]
+    keep = np.zeros(count, dtype=bool)
+    if count == 0:
+        return keep
+    keep[0] = keep[-1] = True
+
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a = points[start]
+        ab = points[end] - a
+        segment = points[start + 1:end] - a
+        length = np.linalg.norm(ab)
+        if length > 0:
+            distances = np.linalg.norm(np.cross(segment, ab), axis=1) / length
+        else:
+            distances = np.linalg.norm(segment, axis=1)
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def distance_decimation_mask(points: np.ndarray, spacing: float) -> np.ndarray:
+    """按弧长间隔抽稀，返回保留点的布尔掩码"""
+    count = points.shape[0]
+    keep = np.ones(count, dtype=bool)
+    if count < 3 or spacing <= 0:
+        return keep
+    steps = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    arc = np.concatenate(([0.0], np.cumsum(steps)))
+    bins = np.floor(arc / spacing)
+    keep[1:] = bins[1:] != bins[:-1]
+    keep[-1] = True
+    return keep
+
+
+@register_plugin
+class PathDecimationPlugin(BasePlugin):
+    """nav_msgs/Path 抽稀插件
+
+    对路径做 Douglas–Peucker 或按距离抽稀，内容哈希未变化的路径不再重复推送。
+
+    settings:
+        method: 'douglas_peucker'（默认）或 'distance'
+        tolerance: 抽稀容差（米），默认 0.02
+        topics: 按话题覆盖 method/tolerance，如 {"/plan": {"tolerance": 0.1}}
+        full_resync_interval: 路径无变化时重发的间隔（秒），默认 0 表示关闭（见 BasePlugin.resync_due）
+        fixed_frames: 客户端选择的固定坐标系，由数据源管理器维护（见 BasePlugin.follows_fixed_frame）
+    """
+
+    # 长路径的抽稀较耗 CPU，在进程池中执行；话题固定在同一工作进程，内容哈希状态保持一致
+    cpu_bound = True
+
+    def __init__(self, config: PluginConfig = None):
+        super().__init__(config)
+        settings = self.config.settings
+        self.default_method = settings.get('method', 'douglas_peucker')
+        self.default_tolerance = float(settings.get('tolerance', 0.02))
+        self.topic_settings: Dict[str, Dict[str, Any]] = settings.get('topics', {})
+        self._last_hash: Dict[str, bytes] = {}
+
+    def get_supported_patterns(self) -> List[str]:
+        return ["nav_msgs/Path#*"]
+
+    def _topic_options(self, topic: str):
+        options = self.topic_settings.get(topic, {})
+        return (
+            options.get('method', self.default_method),
+            float(options.get('tolerance', self.default_tolerance))
+        )
+
+    @staticmethod
+    def _extract_poses(poses: List[Dict[str, Any]]) -> np.ndarray:
+        """(N, 7) 数组：位置 x, y, z 与朝向四元数 x, y, z, w"""
+        values = np.empty((len(poses), 7), dtype=np.float64)
+        for i, pose in enumerate(poses):
+            pose = pose.get('pose') or pose
+            p = pose.get('position') or {}
+            q = pose.get('orientation') or {}
+            values[i] = (p.get('x', 0.0), p.get('y', 0.0), p.get('z', 0.0),
+                         q.get('x', 0.0), q.get('y', 0.0), q.get('z', 0.0), q.get('w', 1.0))
+        return values
+
+    def decimate(self, topic: str, positions: np.ndarray) -> np.ndarray:
+        """返回保留点的索引"""
+        method, tolerance = self._topic_options(topic)
+        if method == 'distance':
+            mask = distance_decimation_mask(positions, tolerance)
+        else:
+            mask = douglas_peucker_mask(positions, tolerance)
+        return np.flatnonzero(mask)
+
+    async def process_message(self, topic: str, message_type: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """抽稀路径并跳过内容未变化的重复推送"""
+        try:
+            msg = data.get('data', {})
+            poses = msg.get('poses')
+            if not poses:
+                return data
+
+            values = self._extract_poses(poses)
+            positions = values[:, :3]
+            frame_id = (msg.get('header') or {}).get('frame_id', '')
+            # 哈希包含朝向：只有朝向变化的路径同样需要推送
+            digest = hashlib.blake2b(values.tobytes(), digest_size=16)
+            digest.update(frame_id.encode('utf-8'))
+            content_hash = digest.digest()
+
+            # 客户端在服务端变换到其他固定坐标系时，路径不变也需随 TF 重发
+            if (content_hash == self._last_hash.get(topic) and not self.resync_due(topic)
+                    and not self.follows_fixed_frame(frame_id)):
+                return None
+            self._last_hash[topic] = content_hash
+            self.mark_full_sent(topic)
+
+            indices = self.decimate(topic, positions)
+            decimated = dict(msg)
+            decimated['poses'] = [poses[i] for i in indices]
+            decimated['original_pose_count'] = len(poses)
+
+            return Message.wrap(data).with_fields(data=decimated)
+
+        except Exception as e:
+            print(f"Error processing Path message: {e}")
+            return data
@@ -0,0 +1,140 @@
+"""插件模式的通配/正则匹配
+
+模式格式为 "message_type#topic"，两侧均可为：
+- 精确值，或单独的 "*"（匹配全部）：由 PluginManager 直接按字典查找，不经过本模块
+- glob：话题按 "/" 分段匹配，"*" / "?" / "[...]" 只匹配段内字符，"**" 匹配任意多段；
+  类型整体按 fnmatch 匹配，如 "sensor_msgs/*#/camera/*/image_raw"
+- 正则：以 "re:" 开头，整体 fullmatch，如 "*#re:/robot[0-9]+/odom"
+
+话题侧的 glob 编译为按段的前缀树，同一前缀的模式共享遍历；
+每个具体话题的遍历结果会被缓存，重复话题只需一次字典查找。
+"""
+import fnmatch
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+REGEX_PREFIX = 're:'
+_GLOB_CHARS = frozenset('*?[')
+
+
+def is_regex(part: str) -> bool:
+    return part.startswith(REGEX_PREFIX)
+
+
+def is_dynamic(part: str) -> bool:
+    """是否需要通配/正则匹配（单独的 "*" 与精确值除外）"""
+    return part != '*' and (is_regex(part) or any(c in _GLOB_CHARS for c in part))
+
+
+def compile_part(part: str) -> Callable[[str], bool]:
+    """将模式的一侧编译为判定函数"""
+    if part == '*':
+        return lambda value: True
+    if is_regex(part):
+        return re.compile(part[len(REGEX_PREFIX):]).fullmatch
+    if any(c in _GLOB_CHARS for c in part):
+        return re.compile(fnmatch.translate(part)).match
+    return part.__eq__
+
+
+class _Node:
+    __slots__ = ('literal', 'wild', 'globstar', 'terminal')
+
+    def __init__(self):
+        self.literal: Dict[str, '_Node'] = {}
+        self.wild: List[Tuple[Callable[[str], bool], '_Node']] = []
+        self.globstar: Optional['_Node'] = None
+        self.terminal: List[Tuple[str, Callable[[str], bool]]] = []  # (模式, 类型判定)
+
+
+class PatternIndex:
+    """通配/正则模式索引：具体 (topic, message_type) -> 命中的模式列表
+
+    话题与类型均应已规范化（话题以 "/" 开头，类型不含 "/msg/"）。
+    """
+
+    def __init__(self, max_cached_topics: int = 4096):
+        self._root = _Node()
+        self._any_topic: List[Tuple[str, Callable[[str], bool]]] = []  # 话题侧为 "*"
+        self._regex_topic: List[Tuple[str, Callable[[str], bool], Callable[[str], bool]]] = []
+        self._patterns = set()
+        self._wild_segments: Dict[str, Callable[[str], bool]] = {}
+        self._topic_cache: Dict[str, List[Tuple[str, Callable[[str], bool]]]] = {}
+        self.max_cached_topics = max_cached_topics
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, pattern: str) -> bool:
+        """添加规范化后的模式；精确模式或已存在时返回 False"""
+        if pattern in self._patterns:
+            return False
+        type_part, _, topic_part = pattern.partition('#')
+        topic_part = topic_part or '*'
+        if not (is_dynamic(type_part) or is_dynamic(topic_part)):
+            return False
+        type_match = compile_part(type_part)
+
+        if topic_part == '*':
+            self._any_topic.append((pattern, type_match))
+        elif is_regex(topic_part):
+            self._regex_topic.append((pattern, compile_part(topic_part), type_match))
+        else:
+            node = self._root
+            for segment in topic_part.strip('/').split('/'):
+                if segment == '**':
+                    if node.globstar is None:
+                        node.globstar = _Node()
+                    node = node.globstar
+                elif any(c in _GLOB_CHARS for c in segment):
+                    matcher = self._wild_segments.get(segment)
+                    if matcher is None:
+                        matcher = self._wild_segments[segment] = compile_part(segment)
+                    child = next((n for m, n in node.wild if m is matcher), None)
+                    if child is None:
+                        child = _Node()
+                        node.wild.append((matcher, child))
+                    node = child
+                else:
+                    node = node.literal.setdefault(segment, _Node())
+            node.terminal.append((pattern, type_match))
+
+        self._patterns.add(pattern)
+        self._topic_cache.clear()
+        return True
+
+    def _walk(self, node: _Node, segments: List[str], i: int, out: list):
+        if node.globstar is not None:
+            # "**" 可匹配零个或多个段
+            for j in range(i, len(segments) + 1):
+                self._walk(node.globstar, segments, j, out)
+        if i == len(segments):
+            out.extend(node.terminal)
+            return
+        segment = segments[i]
+        child = node.literal.get(segment)
+        if child is not None:
+            self._walk(child, segments, i + 1, out)
+        for matcher, child in node.wild:
+            if matcher(segment):
+                self._walk(child, segments, i + 1, out)
+
+    def _topic_candidates(self, topic: str) -> List[Tuple[str, Callable[[str], bool]]]:
+        candidates = self._topic_cache.get(topic)
+        if candidates is None:
+            candidates = []
+            self._walk(self._root, topic.strip('/').split('/'), 0, candidates)
+            candidates.extend((p, t) for p, topic_match, t in self._regex_topic if topic_match(topic))
+            candidates.extend(self._any_topic)
+            # 去重：glob 中的 "**" 可能经由不同路径到达同一节点
+            candidates = list(dict.fromkeys(candidates))
+            if len(self._topic_cache) >= self.max_cached_topics:
+                self._topic_cache.clear()
+            self._topic_cache[topic] = candidates
+        return candidates
+
+    def match(self, topic: str, message_type: str) -> List[str]:
+        """返回命中的模式；顺序不保证，调用方按优先级排序"""
+        if not self._patterns:
+            return []
+        return [pattern for pattern, type_match in self._topic_candidates(topic) if type_match(message_type)]
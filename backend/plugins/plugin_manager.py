@@ -1,10 +1,29 @@
 import os
+import sys
 import importlib
 import inspect
-from typing import Dict, List, Optional, Any
-from collections import defaultdict
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable
+from collections import defaultdict, deque
 import asyncio
+import pickle
+import time
+from concurrent.futures.process import BrokenProcessPool
 from . import BasePlugin, PluginConfig, get_registered_plugins
+from .executor import PluginExecutor
+from .plugin_stats import PluginStats
+from .message import Message
+from .manifest import PluginSpec, load_manifest
+from .pattern_matcher import PatternIndex, is_regex
+
+
+class _TopicLane:
+    """含 CPU 密集型插件的话题的待处理队列，保证同一话题按序处理"""
+    
+    def __init__(self):
+        self.queue = deque()
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.space = asyncio.Event()  # 队列取出消息后置位，唤醒等待入队的上游
 
 class PluginManager:
     """插件管理器"""
@@ -13,6 +32,37 @@ class PluginManager:
         self.plugins: Dict[str, List[BasePlugin]] = defaultdict(list)
         self.plugin_instances: List[BasePlugin] = []
         self.initialized = False
+        # 分发缓存: 原始 (topic, message_type) -> 已排序且已启用的插件链
+        # 仅在插件注册、启用/禁用时失效
+        self._dispatch: Dict[Tuple[str, str], Tuple[BasePlugin, ...]] = {}
+        self._offloaded: set = set()  # 插件链中含 CPU 密集型插件的键
+        # 通配/正则模式（如 sensor_msgs/*#/camera/*/image_raw）的编译索引；精确模式直接查字典
+        self._pattern_index = PatternIndex()
+        self.max_dispatch_entries = 4096
+        
+        # CPU 密集型插件的进程池（按需创建）与按话题的处理队列
+        self.worker_count = max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.max_pending_per_topic = 4
+        self._executor: Optional[PluginExecutor] = None
+        self._lanes: Dict[str, _TopicLane] = {}
+        
+        # 按插件名的耗时/过滤/错误统计
+        self.stats: Dict[str, PluginStats] = {}
+        
+        # 坐标变换查询 (target_frame, source_frame, time) -> 4x4 矩阵或 None，
+        # 由数据源管理器注入服务端 TF 缓冲，注册插件时传给声明了 transform_lookup 的插件
+        self.transform_lookup: Optional[Callable[..., Any]] = None
+        # 按插件名覆盖的 settings；插件按需加载或重载时同样生效，断开连接后保留
+        self.settings_overrides: Dict[str, Dict[str, Any]] = {}
+        
+        # 按需加载：清单中的插件在首次匹配时才导入
+        self.plugins_dir: Optional[str] = None
+        self._specs: Dict[str, PluginSpec] = {}
+        self._pending: Dict[str, PluginSpec] = {}
+        self._pending_by_pattern: Dict[str, List[PluginSpec]] = defaultdict(list)
+        self._loaded_from: Dict[str, str] = {}  # 插件名 -> spec key
+        self._module_mtimes: Dict[str, float] = {}
+        self._load_lock = asyncio.Lock()
         
     def _normalize_message_type(self, message_type: Optional[str]) -> str:
         if not message_type:
@@ -36,57 +86,178 @@ class PluginManager:
         parts = str(pattern).split("#", 1)
         type_part = parts[0] if parts else "*"
         topic_part = parts[1] if len(parts) > 1 else "*"
-        if type_part != "*":
+        if type_part != "*" and not is_regex(type_part):
             type_part = self._normalize_message_type(type_part)
-        if topic_part != "*":
+        if topic_part != "*" and not is_regex(topic_part):
             topic_part = self._normalize_topic(topic_part)
         return f"{type_part}#{topic_part}"
     
     async def initialize(self, plugins_dir: str = None):
-        """初始化插件管理器"""
+        """初始化插件管理器
+        
+        指定插件目录时只读取插件清单，插件在首次遇到匹配的话题/类型时才导入并初始化；
+        未指定时注册所有已导入的插件类。
+        """
         if self.initialized:
             return
         
-        # 自动发现并加载插件
         if plugins_dir:
-            await self._discover_plugins(plugins_dir)
-        
-        # 注册所有发现的插件
-        await self._register_discovered_plugins()
-        
-        # 初始化所有插件
-        for plugin in self.plugin_instances:
-            try:
-                await plugin.initialize()
-            except Exception as e:
-                print(f"Failed to initialize plugin {plugin.name}: {e}")
+            if not os.path.exists(plugins_dir):
+                print(f"Plugins directory {plugins_dir} does not exist")
+            else:
+                self.plugins_dir = plugins_dir
+                for spec in load_manifest(plugins_dir):
+                    self._add_spec(spec)
+        else:
+            await self._register_discovered_plugins()
+            
+            # 初始化所有插件
+            for plugin in self.plugin_instances:
+                try:
+                    await plugin.initialize()
+                except Exception as e:
+                    print(f"Failed to initialize plugin {plugin.name}: {e}")
         
         self.initialized = True
-        print(f"Plugin manager initialized with {len(self.plugin_instances)} plugins")
+        print(f"Plugin manager initialized with {len(self.plugin_instances)} plugins, "
+              f"{len(self._pending)} available on demand")
+    
+    def _add_spec(self, spec: PluginSpec):
+        """登记未加载的插件，按其清单模式建立索引"""
+        self._specs[spec.key] = spec
+        self._pending[spec.key] = spec
+        for pattern in spec.patterns:
+            normalized = self._normalize_pattern(pattern)
+            self._pattern_index.add(normalized)
+            self._pending_by_pattern[normalized].append(spec)
     
-    async def _discover_plugins(self, plugins_dir: str):
-        """自动发现插件文件"""
-        if not os.path.exists(plugins_dir):
-            print(f"Plugins directory {plugins_dir} does not exist")
+    def _pattern_keys(self, topic: str, message_type: str) -> List[str]:
+        """(topic, message_type) 命中的模式键：四个精确键，加上通配/正则索引的命中结果"""
+        nt = self._normalize_message_type(message_type)
+        tp = self._normalize_topic(topic)
+        keys = [f"{nt}#{tp}", f"{nt}#*", f"*#{tp}", "*#*"]
+        keys.extend(self._pattern_index.match(tp, nt))
+        return keys
+    
+    def _pending_for(self, topic: str, message_type: str) -> List[PluginSpec]:
+        if not self._pending:
+            return []
+        specs = {}
+        for key in self._pattern_keys(topic, message_type):
+            for spec in self._pending_by_pattern.get(key, ()):
+                if spec.key in self._pending:
+                    specs[spec.key] = spec
+        return list(specs.values())
+    
+    async def preload(self, topic: str, message_type: str):
+        """加载与该话题/类型匹配但尚未导入的插件（订阅时调用）"""
+        specs = self._pending_for(topic, message_type)
+        if not specs:
             return
+        async with self._load_lock:
+            for spec in specs:
+                if spec.key in self._pending:
+                    await self._load_spec(spec)
+    
+    async def _load_spec(self, spec: PluginSpec, config: Optional[PluginConfig] = None) -> Optional[BasePlugin]:
+        """导入插件模块并实例化、注册、初始化插件"""
+        self._pending.pop(spec.key, None)
+        try:
+            module = importlib.import_module(spec.module)
+            plugin = getattr(module, spec.class_name)(config)
+        except Exception as e:
+            print(f"Failed to load plugin {spec.key}: {e}")
+            return None
+        if spec.path and spec.module not in self._module_mtimes:
+            try:
+                self._module_mtimes[spec.module] = os.path.getmtime(spec.path)
+            except OSError:
+                pass
+        self._loaded_from[plugin.name] = spec.key
+        self.register_plugin(plugin)
+        try:
+            await plugin.initialize()
+        except Exception as e:
+            print(f"Failed to initialize plugin {plugin.name}: {e}")
+        return plugin
+    
+    async def reload_plugins(self, module: Optional[str] = None) -> Dict[str, Any]:
+        """热重载插件模块，不影响适配器连接
         
-        # 遍历插件目录
-        for root, dirs, files in os.walk(plugins_dir):
-            for file in files:
-                if file.endswith('plugin.py') and not file.startswith('__'):
-                    print(f"Found plugin file: {file}")
+        未指定模块时重新读取清单（发现新插件），并重载源文件已修改的模块。
+        重载后的插件沿用原实例的配置，插件内部状态重新开始。
+        """
+        async with self._load_lock:
+            if self.plugins_dir:
+                for spec in load_manifest(self.plugins_dir):
+                    if spec.key not in self._specs:
+                        self._add_spec(spec)
+            
+            if module:
+                name = module if module.startswith('plugins.') else f"plugins.{module}"
+                targets = [name] if name in self._module_mtimes else []
+                if not targets:
+                    return {"reloaded": [], "errors": {name: "module not loaded"}}
+            else:
+                targets = []
+                for name, mtime in self._module_mtimes.items():
+                    path = next((s.path for s in self._specs.values() if s.module == name and s.path), None)
                     try:
-                        # 构建模块路径
-                        rel_path = os.path.relpath(os.path.join(root, file), plugins_dir)
-                        module_path = rel_path.replace(os.sep, '.').replace('.py', '')
-                        full_module_path = f"plugins.{module_path}"
-                        
-                        # 动态导入模块
-                        importlib.import_module(full_module_path)
-                        print(f"Loaded plugin module: {full_module_path}")
-                        
-                    except Exception as e:
-                        print(f"Failed to load plugin {file}: {e}")
+                        if path and os.path.getmtime(path) != mtime:
+                            targets.append(name)
+                    except OSError:
+                        pass
+            
+            reloaded, errors = [], {}
+            for name in targets:
+                try:
+                    await self._reload_module(name)
+                    reloaded.append(name)
+                except Exception as e:
+                    errors[name] = str(e)
+                    print(f"Failed to reload plugin module {name}: {e}")
+            return {"reloaded": reloaded, "errors": errors}
+    
+    async def _reload_module(self, module_name: str):
+        # 先重载模块；失败（如语法错误）时保留旧插件实例
+        importlib.reload(sys.modules[module_name])
+        spec_by_key = {key: spec for key, spec in self._specs.items() if spec.module == module_name}
+        old_plugins = [p for p in self.plugin_instances if self._loaded_from.get(p.name) in spec_by_key]
+        
+        for plugin in old_plugins:
+            try:
+                await plugin.cleanup()
+            except Exception as e:
+                print(f"Error cleaning up plugin {plugin.name}: {e}")
+            self._unregister_plugin(plugin)
+        
+        # 工作进程中缓存的是旧代码的插件实例
+        if self._executor is not None and any(p.is_cpu_bound() for p in old_plugins):
+            self._executor.shutdown()
+            self._executor = None
+        
+        path = next((s.path for s in spec_by_key.values() if s.path), None)
+        self._module_mtimes.pop(module_name, None)
+        if path:
+            try:
+                self._module_mtimes[module_name] = os.path.getmtime(path)
+            except OSError:
+                pass
+        for plugin in old_plugins:
+            spec = spec_by_key[self._loaded_from.pop(plugin.name)]
+            await self._load_spec(spec, plugin.config)
+        print(f"Reloaded plugin module: {module_name}")
+    
+    def _unregister_plugin(self, plugin_instance: BasePlugin):
+        for pattern, plugins in list(self.plugins.items()):
+            if plugin_instance in plugins:
+                plugins.remove(plugin_instance)
+                if not plugins:
+                    del self.plugins[pattern]
+        if plugin_instance in self.plugin_instances:
+            self.plugin_instances.remove(plugin_instance)
+        self.stats.pop(plugin_instance.name, None)
+        self.invalidate_dispatch_cache()
     
     async def _register_discovered_plugins(self):
         """注册所有发现的插件"""
@@ -94,83 +265,177 @@ class PluginManager:
         
         for plugin_class in plugin_classes:
             try:
-                # 创建插件实例
-                plugin_instance = plugin_class()
-                
-                # 获取支持的模式
-                patterns = plugin_instance.get_supported_patterns()
-                
-                # 注册到对应的模式
-                for pattern in patterns:
-                    normalized = self._normalize_pattern(pattern)
-                    self.plugins[normalized].append(plugin_instance)
-                
-                self.plugin_instances.append(plugin_instance)
-                print(f"Registered plugin: {plugin_instance.name} for patterns: {patterns}")
-                
+                # 创建插件实例并注册
+                self.register_plugin(plugin_class())
             except Exception as e:
                 print(f"Failed to register plugin {plugin_class.__name__}: {e}")
+    
+    def register_plugin(self, plugin_instance: BasePlugin):
+        """注册插件实例到其支持的模式"""
+        patterns = plugin_instance.get_supported_patterns()
+        for pattern in patterns:
+            normalized = self._normalize_pattern(pattern)
+            self._pattern_index.add(normalized)
+            self.plugins[normalized].append(plugin_instance)
+            # 按优先级排序该模式的插件
+            self.plugins[normalized].sort(key=lambda p: p.get_priority())
         
-        # 按优先级排序每个模式的插件
-        for pattern in self.plugins:
-            self.plugins[pattern].sort(key=lambda p: p.get_priority())
+        if self.transform_lookup is not None and getattr(plugin_instance, 'transform_lookup', False) is None:
+            plugin_instance.transform_lookup = self.transform_lookup
+        overrides = self.settings_overrides.get(plugin_instance.name)
+        if overrides:
+            plugin_instance.config.settings.update(overrides)
+        
+        self.plugin_instances.append(plugin_instance)
+        self.stats[plugin_instance.name] = PluginStats(plugin_instance.name)
+        self.invalidate_dispatch_cache()
+        print(f"Registered plugin: {plugin_instance.name} for patterns: {patterns}")
+    
+    def set_plugin_enabled(self, name: str, enabled: bool) -> bool:
+        """启用或禁用插件；必须经由此方法修改，以便分发缓存失效"""
+        plugin = self.get_plugin(name)
+        if plugin is None:
+            return False
+        plugin.config.enabled = enabled
+        self.invalidate_dispatch_cache()
+        return True
+    
+    def update_plugin_settings(self, name: str, settings: Dict[str, Any]):
+        """更新插件 settings；插件尚未加载时在加载后生效"""
+        self.settings_overrides.setdefault(name, {}).update(settings)
+        plugin = self.get_plugin(name)
+        if plugin is not None:
+            plugin.config.settings.update(settings)
+            self.invalidate_dispatch_cache()
+    
+    def invalidate_dispatch_cache(self):
+        """清空分发缓存"""
+        self._dispatch.clear()
+        self._offloaded.clear()
+    
+    async def dispatch(self, topic: str, message_type: str, data: Dict[str, Any],
+                       deliver: Callable[[str, Dict[str, Any]], Awaitable[None]]):
+        """处理消息并通过 deliver(topic, data) 交付结果
+        
+        插件链中含 CPU 密集型插件时，消息进入该话题的队列后立即返回，
+        由后台任务按序在进程池中处理，其他话题不受影响。队列满时默认等待队列
+        腾出空间（背压，不丢消息）；插件链中有插件声明 drop_when_busy 时丢弃最旧的消息。
+        """
+        key = (topic, message_type)
+        chain = self._dispatch.get(key)
+        if chain is None and self.initialized:
+            await self.preload(topic, message_type)
+            chain = self._find_matching_plugins(topic, message_type)
+        
+        if chain and key in self._offloaded:
+            lane = self._lanes.get(topic)
+            if lane is None:
+                lane = self._lanes[topic] = _TopicLane()
+            if len(lane.queue) >= self.max_pending_per_topic:
+                if any(plugin.drops_when_busy() for plugin in chain):
+                    lane.queue.popleft()
+                    lane.dropped += 1
+                else:
+                    while len(lane.queue) >= self.max_pending_per_topic:
+                        lane.space.clear()
+                        await lane.space.wait()
+                        if self._lanes.get(topic) is not lane:
+                            return  # 等待期间插件已清理
+            lane.queue.append((message_type, data, deliver))
+            if lane.task is None or lane.task.done():
+                lane.task = asyncio.create_task(self._drain_lane(topic, lane))
+            return
+        
+        result = await self.process_message(topic, message_type, data) if chain else data
+        if result is not None:
+            await deliver(topic, result)
+    
+    async def _drain_lane(self, topic: str, lane: _TopicLane):
+        while lane.queue:
+            message_type, data, deliver = lane.queue.popleft()
+            lane.space.set()
+            try:
+                result = await self.process_message(topic, message_type, data)
+                if result is not None:
+                    await deliver(topic, result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error processing {topic} in worker lane: {e}")
+    
+    async def _run_plugin(self, plugin: BasePlugin, topic: str, message_type: str,
+                          data: Message) -> Optional[Dict[str, Any]]:
+        if plugin.is_cpu_bound():
+            if self._executor is None:
+                self._executor = PluginExecutor(self.worker_count)
+            try:
+                # 进程间只传递物化后的普通 dict
+                return await self._executor.run(plugin, topic, message_type, data.materialize())
+            except (BrokenProcessPool, pickle.PicklingError) as e:
+                print(f"Worker execution failed for plugin {plugin.name}, running inline: {e}")
+        return await plugin.process_message(topic, message_type, data)
     
     async def process_message(self, topic: str, message_type: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """处理消息通过插件pipeline"""
+        """处理消息通过插件pipeline
+        
+        插件收到只读的 Message，通过补丁返回修改；管线末尾物化一次，得到用于编码的 dict。
+        """
         if not self.initialized:
             return data
         
-        # 查找匹配的插件
-        matching_plugins = self._find_matching_plugins(topic, message_type)
+        # 查找匹配的插件；无插件的话题只需一次字典查找
+        matching_plugins = self._dispatch.get((topic, message_type))
+        if matching_plugins is None:
+            await self.preload(topic, message_type)
+            matching_plugins = self._find_matching_plugins(topic, message_type)
         
         if not matching_plugins:
             return data
         
         # 依次通过插件处理
-        current_data = data
+        current_data = Message.wrap(data)
         for plugin in matching_plugins:
-            if not plugin.is_enabled():
-                continue
-                
+            stats = self.stats.get(plugin.name)
+            started = time.perf_counter()
             try:
-                processed_data = await plugin.process_message(topic, message_type, current_data)
+                processed_data = await self._run_plugin(plugin, topic, message_type, current_data)
+                if stats is not None:
+                    stats.record(time.perf_counter() - started, filtered=processed_data is None)
                 if processed_data is None:
                     # 插件过滤了消息
                     return None
-                current_data = processed_data
+                current_data = Message.wrap(processed_data)
             except Exception as e:
+                if stats is not None:
+                    stats.record(time.perf_counter() - started, error=True)
                 print(f"Error in plugin {plugin.name}: {e}")
                 # 继续处理，不因单个插件错误而中断
         
-        return current_data
+        return current_data.materialize()
     
-    def _find_matching_plugins(self, topic: str, message_type: str) -> List[BasePlugin]:
-        """查找匹配的插件"""
-        matching_plugins = []
-        nt = self._normalize_message_type(message_type)
-        tp = self._normalize_topic(topic)
-        
-        # 精确匹配: message_type#topic
-        exact_key = f"{nt}#{tp}"
-        matching_plugins.extend(self.plugins.get(exact_key, []))
-        
-        # 消息类型匹配: message_type#*
-        type_key = f"{nt}#*"
-        matching_plugins.extend(self.plugins.get(type_key, []))
+    def _find_matching_plugins(self, topic: str, message_type: str) -> Tuple[BasePlugin, ...]:
+        """查找匹配且已启用的插件，结果按原始 (topic, message_type) 缓存"""
+        key = (topic, message_type)
+        cached = self._dispatch.get(key)
+        if cached is not None:
+            return cached
         
-        # 话题匹配: *#topic
-        topic_key = f"*#{tp}"
-        matching_plugins.extend(self.plugins.get(topic_key, []))
-        
-        # 全局匹配: *#*
-        global_key = "*#*"
-        matching_plugins.extend(self.plugins.get(global_key, []))
+        matching_plugins = []
+        # 依次为 精确匹配、消息类型匹配、话题匹配、全局匹配、通配/正则匹配
+        for pattern_key in self._pattern_keys(topic, message_type):
+            matching_plugins.extend(self.plugins.get(pattern_key, []))
         
-        # 去重并按优先级排序
-        unique_plugins = list(dict.fromkeys(matching_plugins))  # 保持顺序去重
+        # 去重、过滤禁用插件并按优先级排序
+        unique_plugins = [p for p in dict.fromkeys(matching_plugins) if p.is_enabled()]  # 保持顺序去重
         unique_plugins.sort(key=lambda p: p.get_priority())
         
-        return unique_plugins
+        chain = tuple(unique_plugins)
+        if len(self._dispatch) >= self.max_dispatch_entries:
+            self.invalidate_dispatch_cache()
+        self._dispatch[key] = chain
+        if any(p.is_cpu_bound() for p in chain):
+            self._offloaded.add(key)
+        return chain
     
     async def cleanup(self):
         """清理所有插件"""
@@ -180,10 +445,60 @@ class PluginManager:
             except Exception as e:
                 print(f"Error cleaning up plugin {plugin.name}: {e}")
         
+        for lane in self._lanes.values():
+            if lane.task and not lane.task.done():
+                lane.task.cancel()
+            lane.space.set()
+        self._lanes.clear()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        
         self.plugins.clear()
         self.plugin_instances.clear()
+        self.stats.clear()
+        self.invalidate_dispatch_cache()
+        self._specs.clear()
+        self._pending.clear()
+        self._pending_by_pattern.clear()
+        self._pattern_index = PatternIndex()
+        self._loaded_from.clear()
+        self._module_mtimes.clear()
         self.initialized = False
     
+    def get_plugin(self, name: str) -> Optional[BasePlugin]:
+        """按名称获取插件实例"""
+        for plugin in self.plugin_instances:
+            if plugin.name == name:
+                return plugin
+        return None
+
+    def get_plugin_stats(self) -> Dict[str, Any]:
+        """获取插件耗时统计与各话题队列丢弃数"""
+        plugins = {}
+        for p in self.plugin_instances:
+            stats = self.stats.get(p.name)
+            if stats is None:
+                continue
+            entry = stats.snapshot()
+            entry["enabled"] = p.is_enabled()
+            entry["cpu_bound"] = p.is_cpu_bound()
+            plugins[p.name] = entry
+        return {
+            "plugins": plugins,
+            "lanes": {
+                topic: {"pending": len(lane.queue), "dropped": lane.dropped}
+                for topic, lane in self._lanes.items()
+            }
+        }
+    
+    def reset_plugin_stats(self):
+        """重置插件统计"""
+        for stats in self.stats.values():
+            stats.reset()
+        for lane in self._lanes.values():
+            lane.dropped = 0
+    
     def get_plugin_status(self) -> Dict[str, Any]:
         """获取插件状态"""
         return {
@@ -194,8 +509,18 @@ class PluginManager:
                     "name": p.name,
                     "enabled": p.is_enabled(),
                     "priority": p.get_priority(),
-                    "patterns": p.get_supported_patterns()
+                    "patterns": p.get_supported_patterns(),
+                    "cpu_bound": p.is_cpu_bound()
                 }
                 for p in self.plugin_instances
+            ],
+            "available": [
+                {
+                    "name": spec.class_name,
+                    "module": spec.module,
+                    "patterns": spec.patterns,
+                    "loaded": spec.key not in self._pending
+                }
+                for spec in self._specs.values()
             ]
         }
@@ -0,0 +1,111 @@
+"""插件耗时与吞吐统计
+
+延迟使用对数分桶直方图（1µs ~ 10s，每桶约 19%），记录为 O(1)，分位数由桶计算，
+无需保存样本。调用速率按秒分桶，统计最近 RATE_WINDOW 秒，读取快照不改变统计状态。
+"""
+import math
+import time
+from collections import deque
+from typing import Dict, Any, List
+
+_MIN_LATENCY = 1e-6
+_BUCKETS_PER_DOUBLING = 4
+_BUCKET_FACTOR = 2 ** (1 / _BUCKETS_PER_DOUBLING)
+_BUCKET_COUNT = int(math.ceil(math.log(10.0 / _MIN_LATENCY, _BUCKET_FACTOR))) + 1
+_LOG_FACTOR = math.log(_BUCKET_FACTOR)
+
+RATE_WINDOW = 5  # 秒
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        if seconds <= _MIN_LATENCY:
+            index = 0
+        else:
+            index = min(int(math.log(seconds / _MIN_LATENCY) / _LOG_FACTOR) + 1, _BUCKET_COUNT - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """返回第 q 分位（0~1）所在桶的上界（秒）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(_MIN_LATENCY * _BUCKET_FACTOR ** index, self.max)
+        return self.max
+
+
+class PluginStats:
+    """单个插件的调用统计"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.filtered = 0  # 插件返回 None，消息被过滤
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.started_at = time.monotonic()
+        self._rate_buckets: deque = deque()  # [整秒, 该秒内的调用数]，最近 RATE_WINDOW 秒
+
+    def record(self, seconds: float, filtered: bool = False, error: bool = False):
+        self.calls += 1
+        self.latency.record(seconds)
+        if filtered:
+            self.filtered += 1
+        if error:
+            self.errors += 1
+
+        second = int(time.monotonic())
+        buckets = self._rate_buckets
+        if buckets and buckets[-1][0] == second:
+            buckets[-1][1] += 1
+        else:
+            buckets.append([second, 1])
+            while buckets[0][0] <= second - RATE_WINDOW:
+                buckets.popleft()
+
+    def rate(self, now: float = None) -> float:
+        """最近 RATE_WINDOW 秒（含当前不完整的一秒）的调用速率"""
+        now = time.monotonic() if now is None else now
+        first = int(now) - RATE_WINDOW + 1
+        count = sum(n for second, n in self._rate_buckets if second >= first)
+        span = min(now - first, now - self.started_at)
+        return count / span if span > 0 else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回统计快照（无副作用，可被多个读取方并发调用）"""
+        now = time.monotonic()
+        latency = self.latency
+        return {
+            "calls": self.calls,
+            "filtered": self.filtered,
+            "errors": self.errors,
+            "rate": round(self.rate(now), 2),
+            "total_time_ms": round(latency.total * 1e3, 3),
+            "mean_ms": round(latency.total / latency.count * 1e3, 4) if latency.count else 0.0,
+            "p50_ms": round(latency.percentile(0.50) * 1e3, 4),
+            "p95_ms": round(latency.percentile(0.95) * 1e3, 4),
+            "p99_ms": round(latency.percentile(0.99) * 1e3, 4),
+            "max_ms": round(latency.max * 1e3, 4),
+            "uptime": round(now - self.started_at, 3),
+        }
@@ -1,13 +1,22 @@
 from typing import Dict, Any, Optional, List
 from . import BasePlugin, register_plugin, PluginConfig
+from .message import Message
 
 @register_plugin
 class TFMessagePlugin(BasePlugin):
-    """TF消息处理插件"""
+    """TF消息处理插件
+
+    静态变换（/tf_static）与动态变换（/tf）分开保存：
+    - 静态变换只在内容变化时推送变化的部分，新客户端连接时通过 get_static_snapshot 获取全量
+    - 动态变换每条消息只推送本条消息中的变换；动态坐标系的状态与过期只由服务端 TF 缓冲维护
+      （见 TFBuffer.evict_stale，由服务端定期调用并通知客户端）
+    适配器批处理时，同一窗口内的 TF 消息按 child_frame_id 合并（见 BaseAdapter._emit_message），
+    不会因只保留最后一条而丢失其他发布者的坐标系或只推送一次的静态变换。
+    """
     
     def __init__(self, config: PluginConfig = None):
         super().__init__(config)
-        self.tf_buffer = {}  # 按child_frame_id缓存最新的TF数据
+        self.static_frames: Dict[str, Dict[str, Any]] = {}  # child_frame_id -> 静态变换
     
     def get_supported_patterns(self) -> List[str]:
         return [
@@ -15,8 +24,22 @@ class TFMessagePlugin(BasePlugin):
             "tf2_msgs/TFMessage#/tf_static"
         ]
     
+    @staticmethod
+    def _normalize(transform: Dict[str, Any]) -> Dict[str, Any]:
+        """规范化 frame_id：移除前导斜杠；输入消息只读，需要时才复制"""
+        child_frame_id = transform.get('child_frame_id')
+        header = transform.get('header', {})
+        frame_id = header.get('frame_id')
+        if (child_frame_id and child_frame_id.startswith('/')) or (frame_id and frame_id.startswith('/')):
+            transform = dict(transform)
+            if child_frame_id and child_frame_id.startswith('/'):
+                transform['child_frame_id'] = child_frame_id[1:]
+            if frame_id and frame_id.startswith('/'):
+                transform['header'] = dict(header, frame_id=frame_id[1:])
+        return transform
+    
     async def process_message(self, topic: str, message_type: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """处理TF消息，合并相同frame_id的变换"""
+        """处理TF消息：静态变换去重后推送变化部分，动态变换规范化后推送"""
         try:
             message_data = data.get('data', {})
             transforms = message_data.get('transforms', [])
@@ -24,35 +47,29 @@ class TFMessagePlugin(BasePlugin):
             if not transforms:
                 return data
             
-            # 合并TF变换到缓冲区
-            for transform in transforms:
-                child_frame_id = transform.get('child_frame_id')
-                # 规范化 frame_id：移除前导斜杠
-                if child_frame_id and child_frame_id.startswith('/'):
-                    child_frame_id = child_frame_id[1:]
-                    transform['child_frame_id'] = child_frame_id
-                
-                header = transform.get('header', {})
-                frame_id = header.get('frame_id')
-                if frame_id and frame_id.startswith('/'):
-                    header['frame_id'] = frame_id[1:]
-                    transform['header'] = header
-
-                if child_frame_id:
-                    self.tf_buffer[child_frame_id] = transform
+            normalized = [self._normalize(t) for t in transforms if t.get('child_frame_id')]
             
-            # 创建合并后的消息
-            merged_data = data.copy()
-            merged_data['data'] = {
-                'transforms': list(self.tf_buffer.values())
-            }
-            merged_data['type'] = 'tf_merged'
+            if topic == '/tf_static':
+                changed = []
+                for transform in normalized:
+                    child_frame_id = transform['child_frame_id']
+                    if self.static_frames.get(child_frame_id) != transform:
+                        self.static_frames[child_frame_id] = transform
+                        changed.append(transform)
+                if not changed:
+                    # 静态变换未变化，不重复推送
+                    return None
+                return Message.wrap(data).with_fields(data={'transforms': changed}, type='tf_static')
             
-            return merged_data
+            return Message.wrap(data).with_fields(data={'transforms': normalized}, type='tf_dynamic')
             
         except Exception as e:
             print(f"Error processing TF message: {e}")
             return data
+    
+    def get_static_snapshot(self) -> Dict[str, Any]:
+        """全量静态变换，新客户端连接时发送"""
+        return {'transforms': list(self.static_frames.values())}
 
 @register_plugin
 class MessageLoggerPlugin(BasePlugin):
@@ -69,9 +86,5 @@ class MessageLoggerPlugin(BasePlugin):
         """记录消息统计"""
         self.message_count += 1
 
-        # 添加处理时间戳
-        if 'metadata' not in data:
-            data['metadata'] = {}
-        data['metadata']['processed_at'] = self.message_count
-        
-        return data
\ No newline at end of file
+        # 添加处理序号（以补丁形式，不修改原消息）
+        return Message.wrap(data).with_path(('metadata', 'processed_at'), self.message_count)
\ No newline at end of file
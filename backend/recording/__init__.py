@@ -0,0 +1 @@
+# 录制与回放模块初始化文件
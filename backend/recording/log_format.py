@@ -0,0 +1,223 @@
+"""tStudio 录制文件格式 (.tlog)
+
+文件布局（全部小端）:
+    FILE_MAGIC
+    记录序列，每条以 4 字节类型开头:
+        CONN: u16 topic_id, u32 len, JSON {"topic", "message_type"}
+        CHNK: u32 压缩长度, u32 原始长度, u32 消息数, f64 起始时间, f64 结束时间, zlib 数据
+              解压后为连续的消息: f64 时间戳, u16 topic_id, u32 len, JSON 载荷
+    INDX: u32 len, zlib 压缩的 JSON 索引
+    TRAILER: u64 索引偏移, END_MAGIC
+
+文件只追加写入；若录制异常中断而缺少索引，可通过顺序扫描 CONN/CHNK 记录重建。
+"""
+import json
+import os
+import struct
+import zlib
+from typing import Dict, Any, List, Optional, BinaryIO
+
+FILE_MAGIC = b"TSLOG\x00\x01\x00"
+END_MAGIC = b"TSLOGEND"
+
+CONN_OP = b"CONN"
+CHUNK_OP = b"CHNK"
+INDEX_OP = b"INDX"
+
+CONN_HEADER = struct.Struct("<HI")
+CHUNK_HEADER = struct.Struct("<IIIdd")
+INDEX_HEADER = struct.Struct("<I")
+MESSAGE_HEADER = struct.Struct("<dHI")
+TRAILER = struct.Struct("<Q8s")
+
+
+class LogWriter:
+    """追加写入 .tlog 文件；消息先缓存在内存块中，达到阈值后压缩落盘"""
+
+    def __init__(self, path: str, chunk_size: int = 1 << 20, compression_level: int = 1):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.compression_level = compression_level
+        self._file: BinaryIO = open(path, 'wb')
+        self._file.write(FILE_MAGIC)
+
+        self.topics: Dict[str, int] = {}
+        self.topic_info: Dict[int, Dict[str, Any]] = {}
+        self.chunks: List[List[Any]] = []
+
+        self._chunk = bytearray()
+        self._chunk_count = 0
+        self._chunk_start = None
+        self._chunk_end = None
+        self._chunk_topics: Dict[int, int] = {}
+
+        self.message_count = 0
+        self.bytes_written = len(FILE_MAGIC)
+        self.closed = False
+
+    def _topic_id(self, topic: str, message_type: str) -> int:
+        topic_id = self.topics.get(topic)
+        if topic_id is not None:
+            return topic_id
+        topic_id = len(self.topics)
+        self.topics[topic] = topic_id
+        self.topic_info[topic_id] = {"topic": topic, "message_type": message_type, "count": 0,
+                                     "start_time": None, "end_time": None}
+        body = json.dumps({"topic": topic, "message_type": message_type}).encode('utf-8')
+        record = CONN_OP + CONN_HEADER.pack(topic_id, len(body)) + body
+        self._file.write(record)
+        self.bytes_written += len(record)
+        return topic_id
+
+    def write_message(self, topic: str, message_type: str, timestamp: float, payload: bytes):
+        """追加一条消息（载荷为已序列化的 JSON 字节）"""
+        topic_id = self._topic_id(topic, message_type)
+        self._chunk += MESSAGE_HEADER.pack(timestamp, topic_id, len(payload))
+        self._chunk += payload
+        self._chunk_count += 1
+        self._chunk_topics[topic_id] = self._chunk_topics.get(topic_id, 0) + 1
+        if self._chunk_start is None:
+            self._chunk_start = timestamp
+        self._chunk_end = timestamp
+
+        info = self.topic_info[topic_id]
+        info["count"] += 1
+        if info["start_time"] is None:
+            info["start_time"] = timestamp
+        info["end_time"] = timestamp
+        self.message_count += 1
+
+        if len(self._chunk) >= self.chunk_size:
+            self.flush_chunk()
+
+    def flush_chunk(self):
+        """压缩并写出当前块"""
+        if not self._chunk_count:
+            return
+        compressed = zlib.compress(bytes(self._chunk), self.compression_level)
+        offset = self._file.tell()
+        self._file.write(CHUNK_OP)
+        self._file.write(CHUNK_HEADER.pack(len(compressed), len(self._chunk), self._chunk_count,
+                                           self._chunk_start, self._chunk_end))
+        self._file.write(compressed)
+        self._file.flush()
+        self.bytes_written += 4 + CHUNK_HEADER.size + len(compressed)
+        self.chunks.append([offset, self._chunk_start, self._chunk_end, self._chunk_count,
+                            {str(k): v for k, v in self._chunk_topics.items()}])
+
+        self._chunk = bytearray()
+        self._chunk_count = 0
+        self._chunk_start = None
+        self._chunk_end = None
+        self._chunk_topics = {}
+
+    @property
+    def pending_since(self) -> Optional[float]:
+        return self._chunk_start
+
+    def close(self):
+        """写出剩余数据、索引与文件尾"""
+        if self.closed:
+            return
+        self.flush_chunk()
+        index = {
+            "version": 1,
+            "message_count": self.message_count,
+            "topics": {str(k): v for k, v in self.topic_info.items()},
+            "chunks": self.chunks,
+        }
+        body = zlib.compress(json.dumps(index).encode('utf-8'))
+        index_offset = self._file.tell()
+        self._file.write(INDEX_OP + INDEX_HEADER.pack(len(body)) + body)
+        self._file.write(TRAILER.pack(index_offset, END_MAGIC))
+        self._file.close()
+        self.closed = True
+
+
+def _scan_records(buf, start: int = len(FILE_MAGIC)) -> Dict[str, Any]:
+    """顺序扫描记录以重建索引（用于缺少索引的中断录制）"""
+    topics: Dict[str, Dict[str, Any]] = {}
+    chunks: List[List[Any]] = []
+    pos = start
+    size = len(buf)
+    message_count = 0
+    while pos + 4 <= size:
+        op = bytes(buf[pos:pos + 4])
+        if op == CONN_OP:
+            if pos + 4 + CONN_HEADER.size > size:
+                break
+            topic_id, length = CONN_HEADER.unpack_from(buf, pos + 4)
+            body_start = pos + 4 + CONN_HEADER.size
+            if body_start + length > size:
+                break
+            info = json.loads(bytes(buf[body_start:body_start + length]).decode('utf-8'))
+            info.update({"count": 0, "start_time": None, "end_time": None})
+            topics[str(topic_id)] = info
+            pos = body_start + length
+        elif op == CHUNK_OP:
+            if pos + 4 + CHUNK_HEADER.size > size:
+                break
+            clen, _, count, start_time, end_time = CHUNK_HEADER.unpack_from(buf, pos + 4)
+            data_start = pos + 4 + CHUNK_HEADER.size
+            if data_start + clen > size:
+                break
+            chunk_topics: Dict[str, int] = {}
+            for timestamp, topic_id, _ in iter_chunk_messages(decompress_chunk(buf, pos), with_payload=False):
+                key = str(topic_id)
+                chunk_topics[key] = chunk_topics.get(key, 0) + 1
+                info = topics.get(key)
+                if info is not None:
+                    info["count"] += 1
+                    if info["start_time"] is None:
+                        info["start_time"] = timestamp
+                    info["end_time"] = timestamp
+            chunks.append([pos, start_time, end_time, count, chunk_topics])
+            message_count += count
+            pos = data_start + clen
+        else:
+            break
+    return {"version": 1, "message_count": message_count, "topics": topics, "chunks": chunks, "recovered": True}
+
+
+def read_index(buf) -> Dict[str, Any]:
+    """读取文件索引；buf 可为 bytes 或 mmap"""
+    if len(buf) < len(FILE_MAGIC) or bytes(buf[:len(FILE_MAGIC)]) != FILE_MAGIC:
+        raise ValueError("Not a tStudio log file")
+    if len(buf) >= len(FILE_MAGIC) + TRAILER.size:
+        index_offset, magic = TRAILER.unpack_from(buf, len(buf) - TRAILER.size)
+        if magic == END_MAGIC and bytes(buf[index_offset:index_offset + 4]) == INDEX_OP:
+            (length,) = INDEX_HEADER.unpack_from(buf, index_offset + 4)
+            start = index_offset + 4 + INDEX_HEADER.size
+            return json.loads(zlib.decompress(bytes(buf[start:start + length])).decode('utf-8'))
+    return _scan_records(buf)
+
+
+def decompress_chunk(buf, offset: int) -> bytes:
+    """解压位于 offset 处的块"""
+    clen, _, _, _, _ = CHUNK_HEADER.unpack_from(buf, offset + 4)
+    start = offset + 4 + CHUNK_HEADER.size
+    return zlib.decompress(buf[start:start + clen])
+
+
+def iter_chunk_messages(raw: bytes, with_payload: bool = True):
+    """遍历块内消息，产出 (timestamp, topic_id, payload 或 None)"""
+    pos = 0
+    size = len(raw)
+    header_size = MESSAGE_HEADER.size
+    while pos + header_size <= size:
+        timestamp, topic_id, length = MESSAGE_HEADER.unpack_from(raw, pos)
+        pos += header_size
+        yield timestamp, topic_id, (raw[pos:pos + length] if with_payload else None)
+        pos += length
+
+
+def list_log_files(directory: str) -> List[Dict[str, Any]]:
+    """列出目录下的录制文件"""
+    if not os.path.isdir(directory):
+        return []
+    result = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.tlog'):
+            path = os.path.join(directory, name)
+            result.append({"name": name, "size": os.path.getsize(path), "modified": os.path.getmtime(path)})
+    return result
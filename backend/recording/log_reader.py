@@ -0,0 +1,216 @@
+import bisect
+import json
+import mmap
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Iterator, Set
+from .log_format import read_index, decompress_chunk, MESSAGE_HEADER
+
+
+class MessageChunk:
+    """已解压的块：原始字节与按时间排序的消息位置"""
+
+    def __init__(self, raw, times: List[float], topic_ids: List[int], starts: List[int], lengths: List[int]):
+        self.raw = raw
+        self.times = times
+        self.topic_ids = topic_ids
+        self.starts = starts
+        self.lengths = lengths
+
+    @classmethod
+    def from_unsorted(cls, raw, entries: List[Tuple[float, int, int, int]]) -> "MessageChunk":
+        """由 (timestamp, topic_id, start, length) 列表构建；块内消息不保证按时间写入时先排序"""
+        entries.sort(key=lambda e: e[0])
+        return cls(raw, [e[0] for e in entries], [e[1] for e in entries],
+                   [e[2] for e in entries], [e[3] for e in entries])
+
+    def payload(self, i: int) -> memoryview:
+        start = self.starts[i]
+        return memoryview(self.raw)[start:start + self.lengths[i]]
+
+
+class ChunkedLogReader(ABC):
+    """基于块索引的只读日志：打开时只解析索引，块按需解压并缓存
+
+    子类负责填充 topics / _chunk_meta，并实现 _load_chunk 与 decode。
+    topics 以连接 ID 为键，同一话题可对应多个连接（如 ROS bag 中的多个发布者）。
+    """
+
+    def __init__(self, path: str, cache_chunks: int = 4):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+
+        self.topics: Dict[int, Dict[str, Any]] = {}
+        # 每个块: (起始时间, 结束时间, 包含的连接 ID 集合，未知时为 None)
+        self._chunk_meta: List[Tuple[float, float, Optional[Set[int]]]] = []
+        self._cache: "OrderedDict[int, MessageChunk]" = OrderedDict()
+        self._cache_size = cache_chunks
+
+    def _build_lookup(self):
+        """在子类填充 topics 与（按起始时间排序的）_chunk_meta 后调用"""
+        self._ids_by_topic: Dict[str, Set[int]] = {}
+        for topic_id, info in self.topics.items():
+            self._ids_by_topic.setdefault(info["topic"], set()).add(topic_id)
+        self.topic_ids: Dict[str, int] = {name: min(ids) for name, ids in self._ids_by_topic.items()}
+        # 块时间范围可能重叠，使用结束时间的前缀最大值保证二分查找的单调性
+        self._chunk_ends: List[float] = []
+        latest = float('-inf')
+        for _, end, _ in self._chunk_meta:
+            latest = max(latest, end)
+            self._chunk_ends.append(latest)
+
+    @property
+    def start_time(self) -> float:
+        return self._chunk_meta[0][0] if self._chunk_meta else 0.0
+
+    @property
+    def end_time(self) -> float:
+        return self._chunk_ends[-1] if self._chunk_meta else 0.0
+
+    @property
+    def message_count(self) -> int:
+        return sum(int(info.get("count", 0)) for info in self.topics.values())
+
+    def get_topics(self) -> List[Dict[str, Any]]:
+        result: Dict[str, Dict[str, Any]] = {}
+        for _, info in sorted(self.topics.items()):
+            entry = result.get(info["topic"])
+            if entry is None:
+                result[info["topic"]] = {"name": info["topic"], "type": info.get("message_type", "unknown"),
+                                         "count": info.get("count", 0)}
+            else:
+                entry["count"] += info.get("count", 0)
+        return list(result.values())
+
+    @abstractmethod
+    def _load_chunk(self, chunk_index: int) -> MessageChunk:
+        """读取并解压第 chunk_index 个块"""
+        pass
+
+    @abstractmethod
+    def decode(self, topic_id: int, payload: memoryview) -> Any:
+        """将载荷解码为发送给前端的消息"""
+        pass
+
+    def _chunk(self, chunk_index: int) -> MessageChunk:
+        chunk = self._cache.get(chunk_index)
+        if chunk is not None:
+            self._cache.move_to_end(chunk_index)
+            return chunk
+        chunk = self._load_chunk(chunk_index)
+        self._cache[chunk_index] = chunk
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return chunk
+
+    def seek(self, timestamp: float) -> Tuple[int, int]:
+        """定位到第一条时间戳 >= timestamp 的消息，返回 (块序号, 块内序号)，O(log n)"""
+        chunk_index = bisect.bisect_left(self._chunk_ends, timestamp)
+        if chunk_index >= len(self._chunk_meta):
+            return len(self._chunk_meta), 0
+        chunk = self._chunk(chunk_index)
+        return chunk_index, bisect.bisect_left(chunk.times, timestamp)
+
+    def _topic_ids_for(self, topics: Optional[Set[str]]) -> Optional[Set[int]]:
+        if topics is None:
+            return None
+        topic_ids: Set[int] = set()
+        for t in list(topics):
+            topic_ids |= self._ids_by_topic.get(t, set())
+        return topic_ids
+
+    def chunks_between(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+                       topics: Optional[Set[str]] = None) -> List[int]:
+        """返回与 [start_time, end_time] 相交且包含指定话题的块序号（仅查索引，不解压）"""
+        topic_ids = self._topic_ids_for(topics)
+        first = 0 if start_time is None else bisect.bisect_left(self._chunk_ends, start_time)
+        result = []
+        for chunk_index in range(first, len(self._chunk_meta)):
+            chunk_start, _, chunk_ids = self._chunk_meta[chunk_index]
+            if end_time is not None and chunk_start > end_time:
+                break
+            if topic_ids is None or chunk_ids is None or not chunk_ids.isdisjoint(topic_ids):
+                result.append(chunk_index)
+        return result
+
+    def iter_chunk(self, chunk_index: int, topics: Optional[Set[str]] = None,
+                   start: int = 0) -> Iterator[Tuple[float, str, str, memoryview, int]]:
+        """遍历单个块内的消息，产出格式同 iter_messages"""
+        topic_ids = self._topic_ids_for(topics)
+        chunk = self._chunk(chunk_index)
+        for i in range(start, len(chunk.times)):
+            topic_id = chunk.topic_ids[i]
+            if topic_ids is not None and topic_id not in topic_ids:
+                continue
+            info = self.topics.get(topic_id, {})
+            yield (chunk.times[i], info.get("topic", ""), info.get("message_type", "unknown"),
+                   chunk.payload(i), topic_id)
+
+    def iter_messages(self, position: Tuple[int, int] = (0, 0), topics: Optional[Set[str]] = None,
+                      end_time: Optional[float] = None) -> Iterator[Tuple[float, str, str, memoryview, int]]:
+        """从指定位置遍历消息，产出 (timestamp, topic, message_type, payload, topic_id)
+
+        topics 为话题名集合（可在遍历过程中修改），不包含相关话题的块直接跳过，不解压。
+        """
+        chunk_index, message_index = position
+        while chunk_index < len(self._chunk_meta):
+            chunk_start, _, chunk_ids = self._chunk_meta[chunk_index]
+            if end_time is not None and chunk_start > end_time:
+                return
+            topic_ids = self._topic_ids_for(topics)
+            if topic_ids is None or chunk_ids is None or not chunk_ids.isdisjoint(topic_ids):
+                for message in self.iter_chunk(chunk_index, topics, message_index):
+                    if end_time is not None and message[0] > end_time:
+                        return
+                    yield message
+            chunk_index += 1
+            message_index = 0
+
+    def close(self):
+        self._cache.clear()
+        if isinstance(self._mmap, mmap.mmap):
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 仍有载荷视图引用映射区域，交由垃圾回收释放
+                pass
+        self._file.close()
+
+
+class LogReader(ChunkedLogReader):
+    """通过内存映射读取 .tlog 文件；只解析索引，块按需解压"""
+
+    def __init__(self, path: str, cache_chunks: int = 4):
+        super().__init__(path, cache_chunks)
+        self.index = read_index(self._mmap)
+
+        self.topics = {int(k): v for k, v in self.index.get("topics", {}).items()}
+        self.chunks: List[List[Any]] = self.index.get("chunks", [])
+        # 块按时间顺序写入，索引顺序即时间顺序
+        self._chunk_meta = [(c[1], c[2], {int(k) for k in c[4]}) for c in self.chunks]
+        self._build_lookup()
+
+    @property
+    def message_count(self) -> int:
+        return int(self.index.get("message_count", 0))
+
+    def _load_chunk(self, chunk_index: int) -> MessageChunk:
+        raw = decompress_chunk(self._mmap, self.chunks[chunk_index][0])
+        times, topic_ids, starts, lengths = [], [], [], []
+        pos = 0
+        size = len(raw)
+        header_size = MESSAGE_HEADER.size
+        while pos + header_size <= size:
+            timestamp, topic_id, length = MESSAGE_HEADER.unpack_from(raw, pos)
+            times.append(timestamp)
+            topic_ids.append(topic_id)
+            starts.append(pos + header_size)
+            lengths.append(length)
+            pos += header_size + length
+        return MessageChunk(raw, times, topic_ids, starts, lengths)
+
+    def decode(self, topic_id: int, payload: memoryview) -> Any:
+        return json.loads(bytes(payload))
@@ -0,0 +1,248 @@
+"""MCAP 读取器，无需安装 ROS 或 mcap 库
+
+优先读取文件尾部的 Summary 区（Schema / Channel / ChunkIndex / Statistics），
+缺少 Summary 时退化为顺序扫描（需解压一遍块以发现其中的 Channel 与消息数）。
+支持 ros1 与 cdr（ROS2）编码的消息解码，json 编码直接解析。
+"""
+import json
+import struct
+import time
+from typing import Dict, Any, List, Tuple
+from .log_reader import ChunkedLogReader, MessageChunk
+from .ros_msg import MessageDecoder
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+MCAP_MAGIC = b"\x89MCAP0\r\n"
+
+OP_HEADER = 0x01
+OP_FOOTER = 0x02
+OP_SCHEMA = 0x03
+OP_CHANNEL = 0x04
+OP_MESSAGE = 0x05
+OP_CHUNK = 0x06
+OP_CHUNK_INDEX = 0x08
+OP_STATISTICS = 0x0B
+
+_RECORD = struct.Struct("<BQ")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_FOOTER = struct.Struct("<QQI")
+_MESSAGE = struct.Struct("<HIQQ")
+_CHUNK_HEADER = struct.Struct("<QQQI")
+_CHUNK_INDEX = struct.Struct("<QQQQ")
+
+# 无块（unchunked）文件中，顶层消息按此数量分组为虚拟块
+_UNCHUNKED_GROUP = 1000
+
+_ROS_SCHEMA_ENCODINGS = {('ros1', 'ros1msg'): 'ros1', ('cdr', 'ros2msg'): 'cdr'}
+
+
+def _string(buf, pos: int) -> Tuple[str, int]:
+    (length,) = _U32.unpack_from(buf, pos)
+    pos += 4
+    return bytes(buf[pos:pos + length]).decode('utf-8', errors='replace'), pos + length
+
+
+def _iter_records(buf, start: int, end: int):
+    """遍历 [start, end) 内的记录，产出 (opcode, 内容起始, 内容长度)"""
+    pos = start
+    while pos + _RECORD.size <= end:
+        opcode, length = _RECORD.unpack_from(buf, pos)
+        content = pos + _RECORD.size
+        if content + length > end:
+            return
+        yield opcode, content, length
+        pos = content + length
+
+
+class McapReader(ChunkedLogReader):
+    """通过内存映射读取 .mcap 文件"""
+
+    def __init__(self, path: str, cache_chunks: int = 4):
+        super().__init__(path, cache_chunks)
+        buf = self._mmap
+        if bytes(buf[:len(MCAP_MAGIC)]) != MCAP_MAGIC:
+            raise ValueError("Not an MCAP file")
+
+        self._schemas: Dict[int, Dict[str, Any]] = {}
+        self._decoders: Dict[int, Any] = {}
+        # 每个块: (起始时间, 结束时间, 通道集合, 块记录偏移)；无块文件的虚拟块以消息位置列表代替偏移
+        self._chunks: List[Tuple[float, float, set, Any]] = []
+
+        if not self._read_summary():
+            self._scan()
+
+        self._chunks.sort(key=lambda c: c[0])
+        self._chunk_meta = [(c[0], c[1], c[2]) for c in self._chunks]
+        self._build_lookup()
+
+    # --- 索引 ---
+
+    def _read_summary(self) -> bool:
+        buf = self._mmap
+        footer_pos = len(buf) - len(MCAP_MAGIC) - _RECORD.size - _FOOTER.size
+        if footer_pos < len(MCAP_MAGIC) or bytes(buf[-len(MCAP_MAGIC):]) != MCAP_MAGIC:
+            return False
+        opcode, _ = _RECORD.unpack_from(buf, footer_pos)
+        if opcode != OP_FOOTER:
+            return False
+        summary_start, summary_offset_start, _ = _FOOTER.unpack_from(buf, footer_pos + _RECORD.size)
+        if summary_start == 0:
+            return False
+
+        summary_end = summary_offset_start or footer_pos
+        for opcode, content, length in _iter_records(buf, summary_start, summary_end):
+            if opcode in (OP_SCHEMA, OP_CHANNEL):
+                self._read_definition_record(opcode, content)
+            elif opcode == OP_CHUNK_INDEX:
+                start, end, chunk_offset, _ = _CHUNK_INDEX.unpack_from(buf, content)
+                (map_len,) = _U32.unpack_from(buf, content + _CHUNK_INDEX.size)
+                map_start = content + _CHUNK_INDEX.size + 4
+                channels = {_U16.unpack_from(buf, p)[0] for p in range(map_start, map_start + map_len, 10)}
+                self._chunks.append((start * 1e-9, end * 1e-9, channels, chunk_offset))
+            elif opcode == OP_STATISTICS:
+                self._read_statistics(content)
+        # 无 ChunkIndex（如无块文件）时仍需扫描定位消息
+        return bool(self._chunks)
+
+    def _read_statistics(self, content: int):
+        buf = self._mmap
+        # message_count u64, schema_count u16, channel_count u32, attachment_count u32,
+        # metadata_count u32, chunk_count u32, message_start_time u64, message_end_time u64
+        pos = content + 8 + 2 + 4 + 4 + 4 + 4 + 8 + 8
+        (map_len,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        for p in range(pos, pos + map_len, 10):
+            channel_id, count = struct.unpack_from("<HQ", buf, p)
+            if channel_id in self.topics:
+                self.topics[channel_id]["count"] = count
+
+    def _read_definition_record(self, opcode: int, content: int, buf=None):
+        buf = self._mmap if buf is None else buf
+        if opcode == OP_SCHEMA:
+            (schema_id,) = _U16.unpack_from(buf, content)
+            name, pos = _string(buf, content + 2)
+            encoding, pos = _string(buf, pos)
+            (data_len,) = _U32.unpack_from(buf, pos)
+            data = bytes(buf[pos + 4:pos + 4 + data_len])
+            self._schemas[schema_id] = {"name": name, "encoding": encoding, "data": data}
+        elif opcode == OP_CHANNEL:
+            channel_id, schema_id = struct.unpack_from("<HH", buf, content)
+            topic, pos = _string(buf, content + 4)
+            message_encoding, _ = _string(buf, pos)
+            if channel_id not in self.topics:
+                schema = self._schemas.get(schema_id, {})
+                self.topics[channel_id] = {
+                    "topic": topic,
+                    "message_type": schema.get("name") or "unknown",
+                    "schema_id": schema_id,
+                    "message_encoding": message_encoding,
+                    "count": 0,
+                }
+
+    def _scan(self):
+        """无 Summary 时顺序扫描整个文件重建索引"""
+        buf = self._mmap
+        for info in self.topics.values():
+            info["count"] = 0
+        loose: List[Tuple[float, int, int, int]] = []
+        for opcode, content, length in _iter_records(buf, len(MCAP_MAGIC), len(buf)):
+            if opcode in (OP_SCHEMA, OP_CHANNEL):
+                self._read_definition_record(opcode, content)
+            elif opcode == OP_CHUNK:
+                start, end, _, _ = _CHUNK_HEADER.unpack_from(buf, content)
+                offset = content - _RECORD.size
+                chunk = self._decode_chunk(offset)
+                for channel_id in chunk.topic_ids:
+                    if channel_id in self.topics:
+                        self.topics[channel_id]["count"] += 1
+                self._chunks.append((start * 1e-9, end * 1e-9, set(chunk.topic_ids), offset))
+            elif opcode == OP_MESSAGE:
+                channel_id, _, log_time, _ = _MESSAGE.unpack_from(buf, content)
+                loose.append((log_time * 1e-9, channel_id, content + _MESSAGE.size, length - _MESSAGE.size))
+                if channel_id in self.topics:
+                    self.topics[channel_id]["count"] += 1
+            elif opcode == OP_FOOTER:
+                break
+        for i in range(0, len(loose), _UNCHUNKED_GROUP):
+            group = loose[i:i + _UNCHUNKED_GROUP]
+            times = [g[0] for g in group]
+            self._chunks.append((min(times), max(times), {g[1] for g in group}, group))
+
+    # --- 块 ---
+
+    def _decompress(self, compression: str, data, size: int) -> bytes:
+        if compression == '':
+            return bytes(data)
+        if compression == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("zstd compressed MCAP requires the 'zstandard' package")
+            return zstandard.ZstdDecompressor().decompress(bytes(data), max_output_size=size)
+        if compression == 'lz4':
+            if lz4_frame is None:
+                raise RuntimeError("lz4 compressed MCAP requires the 'lz4' package")
+            return lz4_frame.decompress(bytes(data))
+        raise RuntimeError(f"Unsupported MCAP chunk compression: {compression}")
+
+    def _load_chunk(self, chunk_index: int) -> MessageChunk:
+        location = self._chunks[chunk_index][3]
+        if isinstance(location, list):
+            return MessageChunk.from_unsorted(self._mmap, list(location))
+        return self._decode_chunk(location)
+
+    def _decode_chunk(self, offset: int) -> MessageChunk:
+        buf = self._mmap
+        content = offset + _RECORD.size
+        _, _, uncompressed_size, _ = _CHUNK_HEADER.unpack_from(buf, content)
+        compression, pos = _string(buf, content + _CHUNK_HEADER.size)
+        (records_len,) = _U64.unpack_from(buf, pos)
+        raw = self._decompress(compression, buf[pos + 8:pos + 8 + records_len], uncompressed_size)
+
+        entries = []
+        for opcode, record, length in _iter_records(raw, 0, len(raw)):
+            if opcode == OP_MESSAGE:
+                channel_id, _, log_time, _ = _MESSAGE.unpack_from(raw, record)
+                entries.append((log_time * 1e-9, channel_id, record + _MESSAGE.size, length - _MESSAGE.size))
+            elif opcode in (OP_SCHEMA, OP_CHANNEL):
+                self._read_definition_record(opcode, record, raw)
+        return MessageChunk.from_unsorted(raw, entries)
+
+    # --- 解码 ---
+
+    def _decoder(self, channel_id: int):
+        decoder = self._decoders.get(channel_id)
+        if decoder is not None:
+            return decoder
+        info = self.topics[channel_id]
+        schema = self._schemas.get(info["schema_id"], {})
+        message_encoding = info["message_encoding"]
+        if message_encoding == 'json':
+            decoder = lambda payload: json.loads(bytes(payload))
+        else:
+            encoding = _ROS_SCHEMA_ENCODINGS.get((message_encoding, schema.get("encoding")))
+            if encoding is None:
+                raise RuntimeError(f"Unsupported MCAP encoding for {info['topic']}: "
+                                   f"{message_encoding}/{schema.get('encoding')}")
+            decoder = MessageDecoder(schema["data"].decode('utf-8'), schema["name"], encoding).decode
+        self._decoders[channel_id] = decoder
+        return decoder
+
+    def decode(self, topic_id: int, payload: memoryview) -> Dict[str, Any]:
+        info = self.topics[topic_id]
+        return {
+            'topic': info["topic"],
+            'type': 'generic',
+            'message_type': info["message_type"],
+            'data': self._decoder(topic_id)(payload),
+            'timestamp': time.time()
+        }
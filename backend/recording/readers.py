@@ -0,0 +1,20 @@
+import os
+from .log_reader import ChunkedLogReader, LogReader
+from .rosbag_reader import RosBagReader
+from .mcap_reader import McapReader
+
+# 扩展名 -> 读取器
+READERS = {
+    '.tlog': LogReader,
+    '.bag': RosBagReader,
+    '.mcap': McapReader,
+}
+
+
+def open_log(path: str) -> ChunkedLogReader:
+    """按扩展名打开 .tlog / .bag / .mcap 文件"""
+    extension = os.path.splitext(path)[1].lower()
+    reader_class = READERS.get(extension)
+    if reader_class is None:
+        raise ValueError(f"Unsupported file type: {extension or path}")
+    return reader_class(path)
@@ -0,0 +1,149 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from .log_format import LogWriter, list_log_files
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDINGS_DIR = os.path.join(BACKEND_DIR, "recordings")
+
+
+class Recorder:
+    """流式录制器：实时路径上只做入队，序列化、压缩与写盘都在后台线程完成"""
+
+    def __init__(self, recordings_dir: str = RECORDINGS_DIR, max_queue: int = 10000,
+                 chunk_size: int = 1 << 20, flush_interval: float = 1.0):
+        self.recordings_dir = recordings_dir
+        self.max_queue = max_queue
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+
+        self.is_recording = False
+        self.topic_filter: Optional[set] = None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._writer: Optional[LogWriter] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+        self.started_at: Optional[float] = None
+        self.dropped_messages = 0
+        self.current_file: Optional[str] = None
+
+    def start(self, filename: Optional[str] = None, topics: Optional[List[str]] = None) -> str:
+        """开始录制，返回文件名"""
+        with self._lock:
+            if self.is_recording:
+                raise RuntimeError(f"Already recording to {self.current_file}")
+
+            os.makedirs(self.recordings_dir, exist_ok=True)
+            if not filename:
+                filename = datetime.now().strftime("recording_%Y%m%d_%H%M%S")
+            filename = os.path.basename(filename)
+            if not filename.endswith('.tlog'):
+                filename += '.tlog'
+            path = os.path.join(self.recordings_dir, filename)
+            if os.path.exists(path):
+                raise FileExistsError(f"Recording '{filename}' already exists")
+
+            # 丢弃上次停止后残留在队列中的消息
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._writer = LogWriter(path, chunk_size=self.chunk_size)
+            self.topic_filter = set(topics) if topics else None
+            self.current_file = filename
+            self.started_at = time.time()
+            self.dropped_messages = 0
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._writer_loop, name="tlog-writer", daemon=True)
+            self._thread.start()
+            self.is_recording = True
+            print(f"[Recorder] Recording started: {path}")
+            return filename
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """停止录制：排空队列、写出索引并关闭文件
+
+        会等待写线程排空队列，在事件循环中应通过 asyncio.to_thread 调用。
+        """
+        with self._lock:
+            if not self.is_recording:
+                return None
+            self.is_recording = False
+            self._stop_event.set()
+            self._thread.join()
+            status = self._status_locked()
+            self._writer = None
+            self._thread = None
+            print(f"[Recorder] Recording stopped: {status['file']}")
+            return status
+
+    def record(self, topic: str, data: Any, message_type: str = None):
+        """实时路径调用：仅入队引用，序列化与 I/O 在写线程中进行
+
+        消息字典发出后视为不可变（插件通过写时复制的 Message 修改，见 plugins.message），
+        写线程稍后读取时内容不会变化。
+        """
+        if not self.is_recording:
+            return
+        if self.topic_filter is not None and topic not in self.topic_filter:
+            return
+        try:
+            self._queue.put_nowait((time.time(), topic, data, message_type))
+        except queue.Full:
+            self.dropped_messages += 1
+
+    def _writer_loop(self):
+        writer = self._writer
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if item is not None:
+                timestamp, topic, data, message_type = item
+                try:
+                    if not message_type and isinstance(data, dict):
+                        message_type = data.get('message_type')
+                    payload = json.dumps(data).encode('utf-8')
+                    writer.write_message(topic, message_type or 'unknown', timestamp, payload)
+                except Exception as e:
+                    print(f"[Recorder] Failed to record message on {topic}: {e}")
+
+            # 定期落盘，限制异常退出时丢失的数据量
+            pending = writer.pending_since
+            if pending is not None and time.time() - pending >= self.flush_interval:
+                writer.flush_chunk()
+
+            if self._stop_event.is_set() and self._queue.empty():
+                break
+
+        writer.close()
+
+    def _status_locked(self) -> Dict[str, Any]:
+        writer = self._writer
+        return {
+            "recording": self.is_recording,
+            "file": self.current_file,
+            "started_at": self.started_at,
+            "duration": (time.time() - self.started_at) if self.started_at else 0.0,
+            "message_count": writer.message_count if writer else 0,
+            "bytes_written": writer.bytes_written if writer else 0,
+            "queued_messages": self._queue.qsize(),
+            "dropped_messages": self.dropped_messages,
+            "topics": sorted(self.topic_filter) if self.topic_filter else None,
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取录制状态"""
+        if not self.is_recording:
+            return {"recording": False, "file": self.current_file, "dropped_messages": self.dropped_messages}
+        return self._status_locked()
+
+    def list_recordings(self) -> List[Dict[str, Any]]:
+        """列出所有录制文件"""
+        return list_log_files(self.recordings_dir)
@@ -0,0 +1,215 @@
+"""无需 ROS 环境的消息解码：根据录制文件内嵌的消息定义解析 ROS1 序列化与 ROS2 CDR 数据
+
+输出格式与 rosbridge 保持一致：uint8[]/char[] 数组编码为 base64 字符串，NaN/Inf 转为 None。
+"""
+import base64
+import math
+import re
+import struct
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+# 基础类型: struct 格式字符与字节数
+_PRIMITIVES: Dict[str, Tuple[str, int]] = {
+    'bool': ('?', 1),
+    'int8': ('b', 1),
+    'uint8': ('B', 1),
+    'char': ('B', 1),
+    'int16': ('h', 2),
+    'uint16': ('H', 2),
+    'int32': ('i', 4),
+    'uint32': ('I', 4),
+    'int64': ('q', 8),
+    'uint64': ('Q', 8),
+    'float32': ('f', 4),
+    'float64': ('d', 8),
+}
+_STRING_TYPES = ('string', 'wstring')
+_ROS1_TIME_TYPES = ('time', 'duration')
+
+_TYPE_RE = re.compile(r'^([\w/]+)(?:<=\d+)?(\[(<=)?(\d*)\])?$')
+_CONSTANT_RE = re.compile(r'^\s*\w+\s*=')
+
+
+def normalize_type_name(type_name: str) -> str:
+    """将 ROS2 风格的 pkg/msg/Type 统一为 pkg/Type"""
+    return type_name.replace('/msg/', '/')
+
+
+class _Field:
+    __slots__ = ('name', 'base', 'is_array', 'length')
+
+    def __init__(self, name: str, base: str, is_array: bool, length: Optional[int]):
+        self.name = name
+        self.base = base
+        self.is_array = is_array
+        self.length = length
+
+
+def parse_definitions(definition: str, root_type: str) -> Dict[str, List[_Field]]:
+    """解析（包含依赖的）消息定义文本，返回 类型名 -> 字段列表"""
+    sections: List[Tuple[str, List[str]]] = []
+    current_type = normalize_type_name(root_type)
+    current_lines: List[str] = []
+    for line in definition.splitlines():
+        stripped = line.strip()
+        if stripped and set(stripped) == {'='}:
+            sections.append((current_type, current_lines))
+            current_type, current_lines = None, []
+            continue
+        if current_type is None and stripped.startswith('MSG:'):
+            current_type = normalize_type_name(stripped[4:].strip())
+            continue
+        current_lines.append(line)
+    if current_type is not None:
+        sections.append((current_type, current_lines))
+
+    types: Dict[str, List[_Field]] = {}
+    for type_name, lines in sections:
+        package = type_name.split('/')[0] if '/' in type_name else ''
+        fields = []
+        for line in lines:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            tokens = line.split(None, 1)
+            if len(tokens) < 2:
+                continue
+            type_token, rest = tokens
+            if _CONSTANT_RE.match(rest):
+                continue
+            name = rest.split()[0]
+            match = _TYPE_RE.match(type_token)
+            if not match:
+                continue
+            base, array_part, bounded, size = match.group(1), match.group(2), match.group(3), match.group(4)
+            base = _resolve_type(base, package)
+            length = int(size) if (array_part and size and not bounded) else None
+            fields.append(_Field(name, base, bool(array_part), length))
+        types[type_name] = fields
+    return types
+
+
+def _resolve_type(base: str, package: str) -> str:
+    if base in _PRIMITIVES or base in _STRING_TYPES or base in _ROS1_TIME_TYPES or base == 'byte':
+        return base
+    if base == 'Header':
+        return 'std_msgs/Header'
+    if '/' not in base:
+        return f"{package}/{base}" if package else base
+    return normalize_type_name(base)
+
+
+class MessageDecoder:
+    """按消息定义解码二进制消息
+
+    encoding: 'ros1'（ROS1 序列化，小端、无对齐）或 'cdr'（ROS2 CDR，带 4 字节封装头与对齐）
+    """
+
+    def __init__(self, definition: str, type_name: str, encoding: str = 'ros1'):
+        if encoding not in ('ros1', 'cdr'):
+            raise ValueError(f"Unsupported message encoding: {encoding}")
+        self.type_name = normalize_type_name(type_name)
+        self.encoding = encoding
+        self.types = parse_definitions(definition, type_name)
+        if self.type_name not in self.types:
+            raise ValueError(f"Definition for {type_name} not found")
+        # ROS1 中 byte 为 int8，ROS2 中 byte 为 octet(uint8)
+        self._byte_type = 'int8' if encoding == 'ros1' else 'uint8'
+
+    def decode(self, data) -> Dict[str, Any]:
+        buf = memoryview(data)
+        if self.encoding == 'cdr':
+            little = len(buf) > 1 and buf[1] & 0x01 == 1
+            state = _State(buf, 4, '<' if little else '>', cdr=True)
+        else:
+            state = _State(buf, 0, '<', cdr=False)
+        return self._decode_type(self.type_name, state)
+
+    def _decode_type(self, type_name: str, state: "_State") -> Dict[str, Any]:
+        fields = self.types.get(type_name)
+        if fields is None:
+            raise ValueError(f"Unknown message type in definition: {type_name}")
+        result = {}
+        for field in fields:
+            if field.is_array:
+                result[field.name] = self._decode_array(field, state)
+            else:
+                result[field.name] = self._decode_single(field.base, state)
+        return result
+
+    def _decode_single(self, base: str, state: "_State") -> Any:
+        if base == 'byte':
+            base = self._byte_type
+        primitive = _PRIMITIVES.get(base)
+        if primitive is not None:
+            value = state.primitive(*primitive)
+            if isinstance(value, float) and not math.isfinite(value):
+                return None
+            return value
+        if base in _STRING_TYPES:
+            return state.string()
+        if base in _ROS1_TIME_TYPES:
+            fmt = 'I' if base == 'time' else 'i'
+            secs = state.primitive(fmt, 4)
+            nsecs = state.primitive(fmt, 4)
+            return {'secs': secs, 'nsecs': nsecs}
+        return self._decode_type(base, state)
+
+    def _decode_array(self, field: _Field, state: "_State") -> Any:
+        count = field.length if field.length is not None else state.primitive('I', 4)
+        base = self._byte_type if field.base == 'byte' else field.base
+        primitive = _PRIMITIVES.get(base)
+        if primitive is not None:
+            fmt, size = primitive
+            raw = state.raw(count, size)
+            if base in ('uint8', 'char'):
+                return base64.b64encode(raw.tobytes()).decode('ascii')
+            array = np.frombuffer(raw, dtype=np.dtype(state.endian + fmt), count=count)
+            if array.dtype.kind == 'f' and not np.isfinite(array).all():
+                values = array.astype(object)
+                values[~np.isfinite(array)] = None
+                return values.tolist()
+            return array.tolist()
+        return [self._decode_single(field.base, state) for _ in range(count)]
+
+
+class _State:
+    """解码游标"""
+
+    __slots__ = ('buf', 'pos', 'origin', 'endian', 'cdr')
+
+    def __init__(self, buf: memoryview, origin: int, endian: str, cdr: bool):
+        self.buf = buf
+        self.pos = origin
+        self.origin = origin
+        self.endian = endian
+        self.cdr = cdr
+
+    def _align(self, size: int):
+        if self.cdr and size > 1:
+            self.pos += (-(self.pos - self.origin)) % size
+
+    def primitive(self, fmt: str, size: int):
+        self._align(size)
+        (value,) = struct.unpack_from(self.endian + fmt, self.buf, self.pos)
+        self.pos += size
+        return value
+
+    def raw(self, count: int, size: int) -> memoryview:
+        if count:
+            self._align(size)
+        start = self.pos
+        self.pos += count * size
+        if self.pos > len(self.buf):
+            raise ValueError("Message buffer too short")
+        return self.buf[start:self.pos]
+
+    def string(self) -> str:
+        length = self.primitive('I', 4)
+        start = self.pos
+        self.pos += length
+        raw = bytes(self.buf[start:self.pos])
+        if self.cdr and raw.endswith(b'\x00'):
+            raw = raw[:-1]
+        return raw.decode('utf-8', errors='replace')
@@ -0,0 +1,159 @@
+"""ROS1 bag (v2.0) 读取器，无需安装 ROS
+
+打开时仅解析文件头与末尾的索引区（连接记录 + 块信息记录），
+块在遍历时按需解压；消息只在实际发送时根据连接中的 message_definition 解码。
+"""
+import bz2
+import struct
+import time
+from typing import Dict, Any, List, Tuple
+from .log_reader import ChunkedLogReader, MessageChunk
+from .ros_msg import MessageDecoder
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+BAG_MAGIC = b"#ROSBAG V2.0\n"
+
+OP_MSG_DATA = 0x02
+OP_BAG_HEADER = 0x03
+OP_INDEX_DATA = 0x04
+OP_CHUNK = 0x05
+OP_CHUNK_INFO = 0x06
+OP_CONNECTION = 0x07
+
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_TIME = struct.Struct("<II")
+
+
+def _parse_header(buf) -> Dict[str, bytes]:
+    """解析 name=value 形式的记录头"""
+    fields = {}
+    pos = 0
+    size = len(buf)
+    while pos + 4 <= size:
+        (length,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        field = bytes(buf[pos:pos + length])
+        pos += length
+        name, _, value = field.partition(b'=')
+        fields[name.decode('ascii', errors='replace')] = value
+    return fields
+
+
+def _to_time(value: bytes) -> float:
+    secs, nsecs = _TIME.unpack_from(value)
+    return secs + nsecs * 1e-9
+
+
+class RosBagReader(ChunkedLogReader):
+    """通过内存映射读取 ROS1 .bag 文件"""
+
+    def __init__(self, path: str, cache_chunks: int = 4):
+        super().__init__(path, cache_chunks)
+        buf = self._mmap
+        if bytes(buf[:len(BAG_MAGIC)]) != BAG_MAGIC:
+            raise ValueError("Not a ROS bag v2.0 file")
+
+        header, _, _, _ = self._read_record(len(BAG_MAGIC))
+        if header.get('op') != bytes([OP_BAG_HEADER]):
+            raise ValueError("Missing bag header record")
+        (index_pos,) = _U64.unpack_from(header['index_pos'])
+        if index_pos == 0:
+            raise ValueError("Bag file is not indexed (run 'rosbag reindex')")
+
+        self._definitions: Dict[int, Tuple[str, str]] = {}
+        self._decoders: Dict[int, MessageDecoder] = {}
+        chunk_infos: List[Tuple[float, float, set, int]] = []
+
+        pos = index_pos
+        size = len(buf)
+        while pos + 8 <= size:
+            header, data_start, data_len, pos = self._read_record(pos)
+            op = header.get('op', b'\x00')[0]
+            if op == OP_CONNECTION:
+                (conn_id,) = _U32.unpack_from(header['conn'])
+                fields = _parse_header(buf[data_start:data_start + data_len])
+                topic = header.get('topic', fields.get('topic', b'')).decode('utf-8')
+                message_type = fields.get('type', b'unknown').decode('utf-8')
+                self.topics[conn_id] = {
+                    "topic": topic,
+                    "message_type": message_type,
+                    "md5sum": fields.get('md5sum', b'').decode('ascii', errors='replace'),
+                    "count": 0,
+                }
+                self._definitions[conn_id] = (fields.get('message_definition', b'').decode('utf-8', errors='replace'),
+                                              message_type)
+            elif op == OP_CHUNK_INFO:
+                (chunk_pos,) = _U64.unpack_from(header['chunk_pos'])
+                conn_ids = set()
+                for i in range(0, data_len - 7, 8):
+                    conn_id, count = struct.unpack_from("<II", buf, data_start + i)
+                    conn_ids.add(conn_id)
+                    if conn_id in self.topics:
+                        self.topics[conn_id]["count"] += count
+                chunk_infos.append((_to_time(header['start_time']), _to_time(header['end_time']), conn_ids, chunk_pos))
+
+        chunk_infos.sort(key=lambda c: c[0])
+        self._chunk_positions = [c[3] for c in chunk_infos]
+        self._chunk_meta = [(c[0], c[1], c[2]) for c in chunk_infos]
+        self._build_lookup()
+
+    def _read_record(self, pos: int) -> Tuple[Dict[str, bytes], int, int, int]:
+        """读取位于 pos 的记录，返回 (记录头, 数据起始, 数据长度, 下一条记录位置)"""
+        buf = self._mmap
+        (header_len,) = _U32.unpack_from(buf, pos)
+        header = _parse_header(buf[pos + 4:pos + 4 + header_len])
+        data_pos = pos + 4 + header_len
+        (data_len,) = _U32.unpack_from(buf, data_pos)
+        return header, data_pos + 4, data_len, data_pos + 4 + data_len
+
+    def _load_chunk(self, chunk_index: int) -> MessageChunk:
+        header, data_start, data_len, _ = self._read_record(self._chunk_positions[chunk_index])
+        compression = header.get('compression', b'none').decode('ascii')
+        data = self._mmap[data_start:data_start + data_len]
+        if compression == 'bz2':
+            raw = bz2.decompress(data)
+        elif compression == 'lz4':
+            if lz4_frame is None:
+                raise RuntimeError("lz4 compressed bag requires the 'lz4' package")
+            raw = lz4_frame.decompress(data)
+        elif compression == 'none':
+            raw = data
+        else:
+            raise RuntimeError(f"Unsupported bag chunk compression: {compression}")
+
+        entries = []
+        pos = 0
+        size = len(raw)
+        while pos + 4 <= size:
+            (header_len,) = _U32.unpack_from(raw, pos)
+            header = _parse_header(memoryview(raw)[pos + 4:pos + 4 + header_len])
+            data_pos = pos + 4 + header_len
+            (length,) = _U32.unpack_from(raw, data_pos)
+            if header.get('op') == bytes([OP_MSG_DATA]):
+                (conn_id,) = _U32.unpack_from(header['conn'])
+                entries.append((_to_time(header['time']), conn_id, data_pos + 4, length))
+            pos = data_pos + 4 + length
+        return MessageChunk.from_unsorted(raw, entries)
+
+    def _decoder(self, conn_id: int) -> MessageDecoder:
+        decoder = self._decoders.get(conn_id)
+        if decoder is None:
+            definition, message_type = self._definitions[conn_id]
+            decoder = MessageDecoder(definition, message_type, 'ros1')
+            self._decoders[conn_id] = decoder
+        return decoder
+
+    def decode(self, topic_id: int, payload: memoryview) -> Dict[str, Any]:
+        info = self.topics[topic_id]
+        return {
+            'topic': info["topic"],
+            'type': 'generic',
+            'message_type': info["message_type"],
+            'data': self._decoder(topic_id).decode(payload),
+            'timestamp': time.time()
+        }
@@ -0,0 +1,207 @@
+"""录制数据的时间范围查询：提取某话题的数值字段，并在服务端降采样
+
+字段值按块缓存（文件 + 话题 + 字段 + 块序号），缩放/平移只需解码尚未缓存的块，
+之后的查询只做 searchsorted 与降采样。
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from .log_reader import ChunkedLogReader
+from .readers import open_log, READERS
+
+_PATH_TOKEN_RE = re.compile(r'[^.\[\]]+')
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+
+def parse_field_path(field: str) -> List[Any]:
+    """将 'pose.position.x' 或 'ranges[3]' 解析为访问路径"""
+    tokens = _PATH_TOKEN_RE.findall(field)
+    if not tokens:
+        raise ValueError(f"Invalid field path: '{field}'")
+    return [int(t) if t.isdigit() else t for t in tokens]
+
+
+def extract_value(message: Any, path: List[Any]) -> Optional[float]:
+    """按路径取值，非数值或路径不存在时返回 None"""
+    value = message
+    for key in path:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def lttb(times: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets 降采样，返回保留点的下标"""
+    size = len(times)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    every = (size - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, size)
+        if end < next_end:
+            avg_t = times[end:next_end].mean()
+            avg_v = values[end:next_end].mean()
+        else:
+            avg_t, avg_v = times[-1], values[-1]
+        area = np.abs((times[a] - avg_t) * (values[start:end] - values[a]) -
+                      (times[a] - times[start:end]) * (avg_v - values[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = size - 1
+    return selected
+
+
+def minmax(times: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """按桶保留最小值与最大值（保持时间顺序），返回保留点的下标"""
+    size = len(times)
+    buckets = threshold // 2
+    if threshold >= size or buckets < 1:
+        return np.arange(size)
+
+    edges = np.linspace(0, size, buckets + 1).astype(np.int64)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = values[start:end]
+        lo = start + int(np.argmin(bucket))
+        hi = start + int(np.argmax(bucket))
+        selected.extend((lo, hi) if lo < hi else (hi, lo) if hi < lo else (lo,))
+    return np.asarray(selected, dtype=np.int64)
+
+
+class SeriesStore:
+    """录制文件数值序列查询，带读取器与按块的字段缓存"""
+
+    def __init__(self, directory: str, max_cached_points: int = 4_000_000, max_open_readers: int = 4):
+        self.directory = directory
+        self.max_cached_points = max_cached_points
+        self.max_open_readers = max_open_readers
+        self._readers: "OrderedDict[str, Tuple[Tuple[int, int], ChunkedLogReader]]" = OrderedDict()
+        self._segments: "OrderedDict[tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._cached_points = 0
+        self._lock = threading.Lock()
+
+    def _resolve(self, file_name: str) -> str:
+        name = os.path.basename(file_name)
+        if os.path.splitext(name)[1].lower() not in READERS:
+            raise ValueError(f"Unsupported file type: {name}")
+        path = os.path.join(self.directory, name)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Recording '{name}' not found")
+        return path
+
+    def _reader(self, path: str) -> Tuple[Tuple[int, int], ChunkedLogReader]:
+        """获取读取器；文件被改写（如仍在录制）时重新打开"""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._readers.get(path)
+        if cached is not None and cached[0] == signature:
+            self._readers.move_to_end(path)
+            return cached
+        if cached is not None:
+            cached[1].close()
+        entry = (signature, open_log(path))
+        self._readers[path] = entry
+        while len(self._readers) > self.max_open_readers:
+            _, (_, old) = self._readers.popitem(last=False)
+            old.close()
+        return entry
+
+    def _segment(self, reader: ChunkedLogReader, key: tuple, chunk_index: int,
+                 topic: str, path: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        segment = self._segments.get(key)
+        if segment is not None:
+            self._segments.move_to_end(key)
+            return segment
+
+        times, values = [], []
+        for timestamp, _, _, payload, topic_id in reader.iter_chunk(chunk_index, {topic}):
+            message = reader.decode(topic_id, payload)
+            # 录制内容为消息信封，字段路径相对于消息体
+            if isinstance(message, dict) and 'message_type' in message and 'data' in message:
+                message = message['data']
+            value = extract_value(message, path)
+            if value is not None:
+                times.append(timestamp)
+                values.append(value)
+        segment = (np.asarray(times, dtype=np.float64), np.asarray(values, dtype=np.float64))
+        if len(times) > 1 and np.any(np.diff(segment[0]) < 0):
+            order = np.argsort(segment[0], kind='stable')
+            segment = (segment[0][order], segment[1][order])
+
+        self._segments[key] = segment
+        self._cached_points += len(times)
+        while self._cached_points > self.max_cached_points and len(self._segments) > 1:
+            _, (old_times, _) = self._segments.popitem(last=False)
+            self._cached_points -= len(old_times)
+        return segment
+
+    def query(self, file_name: str, topic: str, field: str, t0: Optional[float] = None,
+              t1: Optional[float] = None, max_points: int = 2000, method: str = 'lttb') -> Dict[str, Any]:
+        """查询 [t0, t1] 内 topic 的 field 数值序列，超过 max_points 时降采样"""
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"Unknown downsampling method: '{method}'")
+        field_path = parse_field_path(field)
+        path = self._resolve(file_name)
+
+        with self._lock:
+            signature, reader = self._reader(path)
+            if topic not in reader.topic_ids:
+                raise KeyError(f"Topic '{topic}' not found in recording")
+            parts = [self._segment(reader, (path, signature, topic, field, chunk_index), chunk_index, topic, field_path)
+                     for chunk_index in reader.chunks_between(t0, t1, {topic})]
+
+        if parts:
+            times = np.concatenate([p[0] for p in parts])
+            values = np.concatenate([p[1] for p in parts])
+            # 块时间范围可能重叠
+            if len(parts) > 1 and np.any(np.diff(times) < 0):
+                order = np.argsort(times, kind='stable')
+                times, values = times[order], values[order]
+            lo = 0 if t0 is None else int(np.searchsorted(times, t0, side='left'))
+            hi = len(times) if t1 is None else int(np.searchsorted(times, t1, side='right'))
+            times, values = times[lo:hi], values[lo:hi]
+        else:
+            times = values = np.empty(0)
+
+        total = len(times)
+        if total > max_points:
+            keep = lttb(times, values, max_points) if method == 'lttb' else minmax(times, values, max_points)
+            times, values = times[keep], values[keep]
+
+        return {
+            "topic": topic,
+            "field": field,
+            "t0": t0,
+            "t1": t1,
+            "method": method,
+            "total_points": total,
+            "downsampled": total > len(times),
+            "timestamps": times.tolist(),
+            "values": values.tolist(),
+        }
+
+    def close(self):
+        with self._lock:
+            for _, reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            self._segments.clear()
+            self._cached_points = 0
@@ -5,6 +5,9 @@ from fastapi.testclient import TestClient
 # 我们需要调整一下路径，以便能够从tests目录导入backend中的app
 import sys
 import os
+import time
+import json
+import asyncio
 
 # 将 'backend' 目录添加到Python的模块搜索路径中
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -35,4 +38,92 @@ def test_get_available_adapters(client: TestClient):
     # 您还可以做更详细的检查，比如检查adapters列表是否不为空
     assert isinstance(data["adapters"], list)
     print("\nTest 'test_get_available_adapters' passed!")
-    print(f"Response: {data}")
\ No newline at end of file
+    print(f"Response: {data}")
+
+
+def test_plugin_stats_endpoint(client: TestClient):
+    """连接 mock 适配器后可获取插件统计"""
+    response = client.post("/api/connection/connect", json={"adapter": "mock", "config": {}})
+    assert response.status_code == 200
+    try:
+        client.post("/api/topics/subscribe", json={"topic": "/tf"})
+        # 插件在首条消息时初始化
+        for _ in range(50):
+            stats = client.get("/api/plugins/stats").json()
+            if stats["plugins"]:
+                break
+            time.sleep(0.1)
+        assert "plugins" in stats and "lanes" in stats
+        assert "MessageLoggerPlugin" in stats["plugins"]
+        assert {"calls", "p50_ms", "p95_ms", "p99_ms", "filtered", "errors"} <= set(stats["plugins"]["MessageLoggerPlugin"])
+        assert client.post("/api/plugins/stats/reset").json() == {"success": True}
+    finally:
+        client.post("/api/connection/disconnect")
+
+
+def test_tf_lookup_endpoint(client: TestClient):
+    """服务端 TF 缓冲的查询接口"""
+    from app_state import data_source_manager
+    buffer = data_source_manager.tf_buffer
+    buffer.set_transform({
+        "header": {"frame_id": "map", "stamp": {"secs": 5, "nsecs": 0}},
+        "child_frame_id": "base_link",
+        "transform": {"translation": {"x": 1.0, "y": 2.0, "z": 0.0}, "rotation": {"x": 0, "y": 0, "z": 0, "w": 1}}
+    })
+    try:
+        assert "base_link" in client.get("/api/tf/frames").json()["frames"]
+        response = client.get("/api/tf/lookup", params={"target": "map", "source": "base_link"})
+        assert response.status_code == 200
+        assert response.json()["translation"] == {"x": 1.0, "y": 2.0, "z": 0.0}
+        assert client.get("/api/tf/lookup", params={"target": "map", "source": "nowhere"}).status_code == 404
+    finally:
+        buffer.clear()
+
+
+def test_fixed_frame_is_chosen_per_client(client: TestClient):
+    """固定坐标系按客户端选择：只有选择的客户端收到预变换后的几何数据"""
+    from app_state import data_source_manager, manager
+
+    class _Client:
+        def __init__(self):
+            self.sent = []
+
+        async def send_text(self, text):
+            self.sent.append(json.loads(text))
+
+    buffer = data_source_manager.tf_buffer
+    buffer.set_transform({
+        "header": {"frame_id": "map", "stamp": {"secs": 5, "nsecs": 0}},
+        "child_frame_id": "base_link",
+        "transform": {"translation": {"x": 1.0, "y": 2.0, "z": 0.0}, "rotation": {"x": 0, "y": 0, "z": 0, "w": 1}}
+    })
+    in_map, in_robot = _Client(), _Client()
+    manager.active_connections.extend([in_map, in_robot])
+    try:
+        assert manager.set_fixed_frame(in_map, "/map") == "map"
+        assert data_source_manager.fixed_frames == ["map"]
+
+        pose = {"pose": {"position": {"x": 0.5, "y": 0.0, "z": 0.0}, "orientation": {"w": 1.0}}}
+        path = {"topic": "/plan", "message_type": "nav_msgs/Path",
+                "data": {"header": {"frame_id": "base_link"}, "poses": [pose]}}
+        asyncio.run(manager.broadcast_data("/plan", path, data_source_manager.to_fixed_frame))
+        transformed = in_map.sent[0]["data"]["data"]
+        assert transformed["header"]["frame_id"] == "map"
+        assert transformed["poses"][0]["pose"]["position"]["x"] == 1.5
+        assert in_robot.sent[0]["data"] == path
+
+        manager.disconnect(in_map)
+        assert data_source_manager.fixed_frames == []
+    finally:
+        manager.disconnect(in_map)
+        manager.disconnect(in_robot)
+        buffer.clear()
+
+    with client.websocket_connect("/api/ws") as websocket:
+        websocket.send_text(json.dumps({"type": "set_fixed_frame", "data": {"frame": "odom"}}))
+        while True:
+            reply = websocket.receive_json()
+            if reply["type"] == "fixed_frame":
+                break
+        assert reply["data"] == {"frame": "odom"}
+        assert data_source_manager.fixed_frames == ["odom"]
@@ -4,10 +4,13 @@ import sys
 import os
 import shutil
 import json
+import asyncio
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from main import app
+from app_state import param_manager
+from params.change_notifier import ParamChangeNotifier
 
 # --- Test Constants ---
 TEST_CATEGORY = "test_suite_category"
@@ -27,7 +30,7 @@ def client():
         yield c
 
 @pytest.fixture(scope="function", autouse=True)
-def setup_and_teardown_test_environment():
+def setup_and_teardown_test_environment(client: TestClient):
     if os.path.exists(TEST_CATEGORY_DIR):
         shutil.rmtree(TEST_CATEGORY_DIR)
     os.makedirs(os.path.dirname(TEST_CONFIG_RAW_PATH), exist_ok=True)
@@ -61,6 +64,8 @@ def setup_and_teardown_test_environment():
 
     yield
 
+    # 写出延迟回写中的修改，避免其在下一个测试重建文件后才落盘
+    client.portal.call(param_manager.flush)
     if os.path.exists(TEST_CATEGORY_DIR):
         shutil.rmtree(TEST_CATEGORY_DIR)
 
@@ -149,6 +154,126 @@ def test_delete_parameter(client: TestClient):
     response = client.get(f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_RAW_NAME}/param", params={"path": path_to_delete})
     assert response.status_code == 404
 
+def test_batch_operations_apply_atomically(client: TestClient):
+    url = f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_RAW_NAME}/param/batch"
+    operations = [
+        {"op": "add", "path": ["group1"], "param_type": "boolean", "name": "flag", "value": True},
+        {"op": "update", "path": ["group1", "param1"], "value": 321},
+        {"op": "delete", "path": ["top_level_param"]},
+    ]
+    response = client.post(url, json={"operations": operations})
+    assert response.status_code == 200, response.text
+    version = response.json()["version"]
+
+    client.portal.call(param_manager.flush)
+    with open(TEST_CONFIG_RAW_PATH) as f:
+        saved = json.load(f)
+    assert saved["group1"]["param1"] == 321
+    assert saved["group1"]["flag"]["__value__"] is True
+    assert "top_level_param" not in saved
+
+    # 第二个操作失败时整批不生效
+    failing = [
+        {"op": "update", "path": ["group1", "param1"], "value": 0},
+        {"op": "delete", "path": ["group1", "missing"]},
+    ]
+    response = client.post(url, json={"operations": failing, "expected_version": version})
+    assert response.status_code == 400
+    assert response.json()["detail"]["index"] == 1
+    with open(TEST_CONFIG_RAW_PATH) as f:
+        assert json.load(f) == saved
+
+    response = client.post(url, json={"operations": operations[1:2], "expected_version": version - 1})
+    assert response.status_code == 409
+    assert response.json()["detail"]["current_version"] == version
+
+def test_write_behind_coalesces_updates(client: TestClient, monkeypatch):
+    monkeypatch.setattr(param_manager, "write_delay", 60)
+    url = f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_RAW_NAME}/param"
+    with open(TEST_CONFIG_RAW_PATH) as f:
+        original = json.load(f)
+
+    for value in (1, 2, 3):
+        response = client.patch(url, json={"path": ["group1", "param1"], "value": value})
+        assert response.status_code == 200, response.text
+
+    # 修改立即可读，但尚未落盘
+    response = client.get(url, params={"path": ["group1", "param1"], "field": "value"})
+    assert response.json() == {"value": 3}
+    with open(TEST_CONFIG_RAW_PATH) as f:
+        assert json.load(f) == original
+
+    assert client.portal.call(param_manager.flush)
+    with open(TEST_CONFIG_RAW_PATH) as f:
+        assert json.load(f)["group1"]["param1"] == 3
+    # 原子替换不残留临时文件
+    assert not [f for f in os.listdir(os.path.dirname(TEST_CONFIG_RAW_PATH)) if f.endswith('.tmp')]
+
+def test_failed_write_leaves_config_unchanged(client: TestClient, monkeypatch):
+    monkeypatch.setattr(param_manager, "write_delay", 0)
+    url = f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_RAW_NAME}/param"
+    response = client.patch(url, json={"path": ["group1", "param1"], "value": 5})
+    assert response.status_code == 200, response.text
+    version = param_manager.get_version(TEST_CONFIG_RAW_NAME, TEST_CATEGORY)
+
+    async def failing_save(name, config_data):
+        return False
+    monkeypatch.setattr(param_manager.get_adapter(TEST_CATEGORY), "save_config", failing_save)
+    response = client.patch(url, json={"path": ["group1", "param1"], "value": 6})
+    assert response.status_code == 500
+
+    # 失败的写入不可见，版本号不变，之后的 flush 也不会写出
+    response = client.get(url, params={"path": ["group1", "param1"], "field": "value"})
+    assert response.json() == {"value": 5}
+    assert param_manager.get_version(TEST_CONFIG_RAW_NAME, TEST_CATEGORY) == version
+    monkeypatch.undo()
+    assert client.portal.call(param_manager.flush)
+    with open(TEST_CONFIG_RAW_PATH) as f:
+        assert json.load(f)["group1"]["param1"] == 5
+
+def _receive_type(websocket, message_type):
+    while True:
+        message = websocket.receive_json()
+        if message["type"] == message_type:
+            return message
+
+def test_param_change_notifications_follow_subscribed_prefix(client: TestClient):
+    url = f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_STD_NAME}/param"
+    with client.websocket_connect("/api/ws") as websocket:
+        websocket.send_json({"type": "param_subscribe",
+                             "data": {"category": TEST_CATEGORY, "name": TEST_CONFIG_STD_NAME, "path": ["group1"]}})
+        version = _receive_type(websocket, "param_subscribed")["data"]["version"]
+
+        client.patch(url, json={"path": ["group1", "param1"], "value": 5})
+        event = _receive_type(websocket, "param_changed")["data"]
+        assert event["version"] == version + 1
+        # 带元数据的参数只推送变化的值
+        assert event["changes"] == [{"path": ["group1", "param1", "__value__"], "old": 456, "new": 5}]
+
+        # 订阅前缀之外的变化不推送
+        client.post(url, json={"parent_path": [], "param_type": "string", "name": "other", "value": "x"})
+        client.delete(url, params={"path": ["group1"]})
+        event = _receive_type(websocket, "param_changed")["data"]
+        assert event["version"] == version + 3
+        assert event["changes"][0]["path"] == ["group1"]
+        assert event["changes"][0]["new"] is None
+
+def test_tree_cache_reuses_parsed_tree_until_file_changes(client: TestClient):
+    """未修改的配置直接复用缓存的树，外部修改文件后重新加载。"""
+    # 将修改时间调到过去，避开刚写入文件时的不缓存窗口
+    os.utime(TEST_CONFIG_RAW_PATH, ns=(1_000_000_000, 1_000_000_000))
+    first = asyncio.run(param_manager.get_config_data(TEST_CONFIG_RAW_NAME, TEST_CATEGORY))
+    second = asyncio.run(param_manager.get_config_data(TEST_CONFIG_RAW_NAME, TEST_CATEGORY))
+    assert first is second
+
+    with open(TEST_CONFIG_RAW_PATH, 'w') as f:
+        json.dump({"group1": {"param1": 789}, "top_level_param": "hello"}, f)
+    os.utime(TEST_CONFIG_RAW_PATH, ns=(2_000_000_000, 2_000_000_000))
+
+    path_list = ["group1", "param1"]
+    response = client.get(f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_RAW_NAME}/param", params={"path": path_list, "field": "value"})
+    assert response.json() == {"value": 789}
+
 # --- Edit Session, Backup, Restore Tests ---
 
 def test_confirmable_edit_session_flow(client: TestClient):
@@ -190,6 +315,59 @@ def test_confirmable_edit_session_flow(client: TestClient):
     response = client.post(f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_RAW_NAME}/edit/revert")
     assert response.status_code == 404
 
+def test_backups_are_deduplicated_and_stored_as_deltas(client: TestClient):
+    base_url = f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_RAW_NAME}"
+    # 旧格式的整文件备份在首次访问时导入索引
+    legacy_name = f"{TEST_CONFIG_RAW_NAME}_20240101_000000.json"
+    with open(os.path.join(TEST_BACKUP_DIR, legacy_name), 'w') as f:
+        json.dump({"legacy": True}, f)
+
+    # 差异只在比完整内容小时才使用
+    client.put(base_url, json={"group1": {"param1": 123, "notes": "x" * 500}})
+    first = client.post(f"{base_url}/backups").json()["backup_name"]
+    # 内容未变化时不产生新备份
+    assert client.post(f"{base_url}/backups").json()["backup_name"] == first
+
+    client.patch(f"{base_url}/param", json={"path": ["group1", "param1"], "value": 1})
+    second = client.post(f"{base_url}/backups").json()["backup_name"]
+    assert second != first
+    assert client.get(f"{base_url}/backups").json()["backups"] == [second, first, legacy_name]
+
+    objects_dir = os.path.join(TEST_BACKUP_DIR, "objects")
+    stored = []
+    for object_file in os.listdir(objects_dir):
+        with open(os.path.join(objects_dir, object_file)) as f:
+            stored.append(json.load(f)["type"])
+    assert sorted(stored) == ["delta", "full", "full"]
+
+    assert client.post(f"{base_url}/restore", json={"backup_filename": first}).status_code == 200
+    response = client.get(f"{base_url}/param", params={"path": ["group1", "param1"], "field": "value"})
+    assert response.json() == {"value": 123}
+    assert client.post(f"{base_url}/restore", json={"backup_filename": legacy_name}).status_code == 200
+    assert client.get(base_url).json() == {"legacy": True}
+
+def test_backups_preserve_key_order(client: TestClient):
+    base_url = f"/api/params/configs/{TEST_CATEGORY}/{TEST_CONFIG_RAW_NAME}"
+    original = {f"k{i}": "x" * 20 for i in range(50)}
+    client.put(base_url, json=original)
+    first = client.post(f"{base_url}/backups").json()["backup_name"]
+
+    # 只调整顺序也是新内容，不被当作相同备份跳过
+    reversed_config = dict(reversed(list(original.items())))
+    client.put(base_url, json=reversed_config)
+    second = client.post(f"{base_url}/backups").json()["backup_name"]
+    assert second != first
+
+    reversed_config["k3"] = "changed"
+    client.put(base_url, json=reversed_config)
+    third = client.post(f"{base_url}/backups").json()["backup_name"]
+
+    # 以差异存储的备份恢复后顺序与备份时一致
+    assert client.post(f"{base_url}/restore", json={"backup_filename": third}).status_code == 200
+    assert list(client.get(base_url).json()) == list(reversed_config)
+    assert client.post(f"{base_url}/restore", json={"backup_filename": first}).status_code == 200
+    assert list(client.get(base_url).json()) == list(original)
+
 # --- Type API Tests (Keep as is) ---
 
 def test_get_param_types(client: TestClient):
@@ -211,4 +389,33 @@ def test_get_specific_param_type_template(client: TestClient):
 def test_get_non_existent_param_type(client: TestClient):
     """测试获取不存在的参数类型。"""
     response = client.get("/api/params/types/non_existent_type")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+def test_slow_subscriber_does_not_block_publish():
+    class SlowClient:
+        def __init__(self):
+            self.release = asyncio.Event()
+            self.sent = []
+
+        async def send_text(self, text):
+            await self.release.wait()
+            self.sent.append(json.loads(text)["data"]["version"])
+
+    async def run():
+        notifier = ParamChangeNotifier()
+        slow, fast = SlowClient(), SlowClient()
+        fast.release.set()
+        for client in (slow, fast):
+            notifier.subscribe(client, "c", "cfg")
+        for version in (1, 2, 3):
+            # publish 只入队，不等待慢客户端
+            await asyncio.wait_for(notifier.publish({"category": "c", "name": "cfg", "version": version,
+                                                     "changes": [{"path": ["p"], "old": 0, "new": version}]}), 0.1)
+        await asyncio.sleep(0)
+        assert fast.sent == [1, 2, 3] and slow.sent == []
+        slow.release.set()
+        await asyncio.sleep(0.01)
+        assert slow.sent == [1, 2, 3]
+        notifier.remove_client(slow)
+        notifier.remove_client(fast)
+
+    asyncio.run(run())
@@ -0,0 +1,245 @@
+import asyncio
+import bz2
+import base64
+import struct
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from recording.ros_msg import MessageDecoder
+from recording.rosbag_reader import RosBagReader
+from recording.mcap_reader import McapReader
+from adapters.bag_adapter import BagFileAdapter
+
+HEADER_DEF = "uint32 seq\ntime stamp\nstring frame_id\n"
+POINT_STAMPED_DEF = (
+    "Header header\nPoint point\n"
+    "================================================================================\n"
+    "MSG: std_msgs/Header\n" + HEADER_DEF +
+    "================================================================================\n"
+    "MSG: geometry_msgs/Point\nfloat64 x\nfloat64 y\nfloat64 z\n"
+)
+
+
+# --- ROS1 bag 构造 ---
+
+def _field(name, value):
+    body = name.encode() + b'=' + value
+    return struct.pack('<I', len(body)) + body
+
+
+def _record(fields, data):
+    header = b''.join(_field(k, v) for k, v in fields)
+    return struct.pack('<I', len(header)) + header + struct.pack('<I', len(data)) + data
+
+
+def _ros1_string(s):
+    return struct.pack('<I', len(s)) + s.encode()
+
+
+def _ros1_point(seq, stamp, x):
+    secs = int(stamp)
+    nsecs = int(round((stamp - secs) * 1e9))
+    return (struct.pack('<III', seq, secs, nsecs) + _ros1_string("map") + struct.pack('<ddd', x, 2.0, 3.0))
+
+
+def _write_bag(path, compression='none'):
+    connections = [
+        (0, "/chatter", "std_msgs/String", "string data\n"),
+        (1, "/point", "geometry_msgs/PointStamped", POINT_STAMPED_DEF),
+    ]
+    conn_records = []
+    for conn_id, topic, msg_type, definition in connections:
+        data = (_field('topic', topic.encode()) + _field('type', msg_type.encode()) +
+                _field('md5sum', b'*') + _field('message_definition', definition.encode()))
+        conn_records.append(_record([('op', b'\x07'), ('conn', struct.pack('<I', conn_id)),
+                                     ('topic', topic.encode())], data))
+
+    chunks = []
+    # 两个块，每块 10 条消息，块内故意乱序写入
+    for c in range(2):
+        body = b''.join(conn_records)
+        times = [100.0 + c * 10 + i for i in range(10)]
+        counts = {0: 0, 1: 0}
+        for i, t in reversed(list(enumerate(times))):
+            conn_id = i % 2
+            counts[conn_id] += 1
+            secs, nsecs = int(t), 0
+            payload = _ros1_string(f"hello {t:.0f}") if conn_id == 0 else _ros1_point(i, t, t)
+            body += _record([('op', b'\x02'), ('conn', struct.pack('<I', conn_id)),
+                             ('time', struct.pack('<II', secs, nsecs))], payload)
+        chunks.append((body, times[0], times[-1], counts))
+
+    out = bytearray(b"#ROSBAG V2.0\n")
+    bag_header_pos = len(out)
+    out += b'\x00' * 4096  # 预留 bag 头
+    chunk_infos = []
+    for body, start, end, counts in chunks:
+        chunk_pos = len(out)
+        data = bz2.compress(body) if compression == 'bz2' else body
+        out += _record([('op', b'\x05'), ('compression', compression.encode()),
+                        ('size', struct.pack('<I', len(body)))], data)
+        info_data = b''.join(struct.pack('<II', k, v) for k, v in counts.items())
+        chunk_infos.append(_record([('op', b'\x06'), ('ver', struct.pack('<I', 1)),
+                                    ('chunk_pos', struct.pack('<Q', chunk_pos)),
+                                    ('start_time', struct.pack('<II', int(start), 0)),
+                                    ('end_time', struct.pack('<II', int(end), 0)),
+                                    ('count', struct.pack('<I', len(counts)))], info_data))
+    index_pos = len(out)
+    out += b''.join(conn_records) + b''.join(chunk_infos)
+    header = _record([('op', b'\x03'), ('index_pos', struct.pack('<Q', index_pos)),
+                      ('conn_count', struct.pack('<I', 2)), ('chunk_count', struct.pack('<I', 2))], b'')
+    out[bag_header_pos:bag_header_pos + len(header)] = header
+    with open(path, 'wb') as f:
+        f.write(bytes(out))
+
+
+# --- MCAP 构造 ---
+
+def _mcap_str(s):
+    return struct.pack('<I', len(s)) + s.encode()
+
+
+def _mcap_record(opcode, content):
+    return struct.pack('<BQ', opcode, len(content)) + content
+
+
+def _cdr_point(stamp, x):
+    # 封装头(小端) + builtin_interfaces/Time + frame_id + 对齐到 8 的三个 float64
+    body = struct.pack('<iI', int(stamp), 0) + struct.pack('<I', 4) + b'map\x00'
+    body += b'\x00' * ((-len(body)) % 8)
+    return b'\x00\x01\x00\x00' + body + struct.pack('<ddd', x, 2.0, float('nan'))
+
+
+ROS2_POINT_DEF = (
+    "std_msgs/Header header\ngeometry_msgs/Point point\n"
+    "================================================================================\n"
+    "MSG: std_msgs/Header\nbuiltin_interfaces/Time stamp\nstring frame_id\n"
+    "================================================================================\n"
+    "MSG: builtin_interfaces/Time\nint32 sec\nuint32 nanosec\n"
+    "================================================================================\n"
+    "MSG: geometry_msgs/Point\nfloat64 x\nfloat64 y\nfloat64 z\n"
+)
+
+
+def _write_mcap(path, with_summary=True):
+    schema = _mcap_record(0x03, struct.pack('<H', 1) + _mcap_str("geometry_msgs/msg/PointStamped") +
+                          _mcap_str("ros2msg") + struct.pack('<I', len(ROS2_POINT_DEF)) + ROS2_POINT_DEF.encode())
+    channel = _mcap_record(0x04, struct.pack('<HH', 1, 1) + _mcap_str("/point") + _mcap_str("cdr") +
+                           struct.pack('<I', 0))
+    out = bytearray(b"\x89MCAP0\r\n")
+    out += _mcap_record(0x01, _mcap_str("") + _mcap_str("test"))
+
+    chunk_indexes = []
+    for c in range(3):
+        records = schema + channel
+        times = [50 + c * 5 + i for i in range(5)]
+        for t in times:
+            records += _mcap_record(0x05, struct.pack('<HIQQ', 1, 0, t * 10 ** 9, t * 10 ** 9) + _cdr_point(t, float(t)))
+        start, end = times[0] * 10 ** 9, times[-1] * 10 ** 9
+        content = struct.pack('<QQQI', start, end, len(records), 0) + _mcap_str("") + struct.pack('<Q', len(records)) + records
+        offset = len(out)
+        out += _mcap_record(0x06, content)
+        chunk_indexes.append(_mcap_record(0x08, struct.pack('<QQQQ', start, end, offset, len(out) - offset) +
+                                          struct.pack('<I', 10) + struct.pack('<HQ', 1, 0) +
+                                          struct.pack('<Q', 0) + _mcap_str("") + struct.pack('<QQ', len(records), len(records))))
+    out += _mcap_record(0x0F, b'')  # DataEnd
+
+    summary_start = 0
+    if with_summary:
+        summary_start = len(out)
+        stats = struct.pack('<QHIIIIQQ', 15, 1, 1, 0, 0, 3, 50 * 10 ** 9, 64 * 10 ** 9)
+        stats += struct.pack('<I', 10) + struct.pack('<HQ', 1, 15)
+        out += schema + channel + b''.join(chunk_indexes) + _mcap_record(0x0B, stats)
+    out += _mcap_record(0x02, struct.pack('<QQI', summary_start, 0, 0))
+    out += b"\x89MCAP0\r\n"
+    with open(path, 'wb') as f:
+        f.write(bytes(out))
+
+
+def test_ros1_decoder_handles_nested_arrays_and_nan():
+    definition = ("Header header\nfloat32[] ranges\nuint8[] data\nint32 CONST=5\nstring[2] names\n"
+                  "================================================================================\n"
+                  "MSG: std_msgs/Header\n" + HEADER_DEF)
+    payload = (struct.pack('<III', 7, 1, 2) + _ros1_string("laser") +
+               struct.pack('<I', 3) + struct.pack('<fff', 1.0, float('nan'), float('inf')) +
+               struct.pack('<I', 2) + b'\x01\x02' + _ros1_string("a") + _ros1_string("b"))
+    msg = MessageDecoder(definition, "test_msgs/Scan").decode(payload)
+
+    assert msg["header"] == {"seq": 7, "stamp": {"secs": 1, "nsecs": 2}, "frame_id": "laser"}
+    assert msg["ranges"] == [1.0, None, None]
+    assert base64.b64decode(msg["data"]) == b'\x01\x02'
+    assert msg["names"] == ["a", "b"]
+    assert "CONST" not in msg
+
+
+def test_rosbag_reader_indexes_and_decodes(tmp_path):
+    for compression in ('none', 'bz2'):
+        path = os.path.join(str(tmp_path), f"sample_{compression}.bag")
+        _write_bag(path, compression)
+        reader = RosBagReader(path)
+        try:
+            topics = {t["name"]: t for t in reader.get_topics()}
+            assert topics["/point"]["type"] == "geometry_msgs/PointStamped"
+            assert topics["/chatter"]["count"] == 10
+            assert reader.start_time == 100.0 and reader.end_time == 119.0
+
+            times = [m[0] for m in reader.iter_messages()]
+            assert times == sorted(times) and len(times) == 20
+
+            first = next(reader.iter_messages(reader.seek(112.0), topics={"/point"}))
+            assert first[0] == 113.0 and first[1] == "/point"
+            msg = reader.decode(first[4], first[3])
+            assert msg["message_type"] == "geometry_msgs/PointStamped"
+            assert msg["data"]["header"]["frame_id"] == "map"
+            assert msg["data"]["point"] == {"x": 113.0, "y": 2.0, "z": 3.0}
+        finally:
+            reader.close()
+
+
+def test_mcap_reader_uses_summary_and_cdr(tmp_path):
+    for with_summary in (True, False):
+        path = os.path.join(str(tmp_path), f"sample_{with_summary}.mcap")
+        _write_mcap(path, with_summary)
+        reader = McapReader(path)
+        try:
+            assert reader.get_topics() == [{"name": "/point", "type": "geometry_msgs/msg/PointStamped", "count": 15}]
+            assert reader.start_time == 50.0 and reader.end_time == 64.0
+
+            first = next(reader.iter_messages(reader.seek(57.0)))
+            assert first[0] == 57.0
+            msg = reader.decode(first[4], first[3])["data"]
+            assert msg["header"] == {"stamp": {"sec": 57, "nanosec": 0}, "frame_id": "map"}
+            assert msg["point"] == {"x": 57.0, "y": 2.0, "z": None}
+        finally:
+            reader.close()
+
+
+def test_bag_adapter_plays_subscribed_topics_only(tmp_path):
+    path = os.path.join(str(tmp_path), "sample.bag")
+    _write_bag(path)
+
+    async def run():
+        adapter = BagFileAdapter()
+        received = []
+
+        async def on_data(topic, data):
+            received.append((topic, data))
+
+        adapter.add_data_callback(on_data)
+        assert await adapter.connect({"file": path, "rate": 100.0})
+        topics = await adapter.get_available_topics()
+        assert {"name": "/chatter", "type": "std_msgs/String"} in topics
+        assert await adapter.subscribe_topic("/chatter")
+        for _ in range(100):
+            if len(received) >= 10:
+                break
+            await asyncio.sleep(0.05)
+        await adapter.disconnect()
+        return received
+
+    received = asyncio.run(run())
+    assert len(received) == 10
+    assert all(topic == "/chatter" for topic, _ in received)
+    assert received[0][1]["data"]["data"] == "hello 100"
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from params.adapters.config_diff import apply_ops, diff_config
+from params.adapters.journal_adapter import JournalParameterAdapter
+from params.category_manager import CategoryParameterManager
+
+
+def test_diff_and_replay_round_trip():
+    old = {"a": {"x": 1, "y": [1, 2]}, "b": "keep", "c": True}
+    new = {"a": {"x": 2, "y": [1, 2], "z": {"__value__": 3}}, "b": "keep", "d": 1}
+    ops = diff_config(old, new)
+    assert {"op": "del", "path": ["c"]} in ops
+    assert {"op": "set", "path": ["a", "x"], "value": 2} in ops
+    assert len(ops) == 4
+    assert apply_ops(json.loads(json.dumps(old)), ops) == new
+    # 绝对操作可重复重放
+    assert apply_ops(json.loads(json.dumps(new)), ops) == new
+    assert apply_ops(999, diff_config(999, {"v": 1})) == {"v": 1}
+
+
+def test_diff_records_key_order():
+    old = {f"k{i}": i for i in range(50)}
+    new = {f"k{i}": i for i in reversed(range(50))}
+    new["k3"] = -1
+    ops = diff_config(old, new)
+    assert ops[-1] == {"op": "order", "path": [], "keys": list(new)}
+    replayed = apply_ops(json.loads(json.dumps(old)), ops)
+    assert replayed == new and list(replayed) == list(new)
+    # 只有顺序变化时同样产生操作，嵌套字典按各自路径重排
+    nested = diff_config({"g": {"a": 1, "b": 2}}, {"g": {"b": 2, "a": 1}})
+    assert nested == [{"op": "order", "path": ["g"], "keys": ["b", "a"]}]
+    assert list(apply_ops({"g": {"a": 1, "b": 2}}, nested)["g"]) == ["b", "a"]
+
+
+def test_journal_appends_changes_and_replays(tmp_path):
+    async def run():
+        adapter = JournalParameterAdapter(config_dir=str(tmp_path), category="journal")
+        snapshot_path = os.path.join(adapter.active_dir, "cfg.json")
+        journal_path = os.path.join(adapter.active_dir, "cfg.journal")
+
+        assert await adapter.save_config("cfg", {"group": {"p": 1}, "other": "x"})
+        with open(snapshot_path) as f:
+            snapshot = f.read()
+
+        for value in (2, 3):
+            assert await adapter.save_config("cfg", {"group": {"p": value}, "other": "x"})
+        # 快照不变，每次保存只追加一行差异
+        with open(snapshot_path) as f:
+            assert f.read() == snapshot
+        with open(journal_path) as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line)["ops"] for line in lines] == [
+            [{"op": "set", "path": ["group", "p"], "value": 2}],
+            [{"op": "set", "path": ["group", "p"], "value": 3}],
+        ]
+
+        # 新实例从磁盘重放
+        reloaded = JournalParameterAdapter(config_dir=str(tmp_path), category="journal")
+        assert await reloaded.load_config("cfg") == {"group": {"p": 3}, "other": "x"}
+        history = await reloaded.list_history("cfg")
+        assert await reloaded.load_config_at("cfg", history[0]) == {"group": {"p": 2}, "other": "x"}
+
+        # 崩溃留下的残缺行被截掉，之后的追加仍可正常重放
+        with open(journal_path, 'ab') as f:
+            f.write(b'{"ts": 1, "ops": [{"op": "se')
+        damaged = JournalParameterAdapter(config_dir=str(tmp_path), category="journal")
+        assert await damaged.load_config("cfg") == {"group": {"p": 3}, "other": "x"}
+        assert await damaged.save_config("cfg", {"group": {"p": 4}, "other": "x"})
+        assert await JournalParameterAdapter(config_dir=str(tmp_path), category="journal").load_config("cfg") == {"group": {"p": 4}, "other": "x"}
+
+        # 只调整顺序的保存也会记录
+        assert await damaged.save_config("cfg", {"other": "x", "group": {"p": 4}})
+        reordered = await JournalParameterAdapter(config_dir=str(tmp_path), category="journal").load_config("cfg")
+        assert list(reordered) == ["other", "group"]
+
+    asyncio.run(run())
+
+
+def test_journal_compacts_past_threshold(tmp_path):
+    async def run():
+        adapter = JournalParameterAdapter(config_dir=str(tmp_path), category="journal", compact_threshold=200)
+        journal_path = os.path.join(adapter.active_dir, "cfg.journal")
+        await adapter.save_config("cfg", {"p": 0})
+        for value in range(1, 20):
+            await adapter.save_config("cfg", {"p": value})
+        # 等待后台压缩完成
+        while adapter._compaction_tasks:
+            await asyncio.sleep(0.01)
+
+        assert os.path.getsize(journal_path) <= 200
+        with open(os.path.join(adapter.active_dir, "cfg.json")) as f:
+            assert json.load(f)["p"] >= 10
+        reloaded = JournalParameterAdapter(config_dir=str(tmp_path), category="journal")
+        assert await reloaded.load_config("cfg") == {"p": 19}
+
+    asyncio.run(run())
+
+
+def test_manager_with_journal_storage(tmp_path):
+    async def run():
+        manager = CategoryParameterManager(write_delay=0, adapter_class=JournalParameterAdapter)
+        manager.adapters["journal"] = JournalParameterAdapter(config_dir=str(tmp_path), category="journal")
+        await manager.create_new_config("cfg", "journal")
+        await manager.apply_operations("cfg", [
+            {"op": "add", "path": [], "param_type": "number", "name": "speed", "value": 1.5},
+        ], "journal")
+        backup = await manager.create_manual_backup("cfg", "journal")
+        await manager.update_parameter_value("cfg", ["speed"], 2.5, "journal")
+        assert (await manager.get_parameter_node("cfg", ["speed"], "journal")).value == 2.5
+
+        assert await manager.restore_from_manual_backup("cfg", backup, "journal")
+        assert (await manager.get_parameter_node("cfg", ["speed"], "journal")).value == 1.5
+
+    asyncio.run(run())
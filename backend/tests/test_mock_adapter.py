@@ -0,0 +1,103 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from adapters.load_generator import LoadGenerator
+from adapters.mock_adapter import MockAdapter
+
+
+def test_load_generator_is_reproducible_with_seed():
+    first = LoadGenerator(topic_count=3, point_count=100, image_width=8, image_height=4, seed=42)
+    second = LoadGenerator(topic_count=3, point_count=100, image_width=8, image_height=4, seed=42)
+    for topic in first.topics:
+        assert first.generate(topic, now=1.0)['data'] == second.generate(topic, now=1.0)['data']
+
+
+def test_load_generator_topics_and_tf_depth():
+    generator = LoadGenerator(topic_count=4, tf_depth=5)
+    names = [t['name'] for t in generator.get_available_topics()]
+    assert names == ["/load/cloud_0", "/load/image_1", "/load/pose_2", "/load/cloud_3", "/tf"]
+    assert len(generator.generate("/tf")['data']['transforms']) == 5
+
+
+def test_mock_adapter_load_mode_subscribes_load_topics():
+    async def run():
+        adapter = MockAdapter()
+        await adapter.connect({"load_mode": True, "load_topic_count": 2, "load_tf_depth": 0})
+        topics = sorted(adapter.subscribed_topics.keys())
+        await adapter.disconnect()
+        return topics
+
+    assert asyncio.run(run()) == ["/load/cloud_0", "/load/image_1"]
+
+
+def test_batched_tf_messages_are_merged_per_frame():
+    def tf(*frames):
+        return {'topic': '/tf_static', 'data': {'transforms': [
+            {'child_frame_id': child, 'header': {'frame_id': 'map'}, 'value': value} for child, value in frames
+        ]}}
+
+    async def run():
+        adapter = MockAdapter()
+        await adapter._ensure_async_resources()
+        adapter.enable_message_batching()
+        await adapter._emit_message('/tf_static', tf(('a', 1), ('b', 1)))
+        await adapter._emit_message('/tf_static', tf(('b', 2), ('c', 1)))
+        await adapter._emit_message('/other', {'data': 1})
+        await adapter._emit_message('/other', {'data': 2})
+        return adapter.message_buffer
+
+    buffer = asyncio.run(run())
+    transforms = buffer['/tf_static']['data']['transforms']
+    assert [(t['child_frame_id'], t['value']) for t in transforms] == [('a', 1), ('b', 2), ('c', 1)]
+    # 其他话题仍只保留窗口内最后一条
+    assert buffer['/other'] == {'data': 2}
+
+
+def test_map_update_tiles_are_routed_to_map_topic_and_merged():
+    def tiles(version, base_version, *coords, full=False):
+        return {'topic': '/map', 'data': {'type': 'OccupancyGridTiles', 'version': version, 'base_version': base_version,
+                                          'full': full, 'tiles': [{'tx': tx, 'ty': ty, 'v': version} for tx, ty in coords]}}
+
+    async def run():
+        adapter = MockAdapter()
+        await adapter._ensure_async_resources()
+        adapter.enable_message_batching()
+        await adapter._emit_message('/map', tiles(1, 0, (0, 0), (1, 0), full=True))
+        # 插件把 /map_updates 的补丁改写为 /map
+        await adapter._emit_message('/map_updates', tiles(2, 1, (1, 0)))
+        await adapter._emit_message('/map_updates', tiles(3, 2, (0, 1)))
+        return adapter.message_buffer
+
+    buffer = asyncio.run(run())
+    assert list(buffer) == ['/map']
+    merged = buffer['/map']['data']
+    assert (merged['full'], merged['base_version'], merged['version']) == (True, 0, 3)
+    assert [(t['tx'], t['ty'], t['v']) for t in merged['tiles']] == [(0, 0, 1), (1, 0, 2), (0, 1, 3)]
+
+
+def test_load_generator_per_topic_rates():
+    generator = LoadGenerator.from_config({"load_topic_count": 3, "load_rate_hz": 10, "load_tf_depth": 1,
+                                           "load_topic_rates": '{"cloud": 50, "/load/pose_2": 2}'})
+    assert generator.rate_for("/load/cloud_0") == 50
+    assert generator.rate_for("/load/pose_2") == 2
+    assert generator.rate_for("/load/image_1") == 10
+    assert generator.rate_for("/tf") == 10
+
+    async def run():
+        adapter = MockAdapter()
+        await adapter.connect({"load_mode": True, "load_topic_count": 3, "load_tf_depth": 0, "load_point_count": 10,
+                               "load_image_width": 4, "load_image_height": 4,
+                               "load_topic_rates": {"cloud": 50, "pose": 2}})
+        counts = {}
+        adapter.raw_callbacks.append(lambda topic, data, message_type=None: counts.__setitem__(topic, counts.get(topic, 0) + 1))
+        await asyncio.sleep(0.6)
+        await adapter.disconnect()
+        return counts
+
+    counts = asyncio.run(run())
+    # 快话题明显多于慢话题（慢话题 2 Hz，0.6 秒内只生成 1~2 条）
+    assert counts["/load/cloud_0"] >= 15
+    assert 1 <= counts["/load/pose_2"] <= 2
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from params.parameter_types import ParamNode, build_param_tree, create_parameter
+
+
+def _sample_tree():
+    return build_param_tree({
+        "robot": {
+            "arm": {"speed": {"__value__": 1.5, "__metadata__": {"type": "number"}}, "enabled": True},
+            "name": "r1"
+        },
+        "top": 3
+    }, name="cfg")
+
+
+def test_path_index_lookups():
+    tree = _sample_tree()
+    speed = tree.get_child("robot.arm.speed")
+    assert speed is tree.get_child(["robot", "arm", "speed"])
+    assert speed.value == 1.5
+    assert tree.get_child("robot.arm").get_child("enabled").value is True
+    assert tree.get_child("robot.missing") is None
+    assert tree.get_child("top.nested") is None
+    assert tree.get_child("") is tree
+    # 与原实现一致：非 "__root__" 的根名包含在 path_list 中
+    assert speed.path_list == ["cfg", "robot", "arm", "speed"]
+    assert build_param_tree({"a": 1}).get_child("a").path_list == ["a"]
+
+
+def test_path_index_follows_add_and_remove():
+    tree = _sample_tree()
+    arm = tree.get_child("robot.arm")
+    tree.get_child("robot").remove_child("arm")
+    assert tree.get_child("robot.arm.speed") is None
+    # 被移除的子树成为独立的树，索引相对其自身
+    assert arm.parent is None
+    assert arm.get_child("speed").value == 1.5
+
+    group = ParamNode("tools")
+    tree.add_child(group)
+    group.add_child(arm)
+    group.add_child(create_parameter("string", name="label", value="x"))
+    assert tree.get_child("tools.arm.speed").value == 1.5
+    assert tree.get_child("tools.label").value == "x"
+    assert arm.get_child("enabled") is tree.get_child("tools.arm.enabled")
+
+    with pytest.raises(ValueError):
+        group.add_child(ParamNode("label", value=1))
+    with pytest.raises(KeyError):
+        group.remove_child("missing")
+
+
+def test_round_trip_preserves_format():
+    data = {"g": {"p": {"__value__": 2, "__metadata__": {"unit": "m"}}, "raw": [1, 2]}, "empty": {}}
+    tree = build_param_tree(data, name="cfg")
+    assert tree.to_dict() == data
+    assert tree.to_clean_dict() == {"g": {"p": 2, "raw": [1, 2]}, "empty": {}}
+    assert not hasattr(tree.get_child("g.raw"), "__dict__")
@@ -0,0 +1,500 @@
+import asyncio
+import base64
+import copy
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from plugins import BasePlugin, PluginConfig
+from plugins.plugin_manager import PluginManager
+from plugins.message import Message
+from plugins.manifest import load_manifest, scan_plugin_file
+from plugins.pattern_matcher import PatternIndex
+from plugins.plugin_stats import LatencyHistogram, PluginStats, RATE_WINDOW
+from plugins.executor import share_arrays, release_blocks, _attach_arrays, SharedArray, SHARED_ARRAY_THRESHOLD
+from plugins.laserscan_plugin import LaserScanPlugin
+from plugins.occupancy_grid_plugin import OccupancyGridPlugin
+from plugins.marker_plugin import MarkerArrayPlugin
+from plugins.path_plugin import PathDecimationPlugin, douglas_peucker_mask
+from plugins.tf_plugin import TFMessagePlugin, MessageLoggerPlugin
+
+
+class _TagPlugin(BasePlugin):
+    def __init__(self, tag, patterns, priority=0):
+        super().__init__(PluginConfig(priority=priority))
+        self.name = tag
+        self.patterns = patterns
+
+    def get_supported_patterns(self):
+        return self.patterns
+
+    async def process_message(self, topic, message_type, data):
+        return dict(data, tags=data.get("tags", []) + [self.name])
+
+
+def _decode_xyz(cloud):
+    raw = base64.b64decode(cloud['data'])
+    return np.frombuffer(raw, dtype='<f4').reshape(-1, cloud['point_step'] // 4)[:, :3]
+
+# --- PluginManager ---
+
+def test_dispatch_cache_resolves_and_invalidates():
+    manager = PluginManager()
+    manager.register_plugin(_TagPlugin("late", ["sensor_msgs/msg/Imu#*"], priority=5))
+    manager.register_plugin(_TagPlugin("early", ["*#/imu"], priority=1))
+    manager.initialized = True
+
+    result = asyncio.run(manager.process_message("imu", "sensor_msgs/Imu", {}))
+    assert result["tags"] == ["early", "late"]
+    assert manager._dispatch[("imu", "sensor_msgs/Imu")] == tuple(manager.plugin_instances[::-1])
+
+    assert asyncio.run(manager.process_message("/odom", "nav_msgs/Odometry", {"x": 1})) == {"x": 1}
+    assert manager._dispatch[("/odom", "nav_msgs/Odometry")] == ()
+
+    assert manager.set_plugin_enabled("early", False)
+    assert not manager._dispatch
+    assert asyncio.run(manager.process_message("imu", "sensor_msgs/Imu", {}))["tags"] == ["late"]
+
+    manager.register_plugin(_TagPlugin("global", ["*#*"], priority=0))
+    assert asyncio.run(manager.process_message("imu", "sensor_msgs/Imu", {}))["tags"] == ["global", "late"]
+
+def test_share_arrays_round_trip():
+    ranges = [float(i) for i in range(SHARED_ARRAY_THRESHOLD)]
+    message = {"data": {"ranges": ranges, "small": [1.0, 2.0], "header": {"frame_id": "laser"}}}
+    blocks = []
+    try:
+        shared = share_arrays(message, blocks)
+        assert isinstance(shared["data"]["ranges"], SharedArray)
+        assert message["data"]["ranges"] is ranges  # 原消息不被修改
+        restored = _attach_arrays(shared)
+        # 默认还原为列表，与主进程中执行时类型一致
+        assert restored["data"]["ranges"] == ranges
+        assert restored["data"]["small"] == [1.0, 2.0]
+        assert _attach_arrays(shared, as_arrays=True)["data"]["ranges"].tolist() == ranges
+    finally:
+        release_blocks(blocks)
+
+
+def test_cpu_bound_plugin_runs_in_worker_in_topic_order():
+    async def run():
+        manager = PluginManager()
+        manager.worker_count = 1
+        manager.max_pending_per_topic = 100
+        manager.register_plugin(PathDecimationPlugin(PluginConfig(settings={"full_resync_interval": 0})))
+        manager.initialized = True
+        delivered = []
+
+        async def deliver(topic, data):
+            delivered.append((topic, data))
+
+        xs = np.linspace(0, 10, 1001)
+        try:
+            for i in range(5):
+                await manager.dispatch("/plan", "nav_msgs/Path", _path_message(xs, np.full_like(xs, i)), deliver)
+            await manager.dispatch("/odom", "nav_msgs/Odometry", {"x": 1}, deliver)
+            # 无 CPU 密集型插件的话题不等待进程池
+            assert delivered == [("/odom", {"x": 1})]
+            await asyncio.wait_for(manager._lanes["/plan"].task, timeout=60)
+        finally:
+            await manager.cleanup()
+        return delivered
+
+    delivered = asyncio.run(run())
+    plans = [data for topic, data in delivered if topic == "/plan"]
+    assert [p["data"]["poses"][0]["pose"]["position"]["y"] for p in plans] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert all(len(p["data"]["poses"]) == 2 for p in plans)
+
+def _run_busy_lane(settings):
+    async def run():
+        manager = PluginManager()
+        manager.worker_count = 1
+        manager.max_pending_per_topic = 1
+        manager.register_plugin(PathDecimationPlugin(PluginConfig(settings=settings)))
+        manager.initialized = True
+        delivered = []
+
+        async def deliver(topic, data):
+            delivered.append(data)
+
+        xs = np.linspace(0, 10, 101)
+        try:
+            for i in range(5):
+                await manager.dispatch("/plan", "nav_msgs/Path", _path_message(xs, np.full_like(xs, i)), deliver)
+            dropped = manager._lanes["/plan"].dropped
+            await asyncio.wait_for(manager._lanes["/plan"].task, timeout=60)
+        finally:
+            await manager.cleanup()
+        return dropped, [d["data"]["poses"][0]["pose"]["position"]["y"] for d in delivered]
+
+    return asyncio.run(run())
+
+def test_cpu_bound_lane_applies_backpressure_by_default():
+    dropped, ys = _run_busy_lane({})
+    assert dropped == 0
+    assert ys == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+def test_cpu_bound_lane_drops_oldest_only_when_opted_in():
+    dropped, ys = _run_busy_lane({"drop_when_busy": True})
+    # 工作进程启动期间积压的消息被丢弃，最新一条总会交付
+    assert dropped > 0
+    assert len(ys) == 5 - dropped
+    assert ys[-1] == 4.0
+
+def test_cpu_bound_laserscan_receives_large_ranges_in_worker():
+    async def run():
+        manager = PluginManager()
+        manager.worker_count = 1
+        manager.register_plugin(LaserScanPlugin(PluginConfig(settings={"cpu_bound": True})))
+        manager.initialized = True
+        delivered = []
+
+        async def deliver(topic, data):
+            delivered.append(data)
+
+        count = SHARED_ARRAY_THRESHOLD + 2000
+        scan = {"header": {"frame_id": "laser"}, "angle_min": 0.0, "angle_increment": 2 * np.pi / count,
+                "range_min": 0.1, "range_max": 10.0, "ranges": [1.0] * count}
+        message = {"topic": "/scan", "message_type": "sensor_msgs/LaserScan", "data": scan}
+        try:
+            await manager.dispatch("/scan", "sensor_msgs/LaserScan", message, deliver)
+            await asyncio.wait_for(manager._lanes["/scan"].task, timeout=60)
+        finally:
+            await manager.cleanup()
+        return count, delivered
+
+    count, delivered = asyncio.run(run())
+    assert len(delivered) == 1
+    cloud = delivered[0]["data"]
+    assert delivered[0]["message_type"] == "sensor_msgs/PointCloud2"
+    assert cloud["width"] == count
+    assert np.allclose(np.linalg.norm(_decode_xyz(cloud)[:, :2], axis=1), 1.0)
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for i in range(1, 101):
+        histogram.record(i * 1e-3)
+    assert 0.045 <= histogram.percentile(0.50) <= 0.06
+    assert 0.09 <= histogram.percentile(0.95) <= 0.1
+    assert histogram.percentile(0.99) == histogram.max == 0.1
+
+
+def test_plugin_manager_records_stats():
+    class _DropPlugin(_TagPlugin):
+        async def process_message(self, topic, message_type, data):
+            return None if data.get("drop") else data
+
+    manager = PluginManager()
+    manager.register_plugin(_DropPlugin("dropper", ["*#*"]))
+    manager.initialized = True
+    for drop in (False, True, True):
+        asyncio.run(manager.process_message("/a", "std_msgs/String", {"drop": drop}))
+
+    stats = manager.get_plugin_stats()["plugins"]["dropper"]
+    assert stats["calls"] == 3 and stats["filtered"] == 2 and stats["errors"] == 0
+    assert stats["p99_ms"] >= stats["p50_ms"] > 0
+    manager.reset_plugin_stats()
+    assert manager.get_plugin_stats()["plugins"]["dropper"]["calls"] == 0
+
+
+def test_plugin_rate_uses_sliding_window(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("plugins.plugin_stats.time.monotonic", lambda: clock[0])
+    stats = PluginStats("p")
+    for i in range(RATE_WINDOW * 10):
+        clock[0] = 100.05 + i / 10
+        stats.record(1e-4)
+    clock[0] = 100.0 + RATE_WINDOW
+    # 多个读取方各自读取快照，互不影响速率
+    assert stats.snapshot()["rate"] == stats.snapshot()["rate"] == 10.0
+    clock[0] += RATE_WINDOW
+    assert stats.snapshot()["rate"] == 0.0
+
+# --- LaserScan ---
+
+def test_laserscan_to_point_cloud_drops_invalid_ranges():
+    plugin = LaserScanPlugin()
+    scan = {
+        "header": {"frame_id": "laser"},
+        "angle_min": 0.0,
+        "angle_increment": np.pi / 2,
+        "range_min": 0.1,
+        "range_max": 10.0,
+        "ranges": [1.0, None, 2.0, 50.0],
+    }
+    message = {"topic": "/scan", "message_type": "sensor_msgs/LaserScan", "data": scan}
+    result = asyncio.run(plugin.process_message("/scan", "sensor_msgs/LaserScan", message))
+
+    assert result['message_type'] == 'sensor_msgs/PointCloud2'
+    cloud = result['data']
+    assert cloud['width'] == 2
+    assert cloud['header']['frame_id'] == 'laser'
+    points = _decode_xyz(cloud)
+    np.testing.assert_allclose(points, [[1.0, 0.0, 0.0], [-2.0, 0.0, 0.0]], atol=1e-6)
+
+
+def test_laserscan_trig_table_is_cached():
+    plugin = LaserScanPlugin()
+    first = plugin._get_trig_table(-1.0, 0.01, 200)
+    second = plugin._get_trig_table(-1.0, 0.01, 200)
+    assert first is second
+
+# --- OccupancyGrid ---
+
+def _grid_message(cells, width, height):
+    return {
+        "topic": "/map",
+        "message_type": "nav_msgs/OccupancyGrid",
+        "data": {
+            "header": {"frame_id": "map"},
+            "info": {"resolution": 0.05, "width": width, "height": height, "origin": {}},
+            "data": cells.ravel().tolist(),
+        },
+    }
+
+
+def test_occupancy_grid_sends_only_changed_tiles():
+    plugin = OccupancyGridPlugin(PluginConfig(settings={"tile_size": 4, "full_resync_interval": 0}))
+    cells = np.zeros((8, 8), dtype=np.int8)
+
+    first = asyncio.run(plugin.process_message("/map", "nav_msgs/OccupancyGrid", _grid_message(cells, 8, 8)))
+    assert first['data']['full'] is True
+    assert len(first['data']['tiles']) == 4
+
+    # 未变化的地图被过滤
+    assert asyncio.run(plugin.process_message("/map", "nav_msgs/OccupancyGrid", _grid_message(cells, 8, 8))) is None
+
+    # 格式错误的地图被丢弃，不影响已保存的地图
+    malformed = _grid_message(cells, 8, 8)
+    malformed['data']['info']['width'] = 16
+    assert asyncio.run(plugin.process_message("/map", "nav_msgs/OccupancyGrid", malformed)) is None
+    assert plugin.get_tiles_since("/map", 0)['info']['width'] == 8
+
+    cells[5, 6] = 100
+    delta = asyncio.run(plugin.process_message("/map", "nav_msgs/OccupancyGrid", _grid_message(cells, 8, 8)))
+    tiles = delta['data']['tiles']
+    assert delta['data']['full'] is False
+    assert [(t['tx'], t['ty']) for t in tiles] == [(1, 1)]
+    assert delta['data']['base_version'] == first['data']['version']
+
+
+def test_occupancy_grid_applies_map_updates():
+    plugin = OccupancyGridPlugin(PluginConfig(settings={"tile_size": 4, "full_resync_interval": 0}))
+    cells = np.zeros((8, 8), dtype=np.int8)
+    first = asyncio.run(plugin.process_message("/map", "nav_msgs/OccupancyGrid", _grid_message(cells, 8, 8)))
+
+    update = {"topic": "/map_updates", "data": {"x": 1, "y": 1, "width": 2, "height": 2, "data": [100] * 4}}
+    delta = asyncio.run(plugin.process_message("/map_updates", "map_msgs/OccupancyGridUpdate", update))
+    assert delta['topic'] == '/map'
+    assert [(t['tx'], t['ty']) for t in delta['data']['tiles']] == [(0, 0)]
+
+    since = plugin.get_tiles_since("/map", first['data']['version'])
+    assert [(t['tx'], t['ty']) for t in since['tiles']] == [(0, 0)]
+
+# --- MarkerArray ---
+
+def _marker(ns, marker_id, x=0.0, action=0, lifetime=None):
+    marker = {"header": {"frame_id": "map", "stamp": {"sec": 1}}, "ns": ns, "id": marker_id,
+              "action": action, "pose": {"position": {"x": x, "y": 0.0, "z": 0.0}}}
+    if lifetime is not None:
+        marker["lifetime"] = {"sec": lifetime, "nanosec": 0}
+    return marker
+
+
+def test_marker_array_diff_by_namespace_and_id():
+    plugin = MarkerArrayPlugin()
+    diff = plugin.apply_markers("/markers", [_marker("a", 1), _marker("a", 2), _marker("b", 1)], now=0.0)
+    assert len(diff["added"]) == 3
+
+    # 时间戳变化但内容不变的 Marker 不计入差异
+    unchanged = _marker("a", 1)
+    unchanged["header"]["stamp"] = {"sec": 2}
+    diff = plugin.apply_markers("/markers", [unchanged, _marker("a", 2, x=1.0), _marker("b", 1, action=2)], now=1.0)
+    assert diff["added"] == []
+    assert [(m["ns"], m["id"]) for m in diff["modified"]] == [("a", 2)]
+    assert diff["removed"] == [{"ns": "b", "id": 1}]
+
+    diff = plugin.apply_markers("/markers", [_marker("a", 0, action=3)], now=2.0)
+    assert sorted((r["ns"], r["id"]) for r in diff["removed"]) == [("a", 1), ("a", 2)]
+
+
+def test_unchanged_markers_are_resent_while_a_client_uses_another_fixed_frame():
+    plugin = MarkerArrayPlugin(PluginConfig(settings={"fixed_frames": ["map"]}))
+    robot = _marker("robot", 1)
+    robot["header"]["frame_id"] = "base_link"
+    plugin.apply_markers("/markers", [robot, _marker("a", 1)], now=0.0)
+    # base_link 中不变的 Marker 在 map 中的位姿随 TF 变化，按修改重发；map 中的不变 Marker 仍过滤
+    diff = plugin.apply_markers("/markers", [robot, _marker("a", 1)], now=1.0)
+    assert [(m["ns"], m["id"]) for m in diff["modified"]] == [("robot", 1)]
+
+
+def test_marker_lifetime_expires():
+    plugin = MarkerArrayPlugin()
+    plugin.apply_markers("/markers", [_marker("a", 1, lifetime=1)], now=0.0)
+    diff = plugin.apply_markers("/markers", [], now=2.0)
+    assert diff["removed"] == [{"ns": "a", "id": 1}]
+
+
+def test_full_resync_is_off_by_default():
+    message = {"topic": "/markers", "data": {"markers": [_marker("a", 1)]}}
+    plugin = MarkerArrayPlugin()
+    assert asyncio.run(plugin.process_message("/markers", "visualization_msgs/MarkerArray", message)) is not None
+    assert asyncio.run(plugin.process_message("/markers", "visualization_msgs/MarkerArray", message)) is None
+
+    resyncing = MarkerArrayPlugin(PluginConfig(settings={"full_resync_interval": 5}))
+    assert resyncing.resync_due("/markers", now=100.0)
+    resyncing.mark_full_sent("/markers", now=100.0)
+    assert not resyncing.resync_due("/markers", now=104.0)
+    assert resyncing.resync_due("/markers", now=105.0)
+
+
+def test_marker_expiry_sweep_without_new_messages():
+    plugin = MarkerArrayPlugin()
+    plugin.apply_markers("/markers", [_marker("a", 1, lifetime=1), _marker("a", 2)], now=0.0)
+    assert plugin.expire_all(now=0.5) == {}
+    # 发布者已停止，定期清理仍会移除过期 Marker 并产生删除增量
+    payload = plugin.expire_all(now=2.0)["/markers"]
+    assert payload["removed"] == [{"ns": "a", "id": 1}]
+    assert payload["version"] == plugin.states["/markers"].version
+    assert [m["id"] for m in plugin.get_snapshot("/markers")["added"]] == [2]
+
+# --- Path ---
+
+def _path_message(xs, ys):
+    poses = [{"pose": {"position": {"x": float(x), "y": float(y), "z": 0.0}}} for x, y in zip(xs, ys)]
+    return {"topic": "/plan", "message_type": "nav_msgs/Path", "data": {"header": {"frame_id": "map"}, "poses": poses}}
+
+
+def test_douglas_peucker_keeps_corners():
+    points = np.array([[0, 0, 0], [1, 0.001, 0], [2, 0, 0], [2, 1, 0], [2, 2, 0]], dtype=float)
+    mask = douglas_peucker_mask(points, 0.01)
+    assert mask.tolist() == [True, False, True, False, True]
+
+
+def test_path_plugin_decimates_and_skips_unchanged():
+    plugin = PathDecimationPlugin(PluginConfig(settings={"full_resync_interval": 0}))
+    xs = np.linspace(0, 10, 1001)
+    message = _path_message(xs, np.zeros_like(xs))
+
+    result = asyncio.run(plugin.process_message("/plan", "nav_msgs/Path", message))
+    assert len(result['data']['poses']) == 2
+    assert result['data']['original_pose_count'] == 1001
+
+    assert asyncio.run(plugin.process_message("/plan", "nav_msgs/Path", _path_message(xs, np.zeros_like(xs)))) is None
+
+    # 只有朝向变化的路径不被当作未变化
+    rotated = _path_message(xs, np.zeros_like(xs))
+    rotated['data']['poses'][500]['pose']['orientation'] = {"x": 0.0, "y": 0.0, "z": 0.7071, "w": 0.7071}
+    assert asyncio.run(plugin.process_message("/plan", "nav_msgs/Path", rotated)) is not None
+
+
+def test_message_copy_on_write():
+    """补丁不修改原消息，物化时只复制补丁路径上的字典"""
+    points = [{'x': 1.0}] * 3
+    base = {'topic': '/a', 'data': {'header': {'frame_id': 'map'}, 'points': points}}
+    message = Message.wrap(base)
+    assert Message.wrap(message) is message
+    assert message.materialize() is base
+
+    patched = message.with_path('data.header.frame_id', 'odom').with_fields(type='x')
+    assert base['data']['header']['frame_id'] == 'map' and 'type' not in base
+    result = patched.materialize()
+    assert result['data']['header']['frame_id'] == 'odom' and result['type'] == 'x'
+    assert result['data'] is not base['data']
+    assert result['data']['points'] is points  # 未修改的载荷共享引用
+    assert patched['topic'] == '/a' and patched.get_in('data.header.frame_id') == 'odom'
+
+    # 覆盖上层路径会丢弃其下更深的补丁
+    replaced = patched.with_fields(data={'n': 1})
+    assert replaced.materialize()['data'] == {'n': 1}
+    assert 'topic' not in message.without('topic')
+
+
+def test_plugins_do_not_mutate_input():
+    """插件链处理后，适配器的原始消息保持不变"""
+    manager = PluginManager()
+    manager.register_plugin(MessageLoggerPlugin())
+    manager.register_plugin(TFMessagePlugin())
+    manager.initialized = True
+    raw = {'topic': '/tf', 'type': 'generic', 'message_type': 'tf2_msgs/TFMessage',
+           'data': {'transforms': [{'child_frame_id': '/base', 'header': {'frame_id': '/odom'}}]}}
+    snapshot = copy.deepcopy(raw)
+
+    result = asyncio.run(manager.process_message('/tf', 'tf2_msgs/TFMessage', raw))
+    assert raw == snapshot
+    assert result['metadata']['processed_at'] == 1
+    assert result['type'] == 'tf_dynamic'
+    transform = result['data']['transforms'][0]
+    assert transform['child_frame_id'] == 'base' and transform['header']['frame_id'] == 'odom'
+
+
+PLUGINS_DIR = os.path.join(os.path.dirname(__file__), '..', 'plugins')
+
+
+def test_manifest_matches_plugin_sources():
+    """清单中的模式与插件源码一致"""
+    listed = {spec.key: spec.patterns for spec in load_manifest(PLUGINS_DIR)}
+    for file in os.listdir(PLUGINS_DIR):
+        if file.endswith('plugin.py'):
+            for spec in scan_plugin_file(os.path.join(PLUGINS_DIR, file), f"plugins.{file[:-3]}"):
+                assert listed.get(spec.key) == spec.patterns, spec.key
+
+
+def test_plugins_load_on_demand_and_reload():
+    async def run():
+        manager = PluginManager()
+        await manager.initialize(PLUGINS_DIR)
+        assert manager.plugin_instances == []
+
+        message = {'topic': '/plan', 'data': {'poses': []}}
+        await manager.process_message('/plan', 'nav_msgs/Path', message)
+        loaded = {p.name for p in manager.plugin_instances}
+        assert loaded == {'PathDecimationPlugin', 'MessageLoggerPlugin'}
+
+        await manager.preload('/scan', 'sensor_msgs/msg/LaserScan')
+        assert manager.get_plugin('LaserScanPlugin') is not None
+
+        old = manager.get_plugin('PathDecimationPlugin')
+        manager.set_plugin_enabled('PathDecimationPlugin', False)
+        result = await manager.reload_plugins('path_plugin')
+        assert result == {'reloaded': ['plugins.path_plugin'], 'errors': {}}
+        new = manager.get_plugin('PathDecimationPlugin')
+        assert new is not old and not new.is_enabled()
+        assert len(manager.plugin_instances) == 3
+        assert (await manager.reload_plugins('marker_plugin'))['errors']
+        await manager.cleanup()
+
+    asyncio.run(run())
+
+
+def test_pattern_index_glob_and_regex():
+    index = PatternIndex()
+    assert not index.add("sensor_msgs/Image#/camera/image_raw")  # 精确模式不进入索引
+    index.add("sensor_msgs/*#/camera/*/image_raw")
+    index.add("*#/robot/**/odom")
+    index.add("*#re:/robot[0-9]+/cmd_vel")
+    index.add("nav_msgs/[OP]*#*")
+
+    assert index.match("/camera/front/image_raw", "sensor_msgs/Image") == ["sensor_msgs/*#/camera/*/image_raw"]
+    assert index.match("/camera/front/left/image_raw", "sensor_msgs/Image") == []
+    assert index.match("/camera/front/image_raw", "nav_msgs/Odometry") == ["nav_msgs/[OP]*#*"]
+    assert index.match("/robot/odom", "nav_msgs/Odometry") == ["*#/robot/**/odom", "nav_msgs/[OP]*#*"]
+    assert index.match("/robot/a/b/odom", "x/Y") == ["*#/robot/**/odom"]
+    assert index.match("/robot12/cmd_vel", "geometry_msgs/Twist") == ["*#re:/robot[0-9]+/cmd_vel"]
+    assert index.match("/robotX/cmd_vel", "geometry_msgs/Twist") == []
+
+
+def test_dispatch_matches_wildcard_patterns():
+    manager = PluginManager()
+    manager.register_plugin(_TagPlugin("camera", ["sensor_msgs/msg/*#camera/*/image_raw"]))
+    manager.register_plugin(_TagPlugin("robots", ["*#re:/robot[0-9]+/odom"], priority=1))
+    manager.initialized = True
+
+    result = asyncio.run(manager.process_message("/camera/rear/image_raw", "sensor_msgs/msg/Image", {}))
+    assert result["tags"] == ["camera"]
+    result = asyncio.run(manager.process_message("/robot3/odom", "nav_msgs/Odometry", {}))
+    assert result["tags"] == ["robots"]
+    assert asyncio.run(manager.process_message("/robot/odom", "nav_msgs/Odometry", {})) == {}
+    assert ("/camera/rear/image_raw", "sensor_msgs/msg/Image") in manager._dispatch
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from recording.recorder import Recorder
+from recording.log_format import LogWriter, read_index, decompress_chunk, iter_chunk_messages, TRAILER
+from recording.log_reader import LogReader
+from recording.timeseries import SeriesStore
+from adapters.playback_adapter import PlaybackAdapter
+
+
+def _record_sample(tmp_path, count=300):
+    recorder = Recorder(recordings_dir=str(tmp_path), chunk_size=4096)
+    filename = recorder.start("sample")
+    for i in range(count):
+        topic = "/a" if i % 2 == 0 else "/b"
+        recorder.record(topic, {"topic": topic, "message_type": "std_msgs/String", "data": {"data": str(i)}})
+    status = recorder.stop()
+    assert status["message_count"] == count
+    return os.path.join(str(tmp_path), filename)
+
+
+def _read_all(buf, index):
+    messages = []
+    for chunk in index["chunks"]:
+        for timestamp, topic_id, payload in iter_chunk_messages(decompress_chunk(buf, chunk[0])):
+            messages.append((index["topics"][str(topic_id)]["topic"], json.loads(payload)))
+    return messages
+
+
+def test_recorder_writes_indexed_chunks(tmp_path):
+    path = _record_sample(tmp_path)
+    with open(path, 'rb') as f:
+        buf = f.read()
+    index = read_index(buf)
+
+    assert index["message_count"] == 300
+    assert len(index["chunks"]) > 1
+    assert {t["topic"]: t["count"] for t in index["topics"].values()} == {"/a": 150, "/b": 150}
+
+    messages = _read_all(buf, index)
+    assert [m[1]["data"]["data"] for m in messages] == [str(i) for i in range(300)]
+
+
+def test_index_is_rebuilt_when_footer_is_missing(tmp_path):
+    path = _record_sample(tmp_path)
+    with open(path, 'rb') as f:
+        buf = f.read()
+    full_index = read_index(buf)
+    index_offset, _ = TRAILER.unpack_from(buf, len(buf) - TRAILER.size)
+
+    recovered = read_index(buf[:index_offset])
+    assert recovered["recovered"] is True
+    assert recovered["message_count"] == full_index["message_count"]
+    assert len(_read_all(buf[:index_offset], recovered)) == 300
+
+
+def test_recorder_topic_filter(tmp_path):
+    recorder = Recorder(recordings_dir=str(tmp_path))
+    filename = recorder.start(topics=["/keep"])
+    recorder.record("/keep", {"message_type": "std_msgs/String", "data": {}})
+    recorder.record("/drop", {"message_type": "std_msgs/String", "data": {}})
+    assert recorder.stop()["message_count"] == 1
+    assert [r["name"] for r in recorder.list_recordings()] == [filename]
+
+
+def test_log_reader_seek_and_topic_filter(tmp_path):
+    path = _record_sample(tmp_path)
+    reader = LogReader(path)
+    try:
+        times = [m[0] for m in reader.iter_messages()]
+        assert len(times) == 300
+
+        middle = times[150]
+        first = next(reader.iter_messages(reader.seek(middle)))
+        assert first[0] == middle
+
+        only_b = list(reader.iter_messages(topics={"/b"}))
+        assert len(only_b) == 150
+        assert all(m[1] == "/b" for m in only_b)
+    finally:
+        reader.close()
+
+
+def test_playback_adapter_replays_through_plugins(tmp_path):
+    path = _record_sample(tmp_path, count=20)
+
+    async def run():
+        adapter = PlaybackAdapter()
+        received = []
+        adapter.add_data_callback(lambda topic, data: received.append((topic, data)))
+        assert await adapter.connect({"file": path, "rate": 100.0, "start_paused": True})
+        assert await adapter.subscribe_topic("/a")
+
+        await adapter.playback_control("step")
+        for _ in range(50):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        assert len(received) == 1
+
+        await adapter.playback_control("play")
+        for _ in range(200):
+            if len(received) == 10:
+                break
+            await asyncio.sleep(0.01)
+        status = adapter.get_playback_status()
+        await adapter.disconnect()
+        return received, status
+
+    received, status = asyncio.run(run())
+    assert [data["data"]["data"] for _, data in received] == [str(i) for i in range(0, 20, 2)]
+    # 回放消息经过插件管线（MessageLoggerPlugin 会添加 metadata）
+    assert all("metadata" in data for _, data in received)
+    assert status["position"] > status["start_time"]
+
+
+def test_series_store_queries_and_downsamples(tmp_path):
+    writer = LogWriter(os.path.join(str(tmp_path), "series.tlog"), chunk_size=2048)
+    for i in range(5000):
+        message = {"topic": "/odom", "message_type": "nav_msgs/Odometry",
+                   "data": {"twist": {"linear": {"x": float(i % 100)}}, "values": [i, -i]}}
+        writer.write_message("/odom", "nav_msgs/Odometry", 1000.0 + i * 0.01, json.dumps(message).encode())
+        if i % 10 == 0:
+            writer.write_message("/other", "std_msgs/String", 1000.0 + i * 0.01, b'{"data": {"data": "x"}}')
+    writer.close()
+
+    store = SeriesStore(str(tmp_path))
+    try:
+        full = store.query("series.tlog", "/odom", "twist.linear.x", max_points=5000)
+        assert full["total_points"] == 5000 and not full["downsampled"]
+
+        reduced = store.query("series.tlog", "/odom", "twist.linear.x", max_points=200)
+        assert reduced["downsampled"] and len(reduced["values"]) == 200
+        assert reduced["timestamps"] == sorted(reduced["timestamps"])
+        assert max(reduced["values"]) == 99.0 and min(reduced["values"]) == 0.0
+
+        t0, t1 = 1000.0 + 1000 * 0.01, 1000.0 + 1999 * 0.01
+        window = store.query("series.tlog", "/odom", "values[1]", t0, t1, max_points=100, method="minmax")
+        assert window["total_points"] == 1000
+        assert len(window["values"]) <= 100
+        assert max(window["values"]) == -1000.0 and min(window["values"]) == -1999.0
+    finally:
+        store.close()
+
+
+def test_series_endpoint_reports_errors():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        response = client.get("/api/recordings/missing.tlog/series", params={"topic": "/a", "field": "x"})
+        assert response.status_code == 404
+        response = client.get("/api/recordings/missing.txt/series", params={"topic": "/a", "field": "x"})
+        assert response.status_code == 400
+        # 停止在线程中执行，未录制时仍返回 400
+        assert client.post("/api/recording/stop").status_code == 400
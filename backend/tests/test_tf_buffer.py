@@ -0,0 +1,203 @@
+import asyncio
+import base64
+import math
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.tf_buffer import TFBuffer, TransformError
+from plugins.plugin_manager import PluginManager
+from plugins.laserscan_plugin import LaserScanPlugin
+from plugins.path_plugin import PathDecimationPlugin
+from core.fixed_frame import FixedFrameTransformer
+from plugins.tf_plugin import TFMessagePlugin
+
+
+def _tf(parent, child, x=0.0, y=0.0, yaw=0.0, stamp=0.0):
+    return {
+        "header": {"frame_id": parent, "stamp": {"secs": int(stamp), "nsecs": int(round((stamp % 1) * 1e9))}},
+        "child_frame_id": child,
+        "transform": {
+            "translation": {"x": x, "y": y, "z": 0.0},
+            "rotation": {"x": 0.0, "y": 0.0, "z": math.sin(yaw / 2), "w": math.cos(yaw / 2)}
+        }
+    }
+
+
+def _apply(matrix, point):
+    return (matrix @ np.array([*point, 1.0]))[:3]
+
+
+def test_lookup_composes_chain_and_inverse():
+    buffer = TFBuffer()
+    buffer.add_message('/tf', {'data': {'transforms': [
+        _tf('world', 'base', x=1.0, yaw=math.pi / 2),
+        _tf('/base', 'laser', y=1.0),
+        _tf('world', 'camera', x=-1.0),
+    ]}})
+
+    # laser 中的 (1, 0, 0) -> base 中的 (1, 1, 0) -> 绕 z 转 90° 并平移 -> world 中的 (0, 1, 0)
+    np.testing.assert_allclose(_apply(buffer.lookup_matrix('world', 'laser'), (1, 0, 0)), (0, 1, 0), atol=1e-9)
+    np.testing.assert_allclose(_apply(buffer.lookup_matrix('laser', 'world'), (0, 1, 0)), (1, 0, 0), atol=1e-9)
+    # 兄弟坐标系经公共祖先求解
+    np.testing.assert_allclose(_apply(buffer.lookup_matrix('camera', 'base'), (0, 0, 0)), (2, 0, 0), atol=1e-9)
+
+    result = buffer.lookup_transform('world', 'base')
+    assert result['translation']['x'] == 1.0
+    assert abs(result['rotation']['z'] - math.sin(math.pi / 4)) < 1e-9
+
+    assert buffer.lookup_matrix('world', 'missing') is None
+    buffer.set_transform(_tf('odom', 'robot'))
+    try:
+        buffer.lookup_transform('world', 'robot')
+        assert False, "unconnected frames should fail"
+    except TransformError:
+        pass
+
+
+def test_lookup_interpolates_with_slerp():
+    buffer = TFBuffer(max_extrapolation=0.1)
+    buffer.set_transform(_tf('map', 'base', x=0.0, yaw=0.0, stamp=10.0))
+    buffer.set_transform(_tf('map', 'base', x=2.0, yaw=math.pi / 2, stamp=11.0))
+
+    result = buffer.lookup_transform('map', 'base', 10.5)
+    assert abs(result['translation']['x'] - 1.0) < 1e-9
+    assert abs(result['rotation']['z'] - math.sin(math.pi / 8)) < 1e-9
+    assert abs(result['rotation']['w'] - math.cos(math.pi / 8)) < 1e-9
+
+    # 乱序到达的样本按时间插入
+    buffer.set_transform(_tf('map', 'base', x=4.0, stamp=10.25))
+    assert abs(buffer.lookup_transform('map', 'base', 10.25)['translation']['x'] - 4.0) < 1e-9
+
+    assert buffer.lookup_transform('map', 'base', 11.05)['translation']['x'] == 2.0
+    for stamp in (9.5, 12.0):
+        try:
+            buffer.lookup_transform('map', 'base', stamp)
+            assert False, "extrapolation should fail"
+        except TransformError:
+            pass
+
+
+def test_history_is_bounded_and_cache_invalidated():
+    buffer = TFBuffer(cache_time=1.0, max_history=50)
+    for i in range(200):
+        buffer.set_transform(_tf('map', 'base', x=float(i), stamp=i * 0.01))
+    frame = buffer.frames()['base']
+    assert frame['samples'] <= 50 and abs(frame['latest'] - 1.99) < 1e-9
+
+    first = buffer.lookup_matrix('map', 'base')
+    assert buffer.lookup_matrix('map', 'base') is first  # 最新时刻查询命中缓存
+    buffer.set_transform(_tf('map', 'base', x=-1.0, stamp=2.0))
+    assert buffer.lookup_matrix('map', 'base')[0, 3] == -1.0
+
+
+def test_static_transforms_ignore_time():
+    buffer = TFBuffer()
+    buffer.add_message('/tf_static', {'transforms': [_tf('base', 'laser', x=0.5, stamp=1.0)]})
+    assert buffer.frames()['laser']['static']
+    assert buffer.lookup_transform('base', 'laser', 500.0)['translation']['x'] == 0.5
+
+
+def test_plugin_manager_injects_transform_lookup():
+    buffer = TFBuffer()
+    manager = PluginManager()
+    manager.transform_lookup = buffer.lookup_matrix
+    plugin = LaserScanPlugin()
+    manager.register_plugin(plugin)
+    assert plugin.transform_lookup == buffer.lookup_matrix
+
+
+def test_fixed_frame_transformer_transforms_geometry():
+    buffer = TFBuffer()
+    buffer.set_transform(_tf('map', 'laser', x=1.0, yaw=math.pi / 2))
+    transformer = FixedFrameTransformer(buffer.lookup_matrix)
+    manager = PluginManager()
+    manager.register_plugin(LaserScanPlugin())
+    manager.initialized = True
+
+    scan = {'header': {'frame_id': 'laser'}, 'angle_min': 0.0, 'angle_increment': math.pi / 2,
+            'range_min': 0.0, 'range_max': 10.0, 'ranges': [1.0, 2.0]}
+    raw = {'topic': '/scan', 'message_type': 'sensor_msgs/LaserScan', 'data': scan}
+    processed = asyncio.run(manager.process_message('/scan', 'sensor_msgs/LaserScan', raw))
+    # 未选择固定坐标系时原样返回
+    assert transformer.transform(processed, None) is processed
+    result = transformer.transform(processed, 'map')
+    cloud = result['data']
+    assert cloud['header']['frame_id'] == 'map' and result['fixed_frame'] == 'map'
+    assert processed['data']['header']['frame_id'] == 'laser'  # 原消息不被修改
+    points = np.frombuffer(base64.b64decode(cloud['data']), dtype='<f4').reshape(-1, 3)
+    # laser 中的 (1, 0) 与 (0, 2) 绕 z 转 90° 后平移 (1, 0)
+    np.testing.assert_allclose(points, [[1, 1, 0], [-1, 0, 0]], atol=1e-6)
+
+    path = {'header': {'frame_id': 'laser'}, 'poses': [
+        {'header': {'frame_id': 'laser'}, 'pose': {'position': {'x': 1.0, 'y': 0.0, 'z': 0.0},
+                                                   'orientation': {'x': 0.0, 'y': 0.0, 'z': 0.0, 'w': 1.0}}}]}
+    out = transformer.transform({'message_type': 'nav_msgs/Path', 'data': path}, 'map')['data']
+    pose = out['poses'][0]['pose']
+    assert abs(pose['position']['x'] - 1.0) < 1e-9 and abs(pose['position']['y'] - 1.0) < 1e-9
+    assert abs(pose['orientation']['z'] - math.sin(math.pi / 4)) < 1e-9
+    assert path['poses'][0]['pose']['position']['x'] == 1.0  # 输入未被修改
+
+    delta = {'type': 'MarkerArrayDelta', 'added': [{'header': {'frame_id': 'map'}, 'pose': {}}], 'modified': [], 'removed': []}
+    out = transformer.transform({'message_type': 'visualization_msgs/MarkerArray', 'data': delta}, 'map')
+    assert out['data']['added'][0]['pose'] == {}  # 已在固定坐标系中的 Marker 不变
+
+
+def test_unchanged_path_is_resent_while_a_client_uses_another_fixed_frame():
+    plugin = PathDecimationPlugin()
+    pose = {'pose': {'position': {'x': 1.0, 'y': 0.0, 'z': 0.0}, 'orientation': {'w': 1.0}}}
+    message = {'topic': '/plan', 'message_type': 'nav_msgs/Path',
+               'data': {'header': {'frame_id': 'base_link'}, 'poses': [pose, pose]}}
+    assert asyncio.run(plugin.process_message('/plan', 'nav_msgs/Path', message)) is not None
+    assert asyncio.run(plugin.process_message('/plan', 'nav_msgs/Path', message)) is None
+    # base_link 中不变的路径在 map 中随机器人移动，需要重发以按当前 TF 变换
+    plugin.config.settings['fixed_frames'] = ['map']
+    assert asyncio.run(plugin.process_message('/plan', 'nav_msgs/Path', message)) is not None
+    plugin.config.settings['fixed_frames'] = ['base_link']
+    assert asyncio.run(plugin.process_message('/plan', 'nav_msgs/Path', message)) is None
+
+
+def test_tf_plugin_separates_static_and_dynamic():
+    plugin = TFMessagePlugin()
+
+    static = {'data': {'transforms': [_tf('base', 'laser', x=0.5)]}}
+    first = asyncio.run(plugin.process_message('/tf_static', 'tf2_msgs/TFMessage', static))
+    assert first['type'] == 'tf_static'
+    # 未变化的静态变换不再推送
+    assert asyncio.run(plugin.process_message('/tf_static', 'tf2_msgs/TFMessage', static)) is None
+    assert [t['child_frame_id'] for t in plugin.get_static_snapshot()['transforms']] == ['laser']
+
+    dynamic = {'data': {'transforms': [_tf('odom', 'robot1'), _tf('odom', 'robot2')]}}
+    out = asyncio.run(plugin.process_message('/tf', 'tf2_msgs/TFMessage', dynamic))
+    assert out['type'] == 'tf_dynamic' and len(out['data']['transforms']) == 2
+    assert set(plugin.static_frames) == {'laser'}
+
+
+def test_buffer_evicts_stale_dynamic_edges():
+    buffer = TFBuffer(stale_timeout=5.0)
+    buffer.add_message('/tf_static', {'transforms': [_tf('base', 'laser')]})
+    buffer.add_message('/tf', {'transforms': [_tf('odom', 'base')]})
+    assert buffer.lookup_matrix('odom', 'laser') is not None
+
+    now = time.time()
+    assert buffer.evict_stale(now) == []
+    assert buffer.evict_stale(now + 6.0) == ['base']
+    assert set(buffer.frames()) == {'laser'}
+    assert buffer.lookup_matrix('odom', 'laser') is None
+
+
+def test_buffer_keeps_frames_while_paused():
+    buffer = TFBuffer(stale_timeout=5.0)
+    buffer.add_message('/tf', {'transforms': [_tf('odom', 'base')]})
+    now = time.time()
+    # 回放暂停 60 秒期间不判定过期
+    buffer.set_paused(True, now)
+    assert buffer.evict_stale(now + 60.0) == []
+    # 恢复后接收时间顺延暂停时长，不会立即过期
+    buffer.set_paused(False, now + 60.0)
+    assert buffer.evict_stale(now + 61.0) == []
+    assert buffer.evict_stale(now + 66.0) == ['base']
@@ -5,6 +5,7 @@ import {
 import ConfigManager from '../services/ConfigManager';
 import ConfigRenderer from './ConfigRenderer';
 import ParameterService from '../services/ParameterService';
+import { useAppContext } from '../services/AppContext';
 import _ from 'lodash';
 
 const { Title, Paragraph } = Typography;
@@ -13,6 +14,8 @@ const { Option } = Select;
 const ignoreCategories = ['layouts'];
 
 const NewConfigPage = () => {
+    const { wsManager } = useAppContext();
+
     // State for managing the selection dropdowns
     const [allConfigs, setAllConfigs] = useState({});
     const [selectedCategory, setSelectedCategory] = useState(null);
@@ -65,10 +68,30 @@ const NewConfigPage = () => {
             // Set the manager instance in state so that UI controls like buttons can use it.
             setConfigManager(manager);
 
+            // Keep the view in sync with edits made by other clients.
+            const subscription = { category: selectedCategory, name: selectedConfigName, path: [] };
+            const subscribe = () => wsManager.send({ type: 'param_subscribe', data: subscription });
+            const handleParamChanged = (event) => {
+                if (event.category !== selectedCategory || event.name !== selectedConfigName) return;
+                if (event.deleted) {
+                    setCurrentConfig(null);
+                    return;
+                }
+                manager.applyRemoteChanges(event.changes);
+            };
+            wsManager.on('param_changed', handleParamChanged);
+            wsManager.on('websocket_connected', subscribe);
+            subscribe();
+
             // Unsubscribe on cleanup to prevent memory leaks.
-            return () => manager.unsubscribe();
+            return () => {
+                manager.unsubscribe();
+                wsManager.off('param_changed', handleParamChanged);
+                wsManager.off('websocket_connected', subscribe);
+                wsManager.send({ type: 'param_unsubscribe', data: subscription });
+            };
         }
-    }, [selectedCategory, selectedConfigName]);
+    }, [selectedCategory, selectedConfigName, wsManager]);
 
     const handleCategoryChange = (value) => {
         setSelectedCategory(value);
@@ -0,0 +1,157 @@
+import React, { useEffect, useRef, useState } from 'react';
+import * as THREE from 'three';
+import { VisualizationPlugin } from '../base/VisualizationPlugin';
+import TFWrapper from '../base/TFWrapper';
+import ApiService from '../../../services/ApiService';
+
+// 后端 OccupancyGridPlugin 以分块增量推送地图（type: 'OccupancyGridTiles'）：
+// full 为全量，否则只包含自 base_version 以来变化的块；本地版本与 base_version 不一致时
+// 通过 /api/topics/map_tiles 补齐。未经后端插件处理的原始 OccupancyGrid 按单个全量块处理。
+
+async function decodeCells(tile) {
+  if (typeof tile.data !== 'string') {
+    return Int8Array.from(tile.data || []);
+  }
+  const raw = atob(tile.data);
+  let bytes = new Uint8Array(raw.length);
+  for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+  if (tile.encoding === 'zlib+base64') {
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+    bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+  }
+  return new Int8Array(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+}
+
+function toTilesPayload(data) {
+  if (data?.type === 'OccupancyGridTiles') return data;
+  const info = data?.info || {};
+  return {
+    header: data?.header,
+    info,
+    version: null,
+    base_version: 0,
+    full: true,
+    tiles: [{ x: 0, y: 0, width: info.width || 0, height: info.height || 0, data: data?.data || [] }],
+  };
+}
+
+function sameLayout(a, b) {
+  return a && b && a.width === b.width && a.height === b.height &&
+    a.resolution === b.resolution && JSON.stringify(a.origin) === JSON.stringify(b.origin);
+}
+
+// 占用值 -1 未知（灰）、0 空闲（白）~ 100 占据（黑）
+function writeTile(pixels, mapWidth, tile, cells) {
+  for (let row = 0; row < tile.height; row++) {
+    for (let col = 0; col < tile.width; col++) {
+      const value = cells[row * tile.width + col];
+      const offset = ((tile.y + row) * mapWidth + tile.x + col) * 4;
+      const shade = value < 0 ? 128 : 255 - Math.round(Math.min(value, 100) * 2.55);
+      pixels[offset] = shade;
+      pixels[offset + 1] = shade;
+      pixels[offset + 2] = shade;
+      pixels[offset + 3] = value < 0 ? 96 : 255;
+    }
+  }
+}
+
+function MapTiles({ topic, data, config }) {
+  const stateRef = useRef({ info: null, pixels: null, texture: null, version: null });
+  const queueRef = useRef(Promise.resolve());
+  const [layout, setLayout] = useState(null);
+
+  useEffect(() => {
+    if (!data) return;
+    const state = stateRef.current;
+
+    const apply = async (payload) => {
+      const info = payload.info || {};
+      if (payload.full && !sameLayout(state.info, info)) {
+        if (state.texture) state.texture.dispose();
+        state.pixels = new Uint8Array(info.width * info.height * 4);
+        state.texture = new THREE.DataTexture(state.pixels, info.width, info.height, THREE.RGBAFormat);
+        state.texture.magFilter = THREE.NearestFilter;
+        state.info = info;
+        setLayout({ info, texture: state.texture });
+      }
+      if (!state.texture) return;
+      for (const tile of payload.tiles || []) {
+        writeTile(state.pixels, state.info.width, tile, await decodeCells(tile));
+      }
+      state.texture.needsUpdate = true;
+      state.version = payload.version;
+    };
+
+    const process = async () => {
+      let payload = toTilesPayload(data);
+      if (!payload.full && payload.base_version !== state.version) {
+        // 漏掉了中间的增量（或尚无全量），向后端补齐
+        try {
+          payload = await ApiService.getMapTiles(topic, state.version ?? 0);
+        } catch (error) {
+          console.error(`Failed to resync map tiles for ${topic}:`, error);
+          return;
+        }
+      }
+      await apply(payload);
+    };
+
+    queueRef.current = queueRef.current.then(process).catch(error => {
+      console.error(`Failed to apply map tiles for ${topic}:`, error);
+    });
+  }, [data, topic]);
+
+  useEffect(() => () => {
+    if (stateRef.current.texture) stateRef.current.texture.dispose();
+  }, []);
+
+  if (!layout) return null;
+  const { info, texture } = layout;
+  const resolution = info.resolution || 0.05;
+  const width = info.width * resolution;
+  const height = info.height * resolution;
+  const position = info.origin?.position || { x: 0, y: 0, z: 0 };
+  const orientation = info.origin?.orientation || { x: 0, y: 0, z: 0, w: 1 };
+
+  return (
+    <group
+      position={[position.x || 0, position.y || 0, position.z || 0]}
+      quaternion={[orientation.x || 0, orientation.y || 0, orientation.z || 0, orientation.w ?? 1]}
+    >
+      <mesh position={[width / 2, height / 2, config?.z_offset?.__value__ ?? 0]}>
+        <planeGeometry args={[width, height]} />
+        <meshBasicMaterial
+          map={texture}
+          transparent
+          opacity={config?.alpha?.__value__ ?? 0.7}
+          side={THREE.DoubleSide}
+          depthWrite={false}
+        />
+      </mesh>
+    </group>
+  );
+}
+
+export class OccupancyGridPlugin extends VisualizationPlugin {
+  constructor() {
+    super('OccupancyGrid', ["nav_msgs/OccupancyGrid", "nav_msgs/msg/OccupancyGrid"], 6, '1.0.0');
+  }
+
+  render(topic, type, data, frameId, tfManager, config) {
+    const displayConfig = config || OccupancyGridPlugin.getConfigTemplate();
+    return (
+      <TFWrapper frameId={frameId} tfManager={tfManager}>
+        <MapTiles topic={topic} data={data} config={displayConfig} />
+      </TFWrapper>
+    );
+  }
+
+  static getConfigTemplate() {
+    return {
+      alpha: { __value__: 0.7, __metadata__: { type: 'number', min: 0, max: 1, step: 0.05 } },
+      z_offset: { __value__: 0, __metadata__: { type: 'number', min: -1, max: 1, step: 0.01 } },
+    };
+  }
+}
+
+export default new OccupancyGridPlugin();
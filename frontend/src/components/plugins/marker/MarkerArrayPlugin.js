@@ -0,0 +1,190 @@
+import React, { useEffect, useMemo, useRef, useState } from 'react';
+import * as THREE from 'three';
+import { Text } from '@react-three/drei';
+import { VisualizationPlugin } from '../base/VisualizationPlugin';
+import TFWrapper from '../base/TFWrapper';
+import ApiService from '../../../services/ApiService';
+
+// 后端 MarkerArrayPlugin 以增量推送 Marker（type: 'MarkerArrayDelta'）：
+// full 为全量，否则只包含新增/修改的 Marker 与被删除的 (ns, id)；每次增量版本号加一，
+// 发现版本不连续时通过 /api/topics/markers 重新获取全量（服务端已预变换到固定坐标系时
+// 按增量中的 fixed_frame 获取同一坐标系的全量）。未经后端插件处理的原始 MarkerArray 视为全量。
+
+const ARROW = 0;
+const CUBE = 1;
+const SPHERE = 2;
+const CYLINDER = 3;
+const LINE_STRIP = 4;
+const LINE_LIST = 5;
+const CUBE_LIST = 6;
+const SPHERE_LIST = 7;
+const POINTS = 8;
+const TEXT_VIEW_FACING = 9;
+
+const markerKey = (marker) => `${marker.ns || ''}/${marker.id || 0}`;
+
+function toDelta(data) {
+  if (data?.type === 'MarkerArrayDelta') return data;
+  const markers = data?.markers || (data && 'id' in data ? [data] : []);
+  return { version: null, full: true, added: markers, modified: [], removed: [] };
+}
+
+function markerColor(marker) {
+  const c = marker.color || {};
+  return { color: new THREE.Color(c.r ?? 1, c.g ?? 1, c.b ?? 1), opacity: c.a ?? 1 };
+}
+
+function MarkerShape({ marker }) {
+  const { color, opacity } = markerColor(marker);
+  const s = marker.scale || {};
+  const p = marker.pose?.position || {};
+  const q = marker.pose?.orientation || {};
+  const material = <meshStandardMaterial color={color} transparent={opacity < 1} opacity={opacity} />;
+  const points = useMemo(() => {
+    const list = marker.points || [];
+    const arr = new Float32Array(list.length * 3);
+    list.forEach((pt, i) => { arr[i * 3] = pt.x || 0; arr[i * 3 + 1] = pt.y || 0; arr[i * 3 + 2] = pt.z || 0; });
+    return arr;
+  }, [marker.points]);
+
+  let body = null;
+  switch (marker.type) {
+    case CUBE:
+      body = <mesh scale={[s.x || 1, s.y || 1, s.z || 1]}><boxGeometry args={[1, 1, 1]} />{material}</mesh>;
+      break;
+    case SPHERE:
+      body = <mesh scale={[s.x || 1, s.y || 1, s.z || 1]}><sphereGeometry args={[0.5, 16, 16]} />{material}</mesh>;
+      break;
+    case CYLINDER:
+      body = (
+        <mesh scale={[s.x || 1, s.z || 1, s.y || 1]} rotation={[Math.PI / 2, 0, 0]}>
+          <cylinderGeometry args={[0.5, 0.5, 1, 16]} />{material}
+        </mesh>
+      );
+      break;
+    case ARROW:
+      body = (
+        <group scale={[s.x || 1, s.y || 0.1, s.z || 0.1]}>
+          <mesh position={[0.4, 0, 0]} rotation={[0, 0, -Math.PI / 2]}><cylinderGeometry args={[0.5, 0.5, 0.8, 12]} />{material}</mesh>
+          <mesh position={[0.9, 0, 0]} rotation={[0, 0, -Math.PI / 2]}><coneGeometry args={[1, 0.2, 12]} />{material}</mesh>
+        </group>
+      );
+      break;
+    case LINE_STRIP:
+    case LINE_LIST: {
+      const Line = marker.type === LINE_STRIP ? 'line' : 'lineSegments';
+      body = (
+        <Line key={points.length}>
+          <bufferGeometry>
+            <bufferAttribute attach="attributes-position" array={points} itemSize={3} count={points.length / 3} />
+          </bufferGeometry>
+          <lineBasicMaterial color={color} transparent={opacity < 1} opacity={opacity} />
+        </Line>
+      );
+      break;
+    }
+    case CUBE_LIST:
+    case SPHERE_LIST:
+      body = (
+        <group>
+          {(marker.points || []).map((pt, i) => (
+            <mesh key={i} position={[pt.x || 0, pt.y || 0, pt.z || 0]} scale={[s.x || 1, s.y || 1, s.z || 1]}>
+              {marker.type === CUBE_LIST ? <boxGeometry args={[1, 1, 1]} /> : <sphereGeometry args={[0.5, 10, 10]} />}
+              {material}
+            </mesh>
+          ))}
+        </group>
+      );
+      break;
+    case POINTS:
+      body = (
+        <points key={points.length}>
+          <bufferGeometry>
+            <bufferAttribute attach="attributes-position" array={points} itemSize={3} count={points.length / 3} />
+          </bufferGeometry>
+          <pointsMaterial color={color} size={s.x || 0.05} transparent={opacity < 1} opacity={opacity} />
+        </points>
+      );
+      break;
+    case TEXT_VIEW_FACING:
+      body = <Text fontSize={s.z || 0.2} color={color} anchorX="center" anchorY="middle">{marker.text || ''}</Text>;
+      break;
+    default:
+      return null;
+  }
+
+  return (
+    <group position={[p.x || 0, p.y || 0, p.z || 0]} quaternion={[q.x || 0, q.y || 0, q.z || 0, q.w ?? 1]}>
+      {body}
+    </group>
+  );
+}
+
+function MarkerScene({ topic, data, tfManager }) {
+  const markersRef = useRef(new Map());
+  const versionRef = useRef(null);
+  const queueRef = useRef(Promise.resolve());
+  const [revision, setRevision] = useState(0);
+
+  useEffect(() => {
+    if (!data) return;
+    const markers = markersRef.current;
+
+    const apply = (delta) => {
+      if (delta.full) markers.clear();
+      (delta.removed || []).forEach(m => markers.delete(markerKey(m)));
+      [...(delta.added || []), ...(delta.modified || [])].forEach(m => markers.set(markerKey(m), m));
+      versionRef.current = delta.version;
+      setRevision(r => r + 1);
+    };
+
+    const process = async () => {
+      let delta = toDelta(data);
+      if (!delta.full && delta.version !== versionRef.current + 1) {
+        // 漏掉了中间的增量（或尚无全量），向后端获取全量
+        try {
+          delta = await ApiService.getMarkers(topic, data.fixed_frame);
+        } catch (error) {
+          console.error(`Failed to resync markers for ${topic}:`, error);
+          return;
+        }
+      }
+      apply(delta);
+    };
+
+    queueRef.current = queueRef.current.then(process).catch(error => {
+      console.error(`Failed to apply markers for ${topic}:`, error);
+    });
+  }, [data, topic]);
+
+  const markers = useMemo(() => Array.from(markersRef.current.entries()), [revision]);
+
+  return (
+    <group>
+      {markers.map(([key, marker]) => (
+        <TFWrapper key={key} frameId={marker.header?.frame_id || 'world'} tfManager={tfManager}>
+          <MarkerShape marker={marker} />
+        </TFWrapper>
+      ))}
+    </group>
+  );
+}
+
+export class MarkerArrayPlugin extends VisualizationPlugin {
+  constructor() {
+    super('MarkerArray', [
+      "visualization_msgs/MarkerArray", "visualization_msgs/msg/MarkerArray",
+      "visualization_msgs/Marker", "visualization_msgs/msg/Marker",
+    ], 7, '1.0.0');
+  }
+
+  render(topic, type, data, frameId, tfManager, config) {
+    return <MarkerScene topic={topic} data={data} tfManager={tfManager} />;
+  }
+
+  static getConfigTemplate() {
+    return {};
+  }
+}
+
+export default new MarkerArrayPlugin();
@@ -62,6 +62,15 @@ class ApiService {
       method: 'POST',
     });
   }
+
+  static async getMarkers(topic, fixedFrame = null) {
+    const frame = fixedFrame ? `&fixed_frame=${encodeURIComponent(fixedFrame)}` : '';
+    return this.request(`/topics/markers?topic=${encodeURIComponent(topic)}${frame}`);
+  }
+
+  static async getMapTiles(topic, since = 0) {
+    return this.request(`/topics/map_tiles?topic=${encodeURIComponent(topic)}&since=${since}`);
+  }
 }
 
 export default ApiService;
\ No newline at end of file
@@ -35,6 +35,9 @@ export const AppProvider = ({ children }) => {
   const [missionPoints, setMissionPoints] = useState([]);
   const [selectedAreas, setSelectedAreas] = useState([]);
   const [navGoals, setNavGoals] = useState([]);
+  // 服务端预变换的固定坐标系（按客户端选择），null 表示在前端变换
+  const [serverFixedFrame, setServerFixedFrameState] = useState(null);
+  const serverFixedFrameRef = useRef(null);
 
   // Add debug info function with message aggregation
   const addDebugInfo = (message, type = 'info') => {
@@ -89,6 +92,12 @@ export const AppProvider = ({ children }) => {
         addDebugInfo(`Data received on topic: ${message.topic}`, 'data');
       }
     };
+    const handleTFEvicted = (data) => {
+      tfManager.removeFrames(data.frames);
+      setTfFrames(new Map(tfManager.frames));
+      setTfHierarchy(new Map(tfManager.frameHierarchy));
+      addDebugInfo(`TF frames expired: ${(data.frames || []).join(', ')}`, 'system');
+    };
     const handleTopicSubscribed = (data) => {
       setSubscribedTopics(prev => new Set([...prev, data.topic]));
       setTopicDataCounts(prev => {
@@ -108,8 +117,16 @@ export const AppProvider = ({ children }) => {
       });
       addDebugInfo(`Unsubscribed from topic: ${data.topic}`, 'system');
     };
+    const handleFixedFrame = (data) => {
+      serverFixedFrameRef.current = data.frame || null;
+      setServerFixedFrameState(data.frame || null);
+    };
     const handleWebSocketConnected = () => {
       setWsStatus('connected');
+      // 固定坐标系按连接保存，重连后重新设置
+      if (serverFixedFrameRef.current) {
+        wsManager.send({ type: 'set_fixed_frame', data: { frame: serverFixedFrameRef.current } });
+      }
       addDebugInfo('WebSocket connected', 'success');
     };
     const handleWebSocketDisconnected = () => {
@@ -134,6 +151,8 @@ export const AppProvider = ({ children }) => {
 
     wsManager.on('connection_status', handleConnectionStatus);
     wsManager.on('data_update', handleDataUpdate);
+    wsManager.on('tf_evicted', handleTFEvicted);
+    wsManager.on('fixed_frame', handleFixedFrame);
     wsManager.on('topic_subscribed', handleTopicSubscribed);
     wsManager.on('topic_unsubscribed', handleTopicUnsubscribed);
     wsManager.on('websocket_connected', handleWebSocketConnected);
@@ -151,6 +170,11 @@ export const AppProvider = ({ children }) => {
     };
   }, [wsManager]);
 
+  const setServerFixedFrame = (frame) => {
+    serverFixedFrameRef.current = frame || null;
+    wsManager.send({ type: 'set_fixed_frame', data: { frame: frame || null } });
+  };
+
   const updateToolParams = (tool, params) => {
     setToolParams(prev => ({ ...prev, [tool]: { ...prev[tool], ...params } }));
   };
@@ -227,6 +251,8 @@ export const AppProvider = ({ children }) => {
     wsStatus,
     tfFrames,
     tfHierarchy,
+    serverFixedFrame,
+    setServerFixedFrame,
     setSubscribedTopics,
     debugInfo,      // Expose debug info
     addDebugInfo,   // Expose function
@@ -93,19 +93,20 @@ class ConfigManager {
 
     /**
      * Manually triggers a sync to the backend.
-     * To be used in 'manual' mode.
+     * Only the parameters whose values changed are sent, as one atomic batch request.
      */
     applyChanges = async () => {
         if (this.mode === 'manual' || this.mode === 'realtime') {
+            // Snapshot what is being sent, so edits made while the request is in flight stay pending
+            const synced = _.cloneDeep(this.currentConfig);
+            const operations = this.collectChanges(synced, this.originalConfig);
+            if (operations.length === 0) {
+                return;
+            }
             try {
-                // We pass the raw data, not the one with __is_leaf__ etc.
-                const rawConfig = await ParameterService.loadConfig(this.category, this.name, true);
-                // selectively update the raw config with our changes
-                const updatedRawConfig = this.updateRawConfig(rawConfig, this.currentConfig);
-
-                await ParameterService.saveConfig(this.category, this.name, updatedRawConfig);
+                await ParameterService.batchUpdate(this.category, this.name, operations);
                 // After successful sync, update the original config to reflect the new baseline
-                this.originalConfig = _.cloneDeep(this.currentConfig);
+                this.originalConfig = synced;
                 
                 // Notify subscribers that the data has changed, which will trigger a re-render.
                 if (this.onDataUpdate) {
@@ -119,24 +120,48 @@ class ConfigManager {
         }
     };
 
-    // Helper to apply updates from the UI-friendly format to the raw format
-    updateRawConfig(rawObj, uiObj) {
+    // Helper to turn edited parameter values into 'update' operations for the batch endpoint
+    collectChanges(uiObj, originalObj, path = []) {
+        const operations = [];
         for (const key in uiObj) {
+            const node = uiObj[key];
+            const original = originalObj ? originalObj[key] : undefined;
             // A node is a parameter if it has a __value__ property.
-            if (uiObj[key] && uiObj[key].hasOwnProperty('__value__')) {
-                if (rawObj.hasOwnProperty(key)) {
-                    // Update the value in the raw config.
-                    rawObj[key].__value__ = uiObj[key].__value__;
+            if (node && node.hasOwnProperty('__value__')) {
+                if (!original || !_.isEqual(node.__value__, original.__value__)) {
+                    operations.push({ op: 'update', path: path.concat(key), value: node.__value__ });
                 }
             }
             // Recurse for nested objects that are not special keys.
-            else if (_.isObject(uiObj[key]) && _.isObject(rawObj[key]) && !key.startsWith('__')) {
-                this.updateRawConfig(rawObj[key], uiObj[key]);
+            else if (_.isObject(node) && !key.startsWith('__')) {
+                operations.push(...this.collectChanges(node, original, path.concat(key)));
             }
         }
-        return rawObj;
+        return operations;
     }
 
+    /**
+     * Applies parameter changes pushed by the backend ('param_changed' events).
+     * Paths use the raw config format, so they map directly onto the cached configs.
+     * @param {Array<{path: string[], old: any, new: any}>} changes
+     */
+    applyRemoteChanges = (changes) => {
+        for (const change of changes) {
+            for (const target of ['originalConfig', 'currentConfig']) {
+                if (change.path.length === 0) {
+                    this[target] = _.cloneDeep(change.new ?? {});
+                } else if (change.new === null || change.new === undefined) {
+                    _.unset(this[target], change.path);
+                } else {
+                    _.set(this[target], change.path, _.cloneDeep(change.new));
+                }
+            }
+        }
+        if (this.onDataUpdate) {
+            this.onDataUpdate(_.cloneDeep(this.currentConfig));
+        }
+    };
+
     /**
      * Reverts all changes to the last synced state.
      */
@@ -112,6 +112,32 @@ class ParameterService {
         return await response.json();
     }
 
+    /**
+     * 原子地批量应用参数操作，一次请求、一次写入。
+     * @param {Array<{op: 'add'|'update'|'delete', path: string[], paramType?: string, name?: string, value?: any, metadata?: object}>} operations
+     * @param {number} [expectedVersion] - 期望的当前版本号，不一致时请求失败 (409)
+     * @returns {Promise<{success: boolean, version: number}>}
+     */
+    static async batchUpdate(category, configName, operations, expectedVersion) {
+        const payload = {
+            operations: operations.map(({ op, path, paramType, name, value, metadata }) => ({
+                op, path, param_type: paramType, name, value, metadata,
+            })),
+        };
+        if (expectedVersion !== undefined) payload.expected_version = expectedVersion;
+        const response = await fetch(`${API_BASE_URL}/configs/${category}/${configName}/param/batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(payload),
+        });
+        if (!response.ok) {
+            const error = await response.json();
+            const detail = error.detail;
+            throw new Error((detail && detail.message) || detail || 'Failed to apply parameter operations');
+        }
+        return await response.json();
+    }
+
     static async deleteParameter(category, configName, path) {
         const url = new URL(`${API_BASE_URL}/configs/${category}/${configName}/param`);
         if (path && path.length > 0) {
@@ -131,6 +131,31 @@ export class TFManager {
     this.logTFHierarchy();
   }
 
+  // 移除服务端判定过期的坐标系
+  removeFrames(frameIds) {
+    let removed = false;
+    (frameIds || []).forEach(frameId => {
+      if (!this.frames.has(frameId)) return;
+      const parent = this.frameHierarchy.get(frameId);
+      const siblings = this.childrenMap.get(parent);
+      if (siblings) {
+        const index = siblings.indexOf(frameId);
+        if (index > -1) {
+          siblings.splice(index, 1);
+        }
+      }
+      this.frames.delete(frameId);
+      this.frameHierarchy.delete(frameId);
+      this.depth.delete(frameId);
+      removed = true;
+    });
+    if (!removed) return;
+
+    this._recomputeDepths();
+    this.transformCache.clear();
+    this.emit('update');
+  }
+
   // 打印TF树层级结构
   logTFHierarchy() {
     console.groupCollapsed('[TFManager] Current TF Hierarchy');